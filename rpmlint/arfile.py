@@ -0,0 +1,156 @@
+from collections import namedtuple
+import mmap
+import os
+
+
+class ArError(Exception):
+    """The file is not an ar archive we understand."""
+
+
+AR_MAGIC = b'!<arch>\n'
+THIN_AR_MAGIC = b'!<thin>\n'
+HEADER_SIZE = 60
+HEADER_END = b'`\n'
+# symbol tables (GNU, GNU 64-bit and BSD ones) and the GNU table of long
+# names, 'ar t' does not list them
+SPECIAL_MEMBERS = {b'/', b'//', b'/SYM64/', b'__.SYMDEF', b'__.SYMDEF SORTED', b'__.SYMDEF_64',
+                   b'__.SYMDEF_64 SORTED'}
+
+# member of the archive, its data are size bytes at start of the archive
+# (start is None for members of thin archives, they are stored in the file
+# called name relative to the archive)
+ArMember = namedtuple('ArMember', 'name start size')
+
+
+def is_archive(data):
+    return data[:len(AR_MAGIC)] in (AR_MAGIC, THIN_AR_MAGIC)
+
+
+def archive_members(data):
+    """
+    Return ArMembers of the archive data in the order 'ar t' lists them.
+
+    GNU (/123 references to the // table) and BSD (#1/ names stored in
+    front of the data) long names are resolved.
+    """
+    magic = data[:len(AR_MAGIC)]
+    if magic not in (AR_MAGIC, THIN_AR_MAGIC):
+        raise ArError('not an ar archive')
+    thin = magic == THIN_AR_MAGIC
+    long_names = b''
+    members = []
+    offset = len(AR_MAGIC)
+    while offset < len(data):
+        # members are aligned to even offsets, some archivers pad with a new line
+        if offset + HEADER_SIZE > len(data):
+            if data[offset:] == b'\n':
+                break
+            raise ArError('truncated archive member header')
+        header = data[offset:offset + HEADER_SIZE]
+        if header[58:60] != HEADER_END:
+            raise ArError('malformed archive member header')
+        name = header[:16].rstrip(b' ')
+        try:
+            size = int(header[48:58])
+        except ValueError:
+            raise ArError('malformed archive member size') from None
+        start = offset + HEADER_SIZE
+        # the members of thin archives are not stored in them, only the
+        # symbol table and the long names are
+        stored = not thin or name in SPECIAL_MEMBERS
+        offset = start + (size + size % 2 if stored else 0)
+        if stored and start + size > len(data):
+            raise ArError('truncated archive member')
+
+        if name == b'//':
+            long_names = data[start:start + size]
+            continue
+        if name in SPECIAL_MEMBERS:
+            continue
+        if name.startswith(b'#1/') and name[3:].isdigit():
+            length = int(name[3:])
+            if length > size:
+                raise ArError('malformed archive member name')
+            name = data[start:start + length].rstrip(b'\0')
+            start += length
+            size -= length
+        elif name.startswith(b'/') and name[1:].isdigit():
+            name_offset = int(name[1:])
+            end = long_names.find(b'/\n', name_offset)
+            if name_offset >= len(long_names) or end < 0:
+                raise ArError('malformed archive long name')
+            name = long_names[name_offset:end]
+        elif name.endswith(b'/'):
+            name = name[:-1]
+        members.append(ArMember(name.decode('utf-8', 'replace'), None if thin else start, size))
+    return members
+
+
+class ArArchive:
+    """
+    The ar archive (regular or thin) mapped into memory.
+
+    member_data() gives the data of the members without copying them so
+    that they can be read directly, e.g. by rpmlint.elffile. data is an
+    already mapped content of the archive, the file is mapped otherwise.
+    Use the archive as a context manager, the mappings are closed at its
+    end.
+    """
+
+    def __init__(self, path, data=None):
+        self.path = path
+        self._mappings = []
+        if data is None:
+            data = self._map(path)
+        self.data = data
+        self.thin = data[:len(THIN_AR_MAGIC)] == THIN_AR_MAGIC
+        try:
+            self.members = archive_members(data)
+        except ArError:
+            self.close()
+            raise
+
+    @property
+    def names(self):
+        """Return names of the members like 'ar t' lists them."""
+        if self.thin:
+            return [self.member_path(member) for member in self.members]
+        return [member.name for member in self.members]
+
+    def member_path(self, member):
+        """Return path of the file with the member of the thin archive."""
+        return os.path.join(os.path.dirname(self.path), member.name)
+
+    def member_data(self, member):
+        """
+        Return (data, start, size) of the member, its data are size bytes at
+        start of data (the mapped archive or member file of thin archives).
+        """
+        if not self.thin:
+            return self.data, member.start, member.size
+        data = self._map(self.member_path(member))
+        if len(data) != member.size:
+            raise ArError(f'size of {member.name} does not match the thin archive')
+        return data, 0, member.size
+
+    def _map(self, path):
+        try:
+            with open(path, 'rb') as f:
+                if not f.seek(0, 2):
+                    return b''
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError as e:
+            raise ArError(str(e)) from e
+        self._mappings.append(data)
+        return data
+
+    def close(self):
+        for data in self._mappings:
+            data.close()
+        self._mappings = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,24 +1,54 @@
-import subprocess
-
+from rpmlint.arfile import ArArchive, ArError
 from rpmlint.helpers import ENGLISH_ENVIRONMENT
+from rpmlint.toolrunner import run_tool
 
 
 class ArParser:
     """
     Class contains all information obtained by ar command.
+
+    With the 'native' backend the names of the members are read by
+    rpmlint.arfile without running 'ar t', ar is still run for files it
+    does not understand so that the errors are reported the usual way. The
+    'ar' backend always runs it.
     """
 
-    def __init__(self, pkgfile_path):
+    BACKENDS = ('native', 'ar')
+
+    def __init__(self, pkgfile_path, backend='native'):
+        if backend not in self.BACKENDS:
+            raise ValueError(f'unknown ar backend {backend}')
         self.pkgfile_path = pkgfile_path
         self.objects = []
         self.parsing_failed_reason = None
+        self.backend = backend
+        if backend == 'native':
+            try:
+                with ArArchive(pkgfile_path) as archive:
+                    self.objects = archive.names
+                return
+            except ArError:
+                self.backend = 'ar'
         self.parse()
 
     def parse(self):
-        r = subprocess.run(['ar', 't', self.pkgfile_path], encoding='utf8',
-                           capture_output=True, env=ENGLISH_ENVIRONMENT)
+        r = run_tool(['ar', 't', self.pkgfile_path], encoding='utf8',
+                     capture_output=True, env=ENGLISH_ENVIRONMENT)
         if r.returncode != 0:
             self.parsing_failed_reason = r.stderr
             return
 
         self.objects = r.stdout.splitlines()
+
+    def to_dict(self):
+        return {'objects': self.objects, 'backend': self.backend}
+
+    @classmethod
+    def from_dict(cls, pkgfile_path, data):
+        """Return the parser with results of to_dict(), the file is not read."""
+        parser = cls.__new__(cls)
+        parser.pkgfile_path = pkgfile_path
+        parser.objects = data['objects']
+        parser.backend = data['backend']
+        parser.parsing_failed_reason = None
+        return parser
@@ -0,0 +1,249 @@
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+from rpmlint.filter import CheckResult, Diagnostic, DiagnosticSource
+from rpmlint.helpers import ENGLISH_ENVIRONMENT, print_warning
+from rpmlint.toolrunner import run_tool
+from rpmlint.version import __version__
+
+
+def file_digest(path):
+    """Return SHA-256 hex digest of the file content."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def tool_versions(tools):
+    """Return the first line of '<tool> --version' of the tools, detected once per process."""
+    versions = []
+    for tool in tools:
+        try:
+            r = run_tool([tool, '--version'], encoding='utf8', errors='replace',
+                         capture_output=True, env=ENGLISH_ENVIRONMENT)
+            versions.append(r.stdout.partition('\n')[0])
+        except OSError:
+            versions.append(None)
+    return versions
+
+
+class SqliteCache:
+    """
+    Persistent key-value store kept in a SQLite database.
+
+    Values are bytes. When the total size of the stored values exceeds
+    max_size bytes, the least recently used entries are evicted. Any
+    database error disables the cache with a warning, rpmlint then simply
+    works without it.
+    """
+
+    def __init__(self, path, max_size):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.disabled = False
+        self._db = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # the connection must not be shared with forked worker processes
+        if self._db is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=60, isolation_level=None,
+                                       check_same_thread=False)
+            self._pid = os.getpid()
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS cache '
+                             '(key TEXT PRIMARY KEY, value BLOB, size INTEGER, atime REAL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS cache_atime ON cache (atime)')
+        return self._db
+
+    def _disable(self, error):
+        print_warning(f'(none): W: disabling cache {self.path}: {error}')
+        self.disabled = True
+
+    def get(self, key):
+        """Return value stored for the key or None."""
+        if self.disabled:
+            return None
+        with self._lock:
+            try:
+                db = self._connection()
+                row = db.execute('SELECT value FROM cache WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    db.execute('UPDATE cache SET atime = ? WHERE key = ?', (time.time(), key))
+            except (OSError, sqlite3.Error) as e:
+                self._disable(e)
+                return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key, value):
+        """Store the value (bytes) for the key and evict old entries."""
+        if self.disabled:
+            return
+        with self._lock:
+            try:
+                db = self._connection()
+                db.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)',
+                           (key, value, len(value), time.time()))
+                self._evict(db)
+            except (OSError, sqlite3.Error) as e:
+                self._disable(e)
+
+    def _evict(self, db):
+        total = db.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+        if total <= self.max_size:
+            return
+        # make some room so that we do not evict on every insert
+        target = self.max_size * 0.9
+        victims = []
+        for key, size in db.execute('SELECT key, size FROM cache ORDER BY atime'):
+            if total <= target:
+                break
+            victims.append((key,))
+            total -= size
+        db.executemany('DELETE FROM cache WHERE key = ?', victims)
+
+
+class ResultCache(SqliteCache):
+    """
+    Raw diagnostics of already checked packages.
+
+    Entries are keyed by SHA-256 of the rpm file and a fingerprint of
+    everything else that affects the output of the checks: the effective
+    configuration, rpmlintrc filters, enabled checks, the command line
+    options deciding what is extracted and rpmlint version.
+    """
+
+    # options that do not affect the output of the checks
+    ignored_options = ('ExtractDir', 'PrefetchBudget', 'ContentMemoryBudget', 'CacheDir', 'ResultCacheSize',
+                       'MagicCacheSize', 'ElfCacheSize', 'ElfCheckJobs', 'ToolJobs')
+    # command line options that affect the output of the checks, the checks
+    # see no or all the files of the payload with them
+    output_options = ('header_only', 'extract_all')
+
+    def __init__(self, directory, max_size, config_state, rpmlintrc_filters, checks, options=None):
+        super().__init__(Path(directory) / 'results.sqlite', max_size)
+        options = {option: bool((options or {}).get(option)) for option in self.output_options}
+        fingerprint = json.dumps([config_state, rpmlintrc_filters, checks, options, __version__])
+        self.fingerprint = hashlib.sha256(fingerprint.encode()).hexdigest()
+
+    @classmethod
+    def config_state(cls, configuration):
+        """
+        Serialize the configuration, it has to be done before the checks are
+        loaded as they transform some of the values.
+        """
+        configuration = {k: v for k, v in configuration.items() if k not in cls.ignored_options}
+        return json.dumps(configuration, sort_keys=True, default=str)
+
+    def key(self, filename):
+        return f'{file_digest(filename)}-{self.fingerprint}'
+
+    def get_result(self, key):
+        """Return CheckResult stored for the key or None."""
+        value = self.get(key)
+        if value is None:
+            return None
+        data = json.loads(value)
+        after_checks = data['after_checks']
+        if after_checks is not None:
+            after_checks = self._load_diagnostics(after_checks)
+        return CheckResult(DiagnosticSource(*data['source']),
+                           self._load_diagnostics(data['diagnostics']),
+                           after_checks, data['error_details'])
+
+    def put_result(self, key, result):
+        data = {
+            'source': result.source,
+            'diagnostics': result.diagnostics,
+            'after_checks': result.after_checks,
+            'error_details': result.error_details,
+        }
+        self.put(key, json.dumps(data).encode())
+
+    @staticmethod
+    def _load_diagnostics(diagnostics):
+        return [Diagnostic(level, DiagnosticSource(*source), rpmlint_issue, tuple(details))
+                for level, source, rpmlint_issue, details in diagnostics]
+
+
+class MagicCache(SqliteCache):
+    """
+    Magic of file contents detected by libmagic.
+
+    Entries are keyed by the digest of the file content from the package
+    header and the libmagic version, so files shared by many packages and
+    builds (licenses, icons, unchanged binaries) are classified only once.
+    """
+
+    def __init__(self, directory, max_size, version):
+        super().__init__(Path(directory) / 'magic.sqlite', max_size)
+        self.version = version
+
+    def key(self, digest):
+        return f'{digest}-{self.version}'
+
+    def get_magic(self, digest):
+        """Return magic stored for the file digest or None."""
+        value = self.get(self.key(digest))
+        return None if value is None else value.decode()
+
+    def put_magic(self, digest, magic):
+        self.put(self.key(digest), magic.encode())
+
+
+class ElfCache(SqliteCache):
+    """
+    Results of the tools analysing ELF files and archives in BinariesCheck
+    (readelf, objdump, ar and the string scan), see ReadelfParser.to_dict()
+    etc.
+
+    Entries are keyed by the digest of the file content, versions of the
+    tools and the configuration deciding which of them are run, so
+    identical binaries shipped by rebuilt packages are analysed only once.
+    """
+
+    tools = ('readelf', 'objdump', 'ar')
+    # changed whenever to_dict() of any of the parsers changes
+    analysis_format = 2
+
+    def __init__(self, directory, max_size, config_state):
+        super().__init__(Path(directory) / 'elf.sqlite', max_size)
+        self.config_state = config_state
+        self._fingerprint = None
+
+    @property
+    def fingerprint(self):
+        # the tools are run only when the cache is really used
+        if self._fingerprint is None:
+            fingerprint = json.dumps([tool_versions(self.tools), self.analysis_format, self.config_state,
+                                      __version__])
+            self._fingerprint = hashlib.sha256(fingerprint.encode()).hexdigest()
+        return self._fingerprint
+
+    def key(self, digest):
+        return f'{digest}-{self.fingerprint}'
+
+    def get_analysis(self, digest):
+        """Return analysis (dict of the serialized parsers) stored for the file digest or None."""
+        value = self.get(self.key(digest))
+        return None if value is None else json.loads(value)
+
+    def put_analysis(self, digest, analysis):
+        self.put(self.key(digest), json.dumps(analysis).encode())
@@ -3,6 +3,24 @@ import re
 
 
 class AbstractCheck:
+    # Cheap predicates telling whether the check can report anything for a
+    # package, see is_applicable(). A check declaring some of them is skipped
+    # for packages matching none of them.
+    # glob patterns of packaged file paths
+    applicable_files = ()
+    # substrings of magic of packaged files
+    applicable_magic = ()
+    # whether the check reads content of the packaged files, checks which
+    # do not are run in --header-only mode
+    needs_content = True
+    # Files of binary packages the check reads the content of, only these
+    # are extracted when all the loaded checks declare them (see
+    # ContentFilter). None means any file.
+    # glob patterns of packaged file paths
+    content_files = None
+    # substrings of the header magic of packaged files
+    content_magic = ()
+
     def __init__(self, config, output):
         # Note: do not add any capturing parentheses here
         self.macro_regex = re.compile(r'%+[{(]?[a-zA-Z_]\w{2,}[)}]?')
@@ -16,6 +34,30 @@ class AbstractCheck:
             return self.check_source(pkg)
         return self.check_binary(pkg)
 
+    def is_applicable(self, pkg, index):
+        """
+        Return False if the check has nothing to do for the package.
+
+        Lint evaluates it against PackageIndex of the (rpm) package before
+        running the check and skips the check entirely for the package if it
+        does not apply.
+        """
+        if pkg.is_source:
+            if not self._overrides('check', 'check_source'):
+                return False
+        elif not self._overrides('check', 'check_binary'):
+            return False
+        if not self.applicable_files and not self.applicable_magic:
+            return True
+        # files the check reads are the likely ones to have the magic
+        return (index.has_files(self.applicable_files) or
+                index.has_magic(self.applicable_magic, self.content_files or ()))
+
+    def _overrides(self, *methods):
+        """Return True if the check overrides any of the AbstractCheck methods."""
+        return any(getattr(type(self), method) is not getattr(AbstractCheck, method)
+                   for method in methods)
+
     def check_source(self, pkg):
         return
 
@@ -63,6 +105,14 @@ class AbstractFilesCheck(AbstractCheck):
                 self.check_file(pkg, filename)
         self.checked_files += len(filenames)
 
+    def is_applicable(self, pkg, index):
+        # by default only the files matching the regexp are checked
+        if pkg.is_source or self.applicable_files or self.applicable_magic or \
+                self._overrides('check') or \
+                type(self).check_binary is not AbstractFilesCheck.check_binary:
+            return super().is_applicable(pkg, index)
+        return index.match_files(self.__files_re)
+
     def reset(self):
         self.checked_files = None
 
@@ -27,6 +27,8 @@ class AlternativesCheck(AbstractCheck):
     re_slave = re.compile(r'--slave\s+(?P<link>\S+)\s+(\S+)\s+(\S+)')
     command = 'update-alternatives'
     alts_requirement = 'alts'
+    needs_content = False
+    content_files = ('/usr/share/libalternatives/*conf',)
 
     def __init__(self, config, output):
         super().__init__(config, output)
@@ -138,9 +140,8 @@ class AlternativesCheck(AbstractCheck):
         Check if there is update-alternatives scriptlet present and if we should do validation
         """
         # first check just if we have anything in /etc/alternatives
-        for path in pkg.files:
-            if path.startswith('/etc/alternatives'):
-                return True
+        if pkg.file_index().with_prefix('/etc/alternatives'):
+            return True
         # then check the scriptlets if they run update-alternatives
         if self._check_scriptlet_for_alternatives(self.post):
             return True
@@ -153,9 +154,8 @@ class AlternativesCheck(AbstractCheck):
         Check if there is libalternatives scriptlet present
         """
         # first check just if we have anything in /usr/share/libalternatives/
-        for path in pkg.files:
-            if path.startswith('/usr/share/libalternatives/'):
-                return True
+        if pkg.file_index().with_prefix('/usr/share/libalternatives/'):
+            return True
         # then check if package with the name "alts" is required
         return any(req[0] == self.alts_requirement for req in pkg.requires + pkg.prereq)
 
@@ -214,8 +214,11 @@ class AlternativesCheck(AbstractCheck):
                     self.output.add_info('E', pkg, 'libalternatives-directory-not-exists', dir_name)
                 else:
                     r = re.compile('^' + dir_name + '/.*.conf$')
-                    if not list(filter(r.match, pkg.files)):
+                    if not list(filter(r.match, pkg.file_index().with_prefix(dir_name + '/'))):
                         self.output.add_info('E', pkg, 'empty-libalternatives-directory', dir_name)
+        # the configuration files are not extracted in --header-only mode
+        if pkg.header_only:
+            return
         """
         Checking content of all /usr/share/libalternatives/*/*.conf files
         """
@@ -230,7 +233,7 @@ class AlternativesCheck(AbstractCheck):
                     continue
                 bin_found = False
                 man_found = False
-                with open(filename) as read_obj:
+                with pkg.open_file(f, 'r') as read_obj:
                     # Read all lines in the file one by one. E.g:
                     #
                     # binary=/usr/bin/jupyter-3.8
@@ -3,6 +3,7 @@ from xml.etree import ElementTree
 
 from rpmlint.checks.AbstractCheck import AbstractFilesCheck
 from rpmlint.helpers import ENGLISH_ENVIRONMENT
+from rpmlint.toolrunner import run_tool
 
 
 class AppDataCheck(AbstractFilesCheck):
@@ -10,6 +11,7 @@ class AppDataCheck(AbstractFilesCheck):
     check appdata files for format violations
     https://www.freedesktop.org/software/appstream/docs/
     """
+    content_files = ('/usr/share/appdata/*',)
     # default command, split here so we can mock it later
     cmd = 'appstream-util validate-relax --nonet '
 
@@ -17,14 +19,13 @@ class AppDataCheck(AbstractFilesCheck):
         super().__init__(config, output, r'/usr/share/appdata/.*\.(appdata|metainfo).xml$')
 
     def check_file(self, pkg, filename):
-        root = pkg.dir_name()
-        f = root + filename
+        f = pkg.files[filename].path
         cmd = self.cmd + f
 
         validation_failed = False
         try:
-            r = subprocess.run(cmd.split(), env=ENGLISH_ENVIRONMENT,
-                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            r = run_tool(cmd.split(), env=ENGLISH_ENVIRONMENT,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             if r.returncode != 0:
                 validation_failed = True
         except FileNotFoundError:
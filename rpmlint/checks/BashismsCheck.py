@@ -3,29 +3,42 @@ import subprocess
 
 from rpmlint.checks.AbstractCheck import AbstractFilesCheck
 from rpmlint.helpers import ENGLISH_ENVIRONMENT
+from rpmlint.toolrunner import run_tool, submit_tool
 
 
 class BashismsCheck(AbstractFilesCheck):
+    content_files = ()
+    content_magic = ('POSIX shell script',)
+
     def __init__(self, config, output):
         super().__init__(config, output, r'.*')
-        self.use_threads = True
         self._detect_early_fail_option()
         self.file_cache = {}
+        self.scripts = {}
 
     def reset(self):
         super().reset()
         self.file_cache = {}
 
     def _detect_early_fail_option(self):
-        output = subprocess.check_output('checkbashisms --help',
-                                         shell=True, encoding='utf8')
+        output = run_tool('checkbashisms --help', shell=True, encoding='utf8', stdout=subprocess.PIPE,
+                          check=True).stdout
         # FIXME: remove in the future
         self.use_early_fail = '[-e]' in output
 
+    def check_binary(self, pkg):
+        # dash and checkbashisms are started for all the scripts at once by
+        # check_file, the warnings are then reported in the order of files
+        self.scripts = {}
+        super().check_binary(pkg)
+        for filename, md5 in self.scripts.items():
+            if not isinstance(self.file_cache[md5], list):
+                self.file_cache[md5] = list(self.check_bashisms(filename, *self.file_cache[md5]))
+            for warning in self.file_cache[md5]:
+                self.output.add_info('W', pkg, warning, filename)
+
     def check_file(self, pkg, filename):
-        root = pkg.dir_name()
         pkgfile = pkg.files[filename]
-        filepath = root + filename
 
         # We only care about the real files that state they are shell scripts
         if not (stat.S_ISREG(pkgfile.mode) and
@@ -36,41 +49,40 @@ class BashismsCheck(AbstractFilesCheck):
         # shell scripts present in multiple packages
         # (kernel-source, kernel-source-vanilla).
         if pkgfile.md5 not in self.file_cache:
-            self.file_cache[pkgfile.md5] = list(self.check_bashisms(pkg, filepath, filename))
-
-        for warning in self.file_cache[pkgfile.md5]:
-            self.output.add_info('W', pkg, warning, filename)
+            self.file_cache[pkgfile.md5] = self.start_bashisms(pkgfile.path)
+        self.scripts[filename] = pkgfile.md5
 
-    def check_bashisms(self, pkg, filepath, filename):
+    def start_bashisms(self, filepath):
         """
-        Run dash and then checkbashism on file
+        Start dash and checkbashisms on file, return their Futures.
 
         We need to see if it is valid syntax of bash and if there are no
         potential bash issues.
-        Return a warning message or None if there is no problem.
         """
-        try:
-            r = subprocess.run(['dash', '-n', filepath],
-                               stderr=subprocess.DEVNULL,
-                               env=ENGLISH_ENVIRONMENT)
-            if r.returncode == 2:
-                yield 'bin-sh-syntax-error'
-            elif r.returncode == 127:
-                raise FileNotFoundError(filename)
-        except UnicodeDecodeError:
-            pass
+        dash = submit_tool(['dash', '-n', filepath],
+                           stderr=subprocess.DEVNULL,
+                           env=ENGLISH_ENVIRONMENT)
+        cmd = ['checkbashisms', filepath]
+        # --early-fail option can rapidly speed up the check
+        if self.use_early_fail:
+            cmd.append('-e')
+        checkbashisms = submit_tool(cmd,
+                                    stderr=subprocess.DEVNULL,
+                                    env=ENGLISH_ENVIRONMENT)
+        return dash, checkbashisms
+
+    def check_bashisms(self, filename, dash, checkbashisms):
+        """
+        Yield the warnings of the results of start_bashisms.
+        """
+        r = dash.result()
+        if r.returncode == 2:
+            yield 'bin-sh-syntax-error'
+        elif r.returncode == 127:
+            raise FileNotFoundError(filename)
 
-        try:
-            cmd = ['checkbashisms', filepath]
-            # --early-fail option can rapidly speed up the check
-            if self.use_early_fail:
-                cmd.append('-e')
-            r = subprocess.run(cmd,
-                               stderr=subprocess.DEVNULL,
-                               env=ENGLISH_ENVIRONMENT)
-            if r.returncode == 1:
-                yield 'potential-bashisms'
-            elif r.returncode == 2:
-                raise FileNotFoundError(filename)
-        except UnicodeDecodeError:
-            pass
+        r = checkbashisms.result()
+        if r.returncode == 1:
+            yield 'potential-bashisms'
+        elif r.returncode == 2:
+            raise FileNotFoundError(filename)
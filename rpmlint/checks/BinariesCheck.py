@@ -1,19 +1,38 @@
+from collections import namedtuple
 import concurrent.futures
 import contextlib
+import json
+import multiprocessing
+import os
 from pathlib import Path
 import re
 import stat
+import warnings
 
 from rpmlint.arparser import ArParser
+from rpmlint.cache import ElfCache, file_digest
 from rpmlint.checks.AbstractCheck import AbstractCheck
 from rpmlint.lddparser import LddParser
 from rpmlint.objdumpparser import ObjdumpParser
-from rpmlint.pkg import FakePkg, InstalledPkg
+from rpmlint.pkg import FakePkg, InstalledPkg, paused_prefetching
 from rpmlint.readelfparser import ReadelfParser
 from rpmlint.stringsparser import StringsParser
+from rpmlint.toolrunner import get_runner
 
 KERNEL_MODULES_PATHS = ('/lib/modules/', '/usr/lib/modules/')
 GLIBC_EMPTY_ARCHIVES = ('libanl', 'libdl', 'libpthread', 'librt', 'libutil')
+# files with ELF checks per worker process, packages with fewer of them
+# are checked in one process
+MIN_FILES_PER_JOB = 2
+
+# What the checks of one file tell about the package, with raw diagnostics,
+# descriptions registered meanwhile and stats of the tools run when the file
+# was checked in a worker process
+FileResult = namedtuple('FileResult', ('checked', 'binary', 'usrlib_file', 'binary_in_usrlib', 'file_in_lib64',
+                                       'lib', 'exec_file', 'diagnostics', 'error_details', 'tool_stats'))
+
+# (check, package) checked by the process pool, inherited by its forked workers
+_worker_state = None
 
 
 class BinariesCheck(AbstractCheck):
@@ -28,6 +47,8 @@ class BinariesCheck(AbstractCheck):
     numeric_dir_regex = re.compile(r'/usr(?:/share)/man/man./(.*)\.[0-9](?:\.gz|\.bz2)')
     versioned_dir_regex = re.compile(r'[^.][0-9]')
     so_regex = re.compile(r'/lib(64)?/[^/]+\.so(\.[0-9]+)*$')
+    # options deciding which tools analyse a file, part of the ELF cache key
+    elf_cache_options = ('ElfReader', 'DebugInfoReader', 'MandatoryOptflags', 'ForbiddenOptflags', 'WarnOnFunction')
     bin_regex = re.compile(r'^(/usr(/X11R6)?)?/s?bin/')
     la_file_regex = re.compile(r'\.la$')
     invalid_dir_ref_regex = re.compile(r'/(home|tmp)(\W|$)')
@@ -47,6 +68,14 @@ class BinariesCheck(AbstractCheck):
     rpath_origin = '$ORIGIN'
     hpc_locations = ('/usr/lib/mpi/', '/usr/lib64/mpi/', '/usr/lib/hpc/')
 
+    # noarch packages are checked only for binaries, libtool leftovers and
+    # content of the library directories
+    applicable_files = ('*.la', '/usr/lib/*', '/usr/lib64*', '/lib64*')
+    applicable_magic = ('ELF ', 'current ar archive', 'Objective caml native',
+                        'Lua bytecode', 'shell script')
+    content_files = ('*.la',)
+    content_magic = ('ELF ', 'current ar archive', 'shell script')
+
     def __init__(self, config, output):
         super().__init__(config, output)
         self.checked_files = 0
@@ -55,6 +84,25 @@ class BinariesCheck(AbstractCheck):
         for regex in config.configuration['PieExecutables']:
             self.pie_exec_regex_list.append(re.compile(regex))
         self.usr_lib_exception_regex = re.compile(config.configuration['UsrLibBinaryException'])
+        self.elf_reader = config.configuration['ElfReader']
+        self.dependency_resolver = config.configuration['DependencyResolver']
+        self.debug_info_reader = config.configuration['DebugInfoReader']
+        self.jobs = config.configuration['ElfCheckJobs']
+        if not self.jobs:
+            # the packages are checked in parallel already in --jobs workers
+            self.jobs = 1 if multiprocessing.parent_process() else os.cpu_count() or 1
+        self.elf_cache = None
+        if config.configuration.get('CacheDir'):
+            config_state = {option: config.configuration[option] for option in self.elf_cache_options}
+            # leave out the regexps added to WarnOnFunction by the check
+            config_state['WarnOnFunction'] = {name: {k: v for k, v in func.items() if not k.endswith('_regex')}
+                                              for name, func in config_state['WarnOnFunction'].items()}
+            config_state = json.dumps(config_state, sort_keys=True)
+            self.elf_cache = ElfCache(config.configuration['CacheDir'],
+                                      config.configuration['ElfCacheSize'] * 1024 * 1024, config_state)
+        # serialized parsers of the checked file, None if some of them failed
+        self.elf_analysis = None
+        self.cached_elf_analysis = None
 
         self.setgid_call_regex = self.create_regexp_call(r'set(?:res|e)?gid')
         self.setuid_call_regex = self.create_regexp_call(r'set(?:res|e)?uid')
@@ -83,6 +131,12 @@ class BinariesCheck(AbstractCheck):
     def reset(self):
         self.checked_files = 0
 
+    def is_applicable(self, pkg, index):
+        # arch dependent packages without any binary get no-binary error
+        if not pkg.is_source and pkg.arch != 'noarch':
+            return True
+        return super().is_applicable(pkg, index)
+
     @staticmethod
     def create_nonlibc_regexp_call(call):
         r = r'(%s)\s?.*$' % call
@@ -100,7 +154,7 @@ class BinariesCheck(AbstractCheck):
         """
         if 'shell script' in pkgfile.magic:
             file_start = None
-            with contextlib.suppress(IOError), open(pkgfile.path, 'rb') as inputf:
+            with contextlib.suppress(IOError), pkg.open_file(fname) as inputf:
                 file_start = inputf.read(2048)
             if (file_start and b'This wrapper script should never '
                                b'be moved out of the build directory'
@@ -198,6 +252,7 @@ class BinariesCheck(AbstractCheck):
         Print an error for every such file.
         """
         if has_lib:
+            exec_files = set(exec_files)
             for f in pkg.files:
                 res = self.numeric_dir_regex.search(f)
                 fn = res and res.group(1) or f
@@ -497,25 +552,18 @@ class BinariesCheck(AbstractCheck):
         if not forbidden_calls:
             return
 
-        strings_parser = StringsParser(pkgfile.path)
+        # one scan of the file for the waivers of all the called functions
+        waivers = {fn: forbidden_functions[fn]['waiver_regex'] for fn in forbidden_calls
+                   if 'waiver_regex' in forbidden_functions[fn]}
+        strings_parser = self._elf_parser('string_waivers', lambda: StringsParser(pkgfile.path, waivers),
+                                          lambda data: StringsParser.from_dict(pkgfile.path, data))
         failed_reason = strings_parser.parsing_failed_reason
         if failed_reason:
+            self.elf_analysis = None
             self.output.add_info('E', pkg, 'strings-failed', pkgfile.name, failed_reason)
             return
 
-        forbidden_functions_filtered = []
-
-        for fn in forbidden_calls:
-            f = forbidden_functions[fn]
-            if 'waiver_regex' not in f:
-                forbidden_functions_filtered.append(fn)
-                continue
-
-            # See: https://github.com/PyCQA/flake8-bugbear/issues/269
-            waiver = any(f['waiver_regex'].search(string) for string in strings_parser.strings)
-            if not waiver:
-                forbidden_functions_filtered.append(fn)
-
+        forbidden_functions_filtered = [fn for fn in forbidden_calls if fn not in strings_parser.waived]
         for fn in forbidden_functions_filtered:
             self.output.add_info('W', pkg, fn, pkgfile.name, forbidden_functions[fn]['f_name'])
 
@@ -533,6 +581,8 @@ class BinariesCheck(AbstractCheck):
             return
 
         for dwarf_unit in self.objdump_parser.compile_units:
+            if 'producer' not in dwarf_unit:
+                continue
             tokens = dwarf_unit['producer'].split(' ')
             missing = [mo for mo in mandatory_optflags if mo not in tokens]
             forbidden = [f for f in forbidden_optflags if f in tokens]
@@ -565,9 +615,12 @@ class BinariesCheck(AbstractCheck):
 
         # return false for e.g. Rust or Go packages that are archives
         # but files in the archive are not an ELF container
-        ar_parser = ArParser(pkgfile.path)
+        ar_backend = 'native' if self.elf_reader == 'native' else 'ar'
+        ar_parser = self._elf_parser('ar', lambda: ArParser(pkgfile.path, ar_backend),
+                                     lambda data: ArParser.from_dict(pkgfile.path, data))
         failed_reason = ar_parser.parsing_failed_reason
         if failed_reason:
+            self.elf_analysis = None
             self.output.add_info('E', pkg, 'ar-failed', pkgfile.name, failed_reason)
             return False
 
@@ -582,12 +635,43 @@ class BinariesCheck(AbstractCheck):
         self.is_pie_exec = 'pie executable' in magic
         self.is_nonstandard_archive = False
 
+    def _elf_parser(self, name, create, restore):
+        """
+        Return the parser restored from the cached analysis of the checked
+        file or a new one, record it for the cache.
+        """
+        if self.cached_elf_analysis and name in self.cached_elf_analysis:
+            data = self.cached_elf_analysis[name]
+            parser = restore(data)
+        else:
+            parser = create()
+            data = parser.to_dict()
+        if self.elf_analysis is not None:
+            self.elf_analysis[name] = data
+        return parser
+
+    def _load_elf_analysis(self, pkgfile):
+        self.elf_analysis = {}
+        self.cached_elf_analysis = None
+        if self.elf_cache:
+            self.elf_digest = pkgfile.md5 or file_digest(pkgfile.path)
+            self.cached_elf_analysis = self.elf_cache.get_analysis(self.elf_digest)
+
+    def _store_elf_analysis(self):
+        # failed analysis is not stored, the errors mention paths of the extracted files
+        if self.elf_cache and self.elf_analysis and self.elf_analysis != self.cached_elf_analysis:
+            self.elf_cache.put_analysis(self.elf_digest, self.elf_analysis)
+
     def run_elf_checks(self, pkg, pkgfile):
+        self._load_elf_analysis(pkgfile)
         if self.is_archive and not self._is_standard_archive(pkg, pkgfile):
             self.is_nonstandard_archive = True
+            self._store_elf_analysis()
             return
 
-        self.readelf_parser = ReadelfParser(pkgfile.path, pkgfile.name)
+        self.readelf_parser = self._elf_parser(
+            'readelf', lambda: ReadelfParser(pkgfile.path, pkgfile.name, self.elf_reader),
+            lambda data: ReadelfParser.from_dict(pkgfile.path, pkgfile.name, data))
         failed_reason = self.readelf_parser.parsing_failed_reason()
         if failed_reason:
             self.output.add_info('E', pkg, 'readelf-failed', pkgfile.name, failed_reason)
@@ -596,7 +680,8 @@ class BinariesCheck(AbstractCheck):
         if not self.is_archive:
             if self.is_dynamically_linked:
                 is_installed_pkg = isinstance(pkg, (InstalledPkg, FakePkg))
-                self.ldd_parser = LddParser(pkgfile.path, pkgfile.name, is_installed_pkg)
+                self.ldd_parser = LddParser(pkgfile.path, pkgfile.name, is_installed_pkg,
+                                            self.dependency_resolver, self.system_lib_paths)
                 failed_reason = self.ldd_parser.parsing_failed_reason
                 if failed_reason:
                     self.output.add_info('E', pkg, 'ldd-failed', pkgfile.name, failed_reason)
@@ -604,138 +689,224 @@ class BinariesCheck(AbstractCheck):
 
             if (self.config.configuration['MandatoryOptflags'] or
                     self.config.configuration['ForbiddenOptflags']):
-                self.objdump_parser = ObjdumpParser(pkgfile.path, pkgfile.name)
+                self.objdump_parser = self._elf_parser(
+                    'objdump', lambda: ObjdumpParser(pkgfile.path, pkgfile.name, self.debug_info_reader),
+                    lambda data: ObjdumpParser.from_dict(pkgfile.path, data))
                 failed_reason = self.objdump_parser.parsing_failed_reason
                 if failed_reason:
                     self.output.add_info('E', pkg, 'objdump-failed', pkgfile.name, failed_reason)
                     return
 
-        # NOTE: the speed benefit of the ThreadPoolExecutor is limited due to
-        # Global Interpreter Lock (GIL).
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = []
-            for fn in self.check_functions:
-                futures.append(executor.submit(fn, pkg, pkgfile))
-            concurrent.futures.wait(futures)
-            for future in futures:
-                err = future.exception()
-                if err:
-                    raise err
+        for fn in self.check_functions:
+            fn(pkg, pkgfile)
+        self._store_elf_analysis()
 
     def check_binary(self, pkg):
-        exec_files = []
-        pkg_has_lib = False
-        pkg_has_binary = False
-        pkg_has_binary_in_usrlib = False
-        pkg_has_usrlib_file = False
-        pkg_has_file_in_lib64 = False
+        # magic of all the files is needed, detect it at once
+        pkg.detect_magic()
 
         #  go through the all files, run files checks and collect data that are
         #  needed later
-        for fname, pkgfile in pkg.files.items():
-            # Common tests first
-            self._check_libtool_wrapper(pkg, fname, pkgfile)
-            self._check_invalid_la_file(pkg, fname)
-
-            # consider non-binary in /usr/lib/ that is allowed by
-            # UsrLibBinaryException config option as a "fake" binary and
-            # do not throw 'only-non-binary-in-usr-lib' warning then
-            if not stat.S_ISDIR(pkgfile.mode) and self.usr_lib_regex.search(fname):
-                pkg_has_usrlib_file = True
-                if not pkg_has_binary_in_usrlib and \
-                        self.usr_lib_exception_regex.search(fname):
-                    # Fake that we have binaries there to avoid
-                    # only-non-binary-in-usr-lib false positives
-                    pkg_has_binary_in_usrlib = True
-
-            # find out if we have a file in /usr/lib64/ directory (needed later
-            # for the package checks)
-            if fname.startswith(('/usr/lib64', '/lib64')):
-                pkg_has_file_in_lib64 = True
-
-            # skip the rest of the tests for non-binaries
-            # binary files only from here on
-            is_ocaml_native = 'Objective caml native' in pkgfile.magic
-            is_lua_bytecode = 'Lua bytecode' in pkgfile.magic
-            #  eBPF binaries are arch independent
-            # https://github.com/rpm-software-management/rpmlint/issues/1193
-            is_ebpf = 'eBPF' in pkgfile.magic
-            # Look for ELF in the file magic to check if it's really a binary
-            # file
-            is_elf = self.elf_regex.match(pkgfile.magic) and not is_ebpf
-
-            if not (is_elf or
-                    'current ar archive' in pkgfile.magic or
-                    is_ocaml_native or is_lua_bytecode):
-                continue
+        results = self._check_files(pkg)
+        self.checked_files += sum(result.checked for result in results)
+        pkg_has_lib = any(result.lib for result in results)
+        pkg_has_binary = any(result.binary for result in results)
+        pkg_has_binary_in_usrlib = any(result.binary_in_usrlib for result in results)
+        pkg_has_usrlib_file = any(result.usrlib_file for result in results)
+        pkg_has_file_in_lib64 = any(result.file_in_lib64 for result in results)
+        exec_files = [result.exec_file for result in results if result.exec_file]
 
-            self.checked_files += 1
+        # run checks for the whole package
+        # it uses data collected in the previous for-cycle
+        self._check_exec_in_library(pkg, pkg_has_lib, exec_files)
+        self._check_non_versioned(pkg, pkg_has_lib, exec_files)
+        self._check_no_binary(pkg, pkg_has_binary, pkg_has_file_in_lib64)
+        self._check_noarch_with_lib64(pkg, pkg_has_file_in_lib64)
+        self._check_only_non_binary_in_usrlib(pkg, pkg_has_usrlib_file,
+                                              pkg_has_binary_in_usrlib)
 
-            # mark this package as a one that has binary file
-            pkg_has_binary = True
+    def _check_files(self, pkg):
+        """
+        Run the checks of all the files, return their FileResults in the
+        order of pkg.files.
 
-            # if there is a binary in /usr/lib then mark this package
-            # accordingly
-            if pkg_has_usrlib_file and not pkg_has_binary_in_usrlib and \
-                    self.usr_lib_regex.search(fname):
-                pkg_has_binary_in_usrlib = True
+        When the package has enough files with ELF checks, they are checked
+        in worker processes while the rest is checked here. All diagnostics
+        are recorded and replayed in the order of the files, so the output
+        is the same as when the files are checked one by one.
+        """
+        files = list(pkg.files.items())
+        elf_files = [(fname, pkgfile) for fname, pkgfile in files if self._has_elf_checks(pkg, fname, pkgfile)]
+        jobs = min(self.jobs, len(elf_files) // MIN_FILES_PER_JOB)
+        if jobs < 2:
+            return [self._check_file(pkg, fname, pkgfile) for fname, pkgfile in files]
 
-            self._check_binary_in_noarch(pkg, fname)
+        global _worker_state
+        _worker_state = (self, pkg)
+        try:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context('fork'),
+                                                        initializer=_init_worker, initargs=(jobs,)) as executor:
+                # the biggest files first so that the workers finish at about the same time
+                elf_files.sort(key=lambda item: item[1].size or 0, reverse=True)
+                # The first submit forks all the workers. This ordering is
+                # required: it has to happen while the prefetching thread is
+                # paused so that the workers do not inherit locks it holds,
+                # the other threads of ours are idle at this point.
+                with paused_prefetching(), warnings.catch_warnings():
+                    warnings.filterwarnings('ignore', r'This process .* is multi-threaded', DeprecationWarning)
+                    futures = {fname: executor.submit(_check_file_in_worker, fname) for fname, _ in elf_files}
+                results = {}
+                try:
+                    for fname, pkgfile in files:
+                        if fname not in futures:
+                            results[fname] = self._check_file_recorded(pkg, fname, pkgfile)
+                    for fname, future in futures.items():
+                        results[fname] = future.result()
+                except BaseException:
+                    for future in futures.values():
+                        future.cancel()
+                    raise
+        finally:
+            _worker_state = None
+
+        results = [results[fname] for fname, _ in files]
+        for result in results:
+            self.output.error_details.update(result.error_details)
+            self.output.replay(result.diagnostics)
+            if result.tool_stats:
+                get_runner().merge_stats(result.tool_stats)
+        return results
+
+    def _check_file_recorded(self, pkg, fname, pkgfile):
+        """
+        Run the checks of one file, return FileResult with the raw
+        diagnostics instead of passing them to our Filter.
+        """
+        known_details = set(self.output.error_details)
+        with self.output.recording() as recorder:
+            result = self._check_file(pkg, fname, pkgfile)
+        error_details = {k: v for k, v in self.output.error_details.items() if k not in known_details}
+        return result._replace(diagnostics=recorder.take(), error_details=error_details)
+
+    def _is_binary(self, pkgfile):
+        # Look for ELF in the file magic to check if it's really a binary
+        # file, eBPF binaries are arch independent
+        # https://github.com/rpm-software-management/rpmlint/issues/1193
+        is_elf = self.elf_regex.match(pkgfile.magic) and 'eBPF' not in pkgfile.magic
+        return bool(is_elf or 'current ar archive' in pkgfile.magic or
+                    'Objective caml native' in pkgfile.magic or 'Lua bytecode' in pkgfile.magic)
+
+    def _has_elf_checks(self, pkg, fname, pkgfile):
+        """Return True if the ELF checks (run_elf_checks) are run for the file."""
+        # skip ocaml native, Lua bytecode, Go .go and .gox, .o and .static
+        # and binaries of noarch packages
+        return (self._is_binary(pkgfile) and pkg.arch != 'noarch' and
+                'Objective caml native' not in pkgfile.magic and 'Lua bytecode' not in pkgfile.magic and
+                not fname.endswith(('.o', '.static', '.gox', '.go')))
+
+    def _check_file(self, pkg, fname, pkgfile):
+        """
+        Run the checks of one file of the package, return FileResult with
+        the data needed by the checks of the whole package.
+        """
+        result = {'checked': False, 'binary': False, 'usrlib_file': False, 'binary_in_usrlib': False,
+                  'file_in_lib64': False, 'lib': False, 'exec_file': None, 'diagnostics': None,
+                  'error_details': None, 'tool_stats': None}
+        self._run_file_checks(pkg, fname, pkgfile, result)
+        return FileResult(**result)
+
+    def _run_file_checks(self, pkg, fname, pkgfile, result):
+        # Common tests first
+        self._check_libtool_wrapper(pkg, fname, pkgfile)
+        self._check_invalid_la_file(pkg, fname)
+
+        # consider non-binary in /usr/lib/ that is allowed by
+        # UsrLibBinaryException config option as a "fake" binary and
+        # do not throw 'only-non-binary-in-usr-lib' warning then
+        if not stat.S_ISDIR(pkgfile.mode) and self.usr_lib_regex.search(fname):
+            result['usrlib_file'] = True
+            if self.usr_lib_exception_regex.search(fname):
+                # Fake that we have binaries there to avoid
+                # only-non-binary-in-usr-lib false positives
+                result['binary_in_usrlib'] = True
+
+        # find out if we have a file in /usr/lib64/ directory (needed later
+        # for the package checks)
+        if fname.startswith(('/usr/lib64', '/lib64')):
+            result['file_in_lib64'] = True
+
+        # skip the rest of the tests for non-binaries
+        # binary files only from here on
+        if not self._is_binary(pkgfile):
+            return
 
-            # skip the rest of the tests for noarch packages
-            # arch dependent packages only from here on
-            if pkg.arch == 'noarch':
-                continue
+        result['checked'] = True
 
-            self._check_binary_in_usr_share(pkg, fname)
-            self._check_binary_in_etc(pkg, fname)
+        # mark this package as a one that has binary file
+        result['binary'] = True
 
-            # skip the rest of the tests for ocaml native, Lua bytecode,
-            # Go .go and .gox, .o and .static
-            if is_ocaml_native or is_lua_bytecode or fname.endswith('.o') or \
-                    fname.endswith('.static') or fname.endswith('.gox') or \
-                    fname.endswith('.go'):
-                continue
+        # if there is a binary in /usr/lib then mark this package
+        # accordingly
+        if result['usrlib_file']:
+            result['binary_in_usrlib'] = True
 
-            self._check_unstripped_binary(fname, pkg, pkgfile)
+        self._check_binary_in_noarch(pkg, fname)
 
-            # Detect attributes of an ELF file
-            self._detect_attributes(pkgfile.magic)
+        # skip the rest of the tests for noarch packages
+        # arch dependent packages only from here on
+        if pkg.arch == 'noarch':
+            return
 
-            # run ELF checks
-            self.run_elf_checks(pkg, pkgfile)
+        self._check_binary_in_usr_share(pkg, fname)
+        self._check_binary_in_etc(pkg, fname)
 
-            if self.is_nonstandard_archive:
-                continue
+        # skip the rest of the tests for ocaml native, Lua bytecode,
+        # Go .go and .gox, .o and .static
+        if not self._has_elf_checks(pkg, fname, pkgfile):
+            return
 
-            # inspect binary file
-            is_shlib = self.readelf_parser.is_shlib
+        self._check_unstripped_binary(fname, pkg, pkgfile)
 
-            if is_shlib:
-                pkg_has_lib = True
+        # Detect attributes of an ELF file
+        self._detect_attributes(pkgfile.magic)
 
-            # skip non-exec and non-SO
-            # executables and shared objects only from here on
-            if not self.is_exec and not self.is_shobj:
-                continue
+        # run ELF checks
+        self.run_elf_checks(pkg, pkgfile)
 
-            if self.is_shobj and not self.is_exec and '.so' not in fname and \
-                    self.bin_regex.search(fname):
-                # pkgfile.magic does not contain 'executable' for PIEs
-                self.is_exec = True
+        if self.is_nonstandard_archive:
+            return
 
-            if self.is_exec:
-                # add to the list of the all exec files
-                if self.bin_regex.search(fname):
-                    exec_files.append(fname)
+        # inspect binary file
+        if self.readelf_parser.is_shlib:
+            result['lib'] = True
 
-                self._check_non_pie(pkg, fname)
+        # skip non-exec and non-SO
+        # executables and shared objects only from here on
+        if not self.is_exec and not self.is_shobj:
+            return
 
-        # run checks for the whole package
-        # it uses data collected in the previous for-cycle
-        self._check_exec_in_library(pkg, pkg_has_lib, exec_files)
-        self._check_non_versioned(pkg, pkg_has_lib, exec_files)
-        self._check_no_binary(pkg, pkg_has_binary, pkg_has_file_in_lib64)
-        self._check_noarch_with_lib64(pkg, pkg_has_file_in_lib64)
-        self._check_only_non_binary_in_usrlib(pkg, pkg_has_usrlib_file,
-                                              pkg_has_binary_in_usrlib)
+        if self.is_shobj and not self.is_exec and '.so' not in fname and \
+                self.bin_regex.search(fname):
+            # pkgfile.magic does not contain 'executable' for PIEs
+            self.is_exec = True
+
+        if self.is_exec:
+            # add to the list of the all exec files
+            if self.bin_regex.search(fname):
+                result['exec_file'] = fname
+
+            self._check_non_pie(pkg, fname)
+
+
+def _init_worker(jobs):
+    # the workers share the limit of the external tools run by this process,
+    # the tools run before fork are accounted here
+    runner = get_runner()
+    runner.configure(max(1, runner.jobs // jobs), runner.timeouts)
+    runner.take_stats()
+
+
+def _check_file_in_worker(fname):
+    check, pkg = _worker_state
+    result = check._check_file_recorded(pkg, fname, pkg.files[fname])
+    return result._replace(tool_stats=get_runner().take_stats())
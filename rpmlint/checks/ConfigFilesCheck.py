@@ -6,6 +6,9 @@ class ConfigFilesCheck(AbstractCheck):
     Check that configuration files are in a proper location and marked as
     'noreplace'.
     """
+    needs_content = False
+    content_files = ()
+
     def check_binary(self, pkg):
         for filename in pkg.config_files:
             self._check_non_confdir_files(pkg, filename)
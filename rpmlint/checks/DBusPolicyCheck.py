@@ -6,6 +6,9 @@ DBUS_DIRECTORIES = ('/etc/dbus-1/system.d/', '/usr/share/dbus-1/system.d/')
 
 
 class DBusPolicyCheck(AbstractCheck):
+    applicable_files = tuple(d + '*' for d in DBUS_DIRECTORIES)
+    content_files = applicable_files
+
     def check(self, pkg):
         if pkg.is_source:
             return
@@ -18,8 +21,8 @@ class DBusPolicyCheck(AbstractCheck):
             try:
                 if any(f.startswith(d) for d in DBUS_DIRECTORIES):
                     send_policy_seen = False
-                    lf = pkg.dir_name() + f
-                    xml = parse(lf)
+                    with pkg.open_file(f) as policy_file:
+                        xml = parse(policy_file)
                     for policy in xml.getElementsByTagName('policy'):
                         send_policy_seen |= self._check_allow_policy_element(pkg, f, policy)
                         self._check_deny_policy_element(pkg, f, policy)
@@ -10,6 +10,8 @@ class DocCheck(AbstractCheck):
     """
     Package documentation checks.
     """
+    needs_content = False
+    content_files = ()
 
     def check_binary(self, pkg):
         if not pkg.doc_files:
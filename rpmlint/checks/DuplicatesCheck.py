@@ -17,6 +17,8 @@ class DuplicatesCheck(AbstractCheck):
     - key: md5 hash of the file
     - values: size of the file
     """
+    needs_content = False
+    content_files = ()
 
     DUPLICATES_DISPLAY_LIMIT = 5
 
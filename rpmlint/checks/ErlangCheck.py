@@ -7,6 +7,8 @@ from rpmlint.helpers import byte_to_string
 
 
 class ErlangCheck(AbstractFilesCheck):
+    content_files = ('*.beam',)
+
     def __init__(self, config, output):
         super().__init__(config, output, r'.*?\.beam$')
         build_dir = expandMacro('%_builddir')
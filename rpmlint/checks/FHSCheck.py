@@ -21,6 +21,8 @@ class FHSCheck(AbstractCheck):
     FHS_var_subdirs = ('cache', 'lib', 'local', 'lock', 'log', 'opt', 'run',
                        'spool', 'tmp', 'account', 'crash', 'games', 'mail',
                        'yp')
+    needs_content = False
+    content_files = ()
 
     def __init__(self, config, output):
         super().__init__(config, output)
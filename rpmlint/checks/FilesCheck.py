@@ -366,6 +366,7 @@ def find_perm_in_tmpfiles(pkg, fname):
 class FilesCheck(AbstractCheck):
     man_regex = re.compile(r'/man(?:\d[px]?|n)/')
     info_regex = re.compile(r'(/usr/share|/usr)/info/')
+    needs_content = False
 
     def __init__(self, config, output):
         super().__init__(config, output)
@@ -420,12 +421,12 @@ class FilesCheck(AbstractCheck):
 
     def peek(self, filename, pkg, length=1024):
         """
-        Peek into a file, return a chunk from its beginning and a flag if it
-        seems to be a text file.
+        Peek into a file of the package, return a chunk from its beginning
+        and a flag if it seems to be a text file.
         """
         chunk = None
         try:
-            with open(filename, 'rb') as fobj:
+            with pkg.open_file(filename) as fobj:
                 chunk = fobj.read(length)
         except OSError as e:  # eg. https://bugzilla.redhat.com/209876
             self.output.add_info('W', pkg, 'read-error', e)
@@ -926,10 +927,10 @@ class FilesCheck(AbstractCheck):
         # Link to something in bindir is okay
         if bin_regex.search(realbin.name):
             return
-        if not stat.S_ISREG(realbin.mode):
+        if not stat.S_ISREG(realbin.mode) or pkg.header_only:
             return
 
-        file_chunk, file_istext = self.peek(realbin.path, pkg)
+        file_chunk, file_istext = self.peek(realbin.name, pkg)
         file_interpreter, _file_interpreter_args = script_interpreter(file_chunk)
         # Not a script with shebang, so ignore
         if not file_interpreter:
@@ -1059,12 +1060,12 @@ class FilesCheck(AbstractCheck):
     def _check_file_normal_file_getdata(self, pkg, fname, pkgfile):
         res = None
         try:
-            res = os.access(pkgfile.path, os.R_OK)
+            res = pkg.is_readable(fname)
         except UnicodeError as e:  # e.g. non-ASCII, C locale, python 3
             self.output.add_info('W', pkg, 'inaccessible-filename', fname, e)
         else:
             if res:
-                (self._file_chunk, self._file_istext) = self.peek(pkgfile.path, pkg)
+                (self._file_chunk, self._file_istext) = self.peek(fname, pkg)
 
         (self._file_interpreter, self._file_interpreter_args) = script_interpreter(self._file_chunk)
         self._file_is_buildconfig = self._file_istext and buildconfigfile_regex.search(fname)
@@ -1384,7 +1385,7 @@ class FilesCheck(AbstractCheck):
             # We check only doc text files for UTF-8-ness;
             # checking everything may be slow and can generate
             # lots of unwanted noise.
-            if not is_utf8(pkgfile.path):
+            if not is_utf8(fname, pkg.open_file(fname)):
                 self.output.add_info('W', pkg, 'file-not-utf8', fname)
         if fsf_license_regex.search(self._file_chunk) and \
                 fsf_wrong_address_regex.search(self._file_chunk):
@@ -1395,5 +1396,5 @@ class FilesCheck(AbstractCheck):
         if not self._file_istext and is_doc and self._file_chunk and compr_regex.search(fname):
             ff = compr_regex.sub('', fname)
             # compressed docs, eg. info and man files etc
-            if not self.skipdocs_regex.search(ff) and not is_utf8(pkgfile.path):
+            if not self.skipdocs_regex.search(ff) and not is_utf8(fname, pkg.open_file(fname)):
                 self.output.add_info('W', pkg, 'file-not-utf8', fname)
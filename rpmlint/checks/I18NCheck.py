@@ -69,6 +69,9 @@ def is_valid_lang(lang):
 
 
 class I18NCheck(AbstractCheck):
+    needs_content = False
+    content_files = ()
+
     def check_binary(self, pkg):
         files = list(pkg.files.keys())
         files.sort()
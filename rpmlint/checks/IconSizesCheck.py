@@ -6,6 +6,9 @@ from rpmlint.checks.AbstractCheck import AbstractCheck
 class IconSizesCheck(AbstractCheck):
     file_size_regex = re.compile(r'/icons/[^/]+/(?P<x>\d+)x(?P<y>\d+)/')
     info_size_regex = re.compile(r'(?P<x>\d+) x (?P<y>\d+)')
+    applicable_files = ('*/icons/*/*x*/*',)
+    needs_content = False
+    content_files = ()
 
     def check(self, pkg):
         if pkg.is_source:
@@ -59,6 +59,8 @@ def substitute_shell_vars(val, script):
 
 
 class InitScriptCheck(AbstractCheck):
+    content_files = ('/etc/init.d/*', '/etc/rc.d/init.d/*')
+
     def __init__(self, config, output):
         super().__init__(config, output)
         self.use_deflevels = self.config.configuration['UseDefaultRunlevels']
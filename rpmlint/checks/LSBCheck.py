@@ -17,6 +17,8 @@ class LSBCheck(AbstractCheck):
     """
     name_regex = re.compile('^[a-z0-9.+-]+$')
     version_regex = re.compile('^[a-zA-Z0-9.+]+$')
+    needs_content = False
+    content_files = ()
 
     def check(self, pkg):
         self._check_lsb_name(pkg)
@@ -8,6 +8,9 @@ from rpmlint.pkg import FakePkg
 
 
 class LibraryDependencyCheck(AbstractCheck):
+    needs_content = False
+    content_files = ()
+
     def __init__(self, config, output):
         super().__init__(config, output)
         self.package_requires = {}
@@ -4,6 +4,9 @@ from rpmlint.checks.AbstractCheck import AbstractCheck
 
 
 class LogrotateCheck(AbstractCheck):
+    applicable_files = ('/etc/logrotate.d/*',)
+    content_files = applicable_files
+
     def check(self, pkg):
         if pkg.is_source:
             return
@@ -17,7 +20,7 @@ class LogrotateCheck(AbstractCheck):
 
             if f.startswith('/etc/logrotate.d/'):
                 try:
-                    for n, o in self.parselogrotateconf(pkg.dir_name(), f).items():
+                    for n, o in self.parselogrotateconf(pkg, f).items():
                         if n in dirs and dirs[n] != o:
                             self.output.add_info('E', pkg, 'logrotate-duplicate', n)
                         else:
@@ -36,9 +39,9 @@ class LogrotateCheck(AbstractCheck):
                                      f'{d} {files[d].user}:{files[d].group} {mode:04o}')
 
     # extremely primitive logrotate parser
-    def parselogrotateconf(self, root, f):
+    def parselogrotateconf(self, pkg, f):
         dirs = {}
-        with open('/'.join((root, f))) as fd:
+        with pkg.open_file(f, 'r') as fd:
             currentdirs = []
             for line in fd.readlines():
                 line = line.strip()
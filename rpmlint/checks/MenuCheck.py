@@ -13,6 +13,7 @@ import subprocess
 import rpm
 from rpmlint.checks.AbstractCheck import AbstractCheck
 from rpmlint.helpers import ENGLISH_ENVIRONMENT
+from rpmlint.toolrunner import run_tool
 
 
 menu_file_regex = re.compile(r'^/usr/lib/menu/([^/]+)$')
@@ -31,6 +32,8 @@ xdg_migrated_regex = re.compile(r'xdg=\"?([^\" ]+)')
 
 
 class MenuCheck(AbstractCheck):
+    content_files = ('/usr/lib/menu/*', '/usr/share/icons/*.xpm')
+
     def __init__(self, config, output):
         super().__init__(config, output)
         self.valid_sections = self.config.configuration['ValidMenuSections']
@@ -91,10 +94,9 @@ class MenuCheck(AbstractCheck):
             elif not update_menus_regex.search(postun):
                 self.output.add_info('E', pkg, 'postun-without-update-menus')
 
-            directory = pkg.dir_name()
             for f in menus:
                 # remove comments and handle cpp continuation lines
-                text = subprocess.run(('/lib/cpp', directory + f), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=ENGLISH_ENVIRONMENT, text=True).stdout
+                text = run_tool(('/lib/cpp', pkg.files[f].path), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=ENGLISH_ENVIRONMENT, text=True).stdout
                 if text.endswith('\n'):
                     text = text[:-1]
 
@@ -11,6 +11,7 @@ import subprocess
 
 from rpmlint.checks.AbstractCheck import AbstractFilesCheck
 from rpmlint.helpers import ENGLISH_ENVIRONMENT
+from rpmlint.toolrunner import run_tool
 
 STANDARD_BIN_DIRS = ('/bin', '/sbin', '/usr/bin', '/usr/sbin')
 
@@ -19,6 +20,8 @@ class MenuXDGCheck(AbstractFilesCheck):
     """
     Check whether MenuXDG files installed by a package are valid.
     """
+    content_files = ('/usr/share/applications/*.desktop',)
+
     def __init__(self, config, output):
         # desktop file need to be in $XDG_DATA_DIRS
         # $ echo $XDG_DATA_DIRS/applications
@@ -42,10 +45,10 @@ class MenuXDGCheck(AbstractFilesCheck):
 
     def check_file(self, pkg, filename):
         root = pkg.dir_name()
-        f = root + filename
+        f = pkg.files[filename].path
         try:
-            command = subprocess.run(('desktop-file-validate', f), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                                     env=ENGLISH_ENVIRONMENT, text=True)
+            command = run_tool(('desktop-file-validate', f), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               env=ENGLISH_ENVIRONMENT, text=True)
             text = command.stdout
             if command.returncode:
                 error_printed = False
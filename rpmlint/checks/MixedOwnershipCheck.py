@@ -2,6 +2,9 @@ from rpmlint.checks.AbstractCheck import AbstractCheck
 
 
 class MixedOwnershipCheck(AbstractCheck):
+    needs_content = False
+    content_files = ()
+
     def check(self, pkg):
         """
         Check for mixed permissions in the directory path.
@@ -5,6 +5,10 @@ from rpmlint.checks.AbstractCheck import AbstractCheck
 
 class PAMModulesCheck(AbstractCheck):
     pam_module_re = re.compile(r'^(?:/usr)?/lib(?:64)?/security/([^/]+\.so)$')
+    applicable_files = ('/lib/security/*.so', '/lib64/security/*.so',
+                        '/usr/lib/security/*.so', '/usr/lib64/security/*.so')
+    needs_content = False
+    content_files = ()
 
     def __init__(self, config, output):
         super().__init__(config, output)
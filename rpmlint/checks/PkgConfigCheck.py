@@ -8,6 +8,7 @@ class PkgConfigCheck(AbstractFilesCheck):
     """
     Validate that .pc files are correct.
     """
+    content_files = ('*/pkgconfig/*.pc',)
     suspicious_dir = re.compile(r'[=:](?:/usr/src/\w+/BUILD|/var/tmp|/tmp|/home)')
 
     def __init__(self, config, output):
@@ -27,7 +28,7 @@ class PkgConfigCheck(AbstractFilesCheck):
             return
 
         try:
-            with open(pkg.dir_name() + '/' + filename, encoding='utf-8') as pc_file:
+            with pkg.open_file(filename, 'r', encoding='utf-8') as pc_file:
                 for line in pc_file:
                     self._check_invalid_pkgconfig_file(pkg, filename, line)
                     self._check_invalid_libs_dir(pkg, filename, line)
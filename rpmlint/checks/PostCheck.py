@@ -9,13 +9,13 @@
 
 import os
 import re
-import subprocess
 import tempfile
 
 import rpm
 from rpmlint import pkg as Pkg
 from rpmlint.checks.AbstractCheck import AbstractCheck
 from rpmlint.helpers import byte_to_string, ENGLISH_ENVIRONMENT
+from rpmlint.toolrunner import run_tool
 
 
 # shells that grok the -n switch for debugging
@@ -63,7 +63,7 @@ def check_syntax_script(prog, commandline, script):
     try:
         tmpfile.write(script)
         tmpfile.close()
-        ret = subprocess.run((prog, commandline, tmpname), env=ENGLISH_ENVIRONMENT)
+        ret = run_tool((prog, commandline, tmpname), env=ENGLISH_ENVIRONMENT)
     finally:
         tmpfile.close()
         os.remove(tmpname)
@@ -71,6 +71,9 @@ def check_syntax_script(prog, commandline, script):
 
 
 class PostCheck(AbstractCheck):
+    needs_content = False
+    content_files = ()
+
     def __init__(self, config, output):
         super().__init__(config, output)
         self.valid_shells = config.configuration['ValidShells']
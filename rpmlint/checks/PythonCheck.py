@@ -1,3 +1,4 @@
+import contextlib
 from importlib import metadata
 from pathlib import Path
 import platform
@@ -42,7 +43,26 @@ EGG_INFO_RE = re.compile('.*egg-info$')
 PYC_RE = re.compile(r'cpython-(\d+)')
 
 
+class PackagedDistribution(metadata.PathDistribution):
+    """
+    Distribution metadata of a directory in the package, read through the
+    package so that it does not have to be on the disk.
+    """
+
+    def __init__(self, pkg, dirname):
+        super().__init__(Path(pkg.dir_name() or '/', dirname.lstrip('/')))
+        self.pkg = pkg
+        self.dirname = dirname
+
+    def read_text(self, filename):
+        with contextlib.suppress(OSError), \
+                self.pkg.open_file(f'{self.dirname}/{filename}', 'r', encoding='utf-8') as f:
+            return f.read()
+
+
 class PythonCheck(AbstractFilesCheck):
+    content_files = ('*egg-info', '*egg-info/*', '*dist-info/*')
+
     def __init__(self, config, output):
         super().__init__(config, output, r'.*')
 
@@ -113,8 +133,7 @@ class PythonCheck(AbstractFilesCheck):
         compare with the requirements defined in the rpm package
         """
 
-        filepath = Path(pkg.dir_name() or '/', filename.lstrip('/'))
-        d = metadata.PathDistribution.at(filepath.parent)
+        d = PackagedDistribution(pkg, str(Path(filename).parent))
         if not d.requires:
             return
 
@@ -17,6 +17,8 @@ class SharedLibraryPolicyCheck(AbstractCheck):
      https://en.opensuse.org/openSUSE:Shared_library_packaging_policy
      https://www.debian.org/doc/debian-policy/ch-sharedlibs.html
     """
+    content_files = ()
+    content_magic = ('ELF ',)
 
     def __init__(self, config, output):
         super().__init__(config, output)
@@ -24,6 +26,7 @@ class SharedLibraryPolicyCheck(AbstractCheck):
         # the pkgname is based on soname if ending with number; special option is flavor build
         self.re_soname_pkg = re.compile(r'^lib\S+(\d+(-(32|64)bit)?)$')
         self.re_so_files = re.compile(r'\S+.so((\.(\d+))*)$')
+        self.elf_reader = config.configuration['ElfReader']
 
     def _check_missing_policy_lib(self, pkg):
         # check the pkg has any libname
@@ -65,7 +68,7 @@ class SharedLibraryPolicyCheck(AbstractCheck):
             path = Path(filename)
             if (('.so.' in filename or filename.endswith('.so')) and
                     stat.S_ISREG(pkg.files[filename].mode) and pkgfile.magic.startswith('ELF ')):
-                readelf_parser = ReadelfParser(pkgfile.path, filename)
+                readelf_parser = ReadelfParser(pkgfile.path, filename, self.elf_reader)
                 failed_reason = readelf_parser.parsing_failed_reason()
                 if failed_reason:
                     self.output.add_info('E', pkg, 'readelf-failed', filename, failed_reason)
@@ -15,6 +15,8 @@ class SignatureCheck(AbstractCheck):
     any_sig_regex = re.compile(r'[Ss]ignature, key ID')
     nokey_sig_regex = re.compile(r'[Ss]ignature, key ID ([\w\d]*): NOKEY')
     invalid_sig_regex = re.compile(r'invalid OpenPGP signature')
+    needs_content = False
+    content_files = ()
 
     def check(self, pkg):
         retcode, output = pkg.check_signature()
@@ -15,6 +15,8 @@ class SourceCheck(AbstractCheck):
         'bz2': 'bzip2 compressed',
         'zst': 'ZSTD compressed',
     }
+    needs_content = False
+    content_files = ()
 
     def __init__(self, config, output):
         super().__init__(config, output)
@@ -7,6 +7,7 @@ import rpm
 from rpmlint import pkg as Pkg
 from rpmlint.checks.AbstractCheck import AbstractCheck
 from rpmlint.helpers import ENGLISH_ENVIRONMENT, readlines
+from rpmlint.toolrunner import run_tool
 
 # Don't check for hardcoded library paths in biarch packages
 DEFAULT_BIARCH_PACKAGES = '^(gcc|glibc)'
@@ -106,6 +107,8 @@ def contains_buildroot(line):
 
 class SpecCheck(AbstractCheck):
     """Contain check methods that catch errors and warnings in a specfile."""
+    # source packages are always extracted completely
+    content_files = ()
 
     def __init__(self, config, output):
         super().__init__(config, output)
@@ -304,7 +307,7 @@ class SpecCheck(AbstractCheck):
         # but it seems errors from rpmlib get logged to stderr and we can't
         # capture and print them nicely, so we do it once each way :P
         try:
-            outcmd = subprocess.run(
+            outcmd = run_tool(
                 ('rpm', '-q', '--qf=', '-D', '_sourcedir %s' % self._spec_file_dir,
                  '--specfile', self._spec_file), stderr=subprocess.PIPE, encoding='utf8', env=ENGLISH_ENVIRONMENT)
 
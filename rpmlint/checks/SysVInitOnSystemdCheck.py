@@ -4,6 +4,9 @@ from rpmlint.checks.AbstractCheck import AbstractCheck
 
 
 class SysVInitOnSystemdCheck(AbstractCheck):
+    needs_content = False
+    content_files = ()
+
     def __init__(self, config, output):
         super().__init__(config, output)
         self.initscripts = set()
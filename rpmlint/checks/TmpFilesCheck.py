@@ -13,6 +13,8 @@ class TmpFilesCheck(AbstractCheck):
 
     # interesting types in tmpfiles.d configuration file (see tmpfiles.d(5))
     interesting_types = ('f', 'F', 'w', 'd', 'D', 'p', 'L', 'c', 'b')
+    applicable_files = ('/usr/lib/tmpfiles.d/*',)
+    content_files = applicable_files
 
     def check(self, pkg):
         if pkg.is_source:
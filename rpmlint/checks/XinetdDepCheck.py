@@ -2,6 +2,9 @@ from rpmlint.checks.AbstractCheck import AbstractCheck
 
 
 class XinetdDepCheck(AbstractCheck):
+    needs_content = False
+    content_files = ()
+
     def check(self, pkg):
         if pkg.is_source:
             return
@@ -11,12 +11,15 @@ class ZipCheck(AbstractCheck):
     """
     zip_regex = re.compile(r'\.(zip|[ewj]ar)$')
     jar_regex = re.compile(r'\.[ewj]ar$')
+    applicable_files = ('*.zip', '*.ear', '*.war', '*.jar')
+    content_files = applicable_files
 
     def check(self, pkg):
         for fname, pkgfile in pkg.files.items():
+            if not self.zip_regex.search(fname):
+                continue
             path = pkgfile.path
-            if self.zip_regex.search(fname) and Path(path).exists() and \
-               Path(path).is_file() and is_zipfile(path):
+            if Path(path).exists() and Path(path).is_file() and is_zipfile(path):
                 try:
                     with ZipFile(path, 'r') as z:
                         # zip checks
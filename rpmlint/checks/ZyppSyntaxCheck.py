@@ -2,6 +2,9 @@ from rpmlint.checks.AbstractCheck import AbstractCheck
 
 
 class ZyppSyntaxCheck(AbstractCheck):
+    needs_content = False
+    content_files = ()
+
     def check(self, pkg):
         # We care only about the names, versions are pointless here
         pkg_supplements = [x.name for x in pkg.supplements]
@@ -5,6 +5,7 @@ import sys
 from rpmlint.helpers import print_warning
 from rpmlint.lint import Lint
 from rpmlint.rpmdiff import Rpmdiff
+from rpmlint.server import LintServer, run_client
 from rpmlint.version import __version__
 
 
@@ -85,6 +86,19 @@ def process_lint_args(argv):
                         help='Do not report "unused-rpmlintrc-filter" errors')
     parser.add_argument('--checks',
                         help='Debugging option that enables only selected checks (separated by comma)')
+    parser.add_argument('-j', '--jobs', type=_positive_int, default=1,
+                        help='number of packages to check in parallel (default: 1)')
+    parser.add_argument('--header-only', action='store_true',
+                        help='do not extract the packages, run only the checks that do not need content of the files')
+    parser.add_argument('--extract-all', action='store_true',
+                        help='extract all the files of the packages, not just the ones the checks read')
+    parser.add_argument('--prefetch', type=int, default=0, metavar='N',
+                        help='extract up to N following packages in the background while checking the current one')
+    server_parser = parser.add_mutually_exclusive_group()
+    server_parser.add_argument('--server', metavar='SOCKET', type=Path,
+                               help='keep checks loaded and serve rpmlint runs on the Unix socket')
+    server_parser.add_argument('--connect', metavar='SOCKET', type=Path,
+                               help='let the rpmlint server listening on the Unix socket do the checking')
     lint_modes_parser = parser.add_mutually_exclusive_group()
     lint_modes_parser.add_argument('-s', '--strict', action='store_true', help='treat all messages as errors')
     lint_modes_parser.add_argument('-P', '--permissive', action='store_true', help='treat individual errors as non-fatal')
@@ -159,6 +173,16 @@ def _validate_conf_location(string):
     return config_paths
 
 
+def _positive_int(string):
+    try:
+        value = int(string)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f'{string} is not a positive integer')
+    return value
+
+
 def _is_file_path(path):
     p = Path(path)
     if not p.is_file():
@@ -172,6 +196,14 @@ def lint():
     """
     options = process_lint_args(sys.argv[1:])
 
+    if options['server']:
+        LintServer(options['server'], options, process_lint_args).serve_forever()
+    if options['connect']:
+        try:
+            sys.exit(run_client(options['connect'], sys.argv[1:]))
+        except OSError as e:
+            print_warning(f'(none): W: unable to connect to rpmlint server {options["connect"]}: {e}')
+
     lint = Lint(options)
     sys.exit(lint.run())
 
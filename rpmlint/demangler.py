@@ -0,0 +1,99 @@
+import os
+import subprocess
+import threading
+
+from rpmlint.helpers import ENGLISH_ENVIRONMENT
+
+
+class Demangler:
+    """
+    Demangle C++ symbol names with one c++filt process kept running for all
+    the checked files and packages.
+
+    The names are sent to c++filt over its stdin, one per line, and the
+    demangled names are remembered so that the symbols shared by many files
+    are demangled only once. A new process is started after fork (for the
+    --jobs workers) and when the old one died.
+    """
+
+    # number of remembered names
+    memo_size = 65536
+
+    def __init__(self, command=('c++filt',)):
+        self.command = list(command)
+        self.process = None
+        self.pid = None
+        self.names = {}
+        # number of names demangled by c++filt
+        self.demangled = 0
+        self._lock = threading.Lock()
+
+    def demangle(self, names):
+        """
+        Return demangled names, OSError is raised if c++filt can not be run.
+        """
+        with self._lock:
+            demangled = {}
+            missing = []
+            for name in dict.fromkeys(names):
+                if name in self.names:
+                    demangled[name] = self.names[name]
+                else:
+                    missing.append(name)
+            if missing:
+                demangled.update(zip(missing, self._run(missing)))
+                self.demangled += len(missing)
+                for name in missing:
+                    if len(self.names) >= self.memo_size:
+                        # forget the oldest one
+                        del self.names[next(iter(self.names))]
+                    self.names[name] = demangled[name]
+            return [demangled[name] for name in names]
+
+    def close(self):
+        with self._lock:
+            self._stop()
+
+    def _start(self):
+        if self.process is not None and self.pid == os.getpid() and self.process.poll() is None:
+            return
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, encoding='utf8', errors='surrogateescape',
+                                        env=ENGLISH_ENVIRONMENT)
+        self.pid = os.getpid()
+
+    def _stop(self):
+        if self.process is not None and self.pid == os.getpid():
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+    def _run(self, names):
+        self._start()
+        errors = []
+
+        def write():
+            try:
+                self.process.stdin.write(''.join(name + '\n' for name in names))
+                self.process.stdin.flush()
+            except OSError as e:
+                errors.append(e)
+
+        # c++filt answers line by line, feed it from another thread so that
+        # neither of us blocks on a full pipe
+        writer = threading.Thread(target=write)
+        writer.start()
+        lines = [self.process.stdout.readline() for _ in names]
+        writer.join()
+        if errors or not all(line.endswith('\n') for line in lines):
+            self._stop()
+            raise OSError(f'{self.command[0]} exited unexpectedly')
+        return [line[:-1] for line in lines]
+
+
+_demangler = Demangler()
+
+
+def demangle(names):
+    """Return demangled names, see Demangler."""
+    return _demangler.demangle(names)
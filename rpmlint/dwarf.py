@@ -0,0 +1,311 @@
+import re
+import struct
+
+
+class DwarfError(Exception):
+    """The debug information is not in a form we understand."""
+
+
+# sections the compile units and their strings are read from
+DEBUG_SECTIONS = ('.debug_info', '.debug_abbrev', '.debug_str', '.debug_line_str', '.debug_str_offsets')
+
+DW_TAG_compile_unit = 0x11
+DW_AT_producer = 0x25
+DW_AT_str_offsets_base = 0x72
+
+DW_UT_type = 0x02
+DW_UT_skeleton = 0x04
+DW_UT_split_compile = 0x05
+DW_UT_split_type = 0x06
+
+DW_FORM_block2 = 0x03
+DW_FORM_block4 = 0x04
+DW_FORM_string = 0x08
+DW_FORM_block = 0x09
+DW_FORM_block1 = 0x0a
+DW_FORM_sdata = 0x0d
+DW_FORM_strp = 0x0e
+DW_FORM_ref_addr = 0x10
+DW_FORM_indirect = 0x16
+DW_FORM_exprloc = 0x18
+DW_FORM_strx = 0x1a
+DW_FORM_strp_sup = 0x1d
+DW_FORM_line_strp = 0x1f
+DW_FORM_implicit_const = 0x21
+DW_FORM_strx1 = 0x25
+DW_FORM_strx2 = 0x26
+DW_FORM_strx3 = 0x27
+DW_FORM_strx4 = 0x28
+DW_FORM_GNU_str_index = 0x1f02
+DW_FORM_GNU_strp_alt = 0x1f21
+
+# size of the attribute values, 'offset' and 'address' stand for the offset
+# and address size of the unit and 'uleb' for an unsigned LEB128 number
+FORM_SIZES = {
+    0x01: 'address',  # addr
+    0x05: 2,  # data2
+    0x06: 4,  # data4
+    0x07: 8,  # data8
+    0x0b: 1,  # data1
+    0x0c: 1,  # flag
+    0x0e: 'offset',  # strp
+    0x0f: 'uleb',  # udata
+    0x11: 1,  # ref1
+    0x12: 2,  # ref2
+    0x13: 4,  # ref4
+    0x14: 8,  # ref8
+    0x15: 'uleb',  # ref_udata
+    0x17: 'offset',  # sec_offset
+    0x19: 0,  # flag_present
+    0x1a: 'uleb',  # strx
+    0x1b: 'uleb',  # addrx
+    0x1c: 4,  # ref_sup4
+    0x1d: 'offset',  # strp_sup
+    0x1e: 16,  # data16
+    0x1f: 'offset',  # line_strp
+    0x20: 8,  # ref_sig8
+    0x21: 0,  # implicit_const
+    0x22: 'uleb',  # loclistx
+    0x23: 'uleb',  # rnglistx
+    0x24: 8,  # ref_sup8
+    0x25: 1,  # strx1
+    0x26: 2,  # strx2
+    0x27: 3,  # strx3
+    0x28: 4,  # strx4
+    0x29: 1,  # addrx1
+    0x2a: 2,  # addrx2
+    0x2b: 3,  # addrx3
+    0x2c: 4,  # addrx4
+    0x1f01: 'uleb',  # GNU_addr_index
+    0x1f02: 'uleb',  # GNU_str_index
+    0x1f20: 'offset',  # GNU_ref_alt
+    0x1f21: 'offset',  # GNU_strp_alt
+}
+# size of the length in front of the blocks
+BLOCK_FORMS = {DW_FORM_block1: 1, DW_FORM_block2: 2, DW_FORM_block4: 4}
+STRX_FORMS = {DW_FORM_strx, DW_FORM_strx1, DW_FORM_strx2, DW_FORM_strx3, DW_FORM_strx4}
+
+LEB128 = rb'[\x80-\xff]*[\x00-\x7f]'
+# one abbreviation: code, tag, DW_CHILDREN_* and (attribute, form) pairs up
+# to (0, 0), forms DW_FORM_implicit_const are followed by their value
+ABBREV_REGEX = re.compile(rb'(%s)%s[\x00\x01](?:%s\x21%s|%s%s)*?\x00\x00' % ((LEB128,) * 6), re.DOTALL)
+
+
+class Section:
+    """
+    Data of one debug section, size bytes at start of data (the mapped
+    file or the decompressed section).
+    """
+
+    def __init__(self, data, order, start=0, size=None):
+        self.data = data
+        self.order = order
+        self.start = start
+        self.size = len(data) - start if size is None else size
+
+    def unpack(self, fmt, offset):
+        fmt = self.order + fmt
+        if offset < 0 or offset + struct.calcsize(fmt) > self.size:
+            raise DwarfError('truncated debug section')
+        return struct.unpack_from(fmt, self.data, self.start + offset)
+
+    def number(self, size, offset):
+        """Return unsigned number of any size (e.g. strx3)."""
+        if offset < 0 or offset + size > self.size:
+            raise DwarfError('truncated debug section')
+        start = self.start + offset
+        return int.from_bytes(self.data[start:start + size], 'little' if self.order == '<' else 'big')
+
+    def leb128(self, offset, signed=False):
+        """Return the LEB128 number and the offset behind it."""
+        value = 0
+        shift = 0
+        while True:
+            if offset >= self.size:
+                raise DwarfError('truncated debug section')
+            byte = self.data[self.start + offset]
+            offset += 1
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        if signed and byte & 0x40:
+            value -= 1 << shift
+        return value, offset
+
+    def string(self, offset):
+        """Return the null terminated string and the offset behind it."""
+        if offset < 0 or offset >= self.size:
+            raise DwarfError('string offset out of range')
+        start = self.start + offset
+        end = self.data.find(b'\0', start, self.start + self.size)
+        if end < 0:
+            raise DwarfError('unterminated string')
+        return self.data[start:end].decode('utf-8', 'replace'), end + 1 - self.start
+
+
+def compile_units(sections):
+    """
+    Return attributes of the compile units of the .debug_info section, a
+    dict with the 'producer' (if the unit has one) for each of them, the
+    same units 'objdump --dwarf=info' shows as DW_TAG_compile_unit.
+
+    sections maps the names of DEBUG_SECTIONS to Section objects. Only the
+    unit headers and their first DIE are read, the rest of each unit is
+    skipped.
+    """
+    info = sections.get('.debug_info')
+    if info is None:
+        return []
+    abbrevs = {}
+    units = []
+    offset = 0
+    while offset < info.size:
+        unit_length, = info.unpack('I', offset)
+        header = offset + 4
+        offset_size = 4
+        if unit_length == 0xffffffff:
+            unit_length, = info.unpack('Q', header)
+            header += 8
+            offset_size = 8
+        elif unit_length >= 0xfffffff0:
+            raise DwarfError(f'reserved unit length {unit_length:x}')
+        end = header + unit_length
+        offset = end
+        if end > info.size:
+            raise DwarfError('truncated compile unit')
+
+        version, = info.unpack('H', header)
+        offset_fmt = 'I' if offset_size == 4 else 'Q'
+        if 2 <= version <= 4:
+            abbrev_offset, address_size = info.unpack(f'{offset_fmt}B', header + 2)
+            die = header + 3 + offset_size
+        elif version == 5:
+            unit_type, address_size, abbrev_offset = info.unpack(f'BB{offset_fmt}', header + 2)
+            die = header + 4 + offset_size
+            if unit_type in (DW_UT_skeleton, DW_UT_split_compile):
+                die += 8
+            elif unit_type in (DW_UT_type, DW_UT_split_type):
+                die += 8 + offset_size
+        else:
+            raise DwarfError(f'unsupported DWARF version {version}')
+
+        code, die = info.leb128(die)
+        if not code:
+            continue
+        key = (abbrev_offset, code)
+        if key not in abbrevs:
+            abbrevs[key] = _abbrev(sections, abbrev_offset, code)
+        tag, attributes = abbrevs[key]
+        if tag != DW_TAG_compile_unit:
+            continue
+        unit = {'version': version, 'offset_size': offset_size, 'address_size': address_size}
+        units.append(_compile_unit(sections, info, die, attributes, unit))
+    return units
+
+
+def _abbrev(sections, abbrev_offset, code):
+    """Return tag and (attribute, form, implicit value) of the abbreviation."""
+    abbrev = _section(sections, '.debug_abbrev')
+    offset = abbrev_offset
+    # the abbreviations in front of it are skipped without decoding them
+    while True:
+        match = ABBREV_REGEX.match(abbrev.data, abbrev.start + offset, abbrev.start + abbrev.size)
+        entry_code = _leb128(match.group(1)) if match else abbrev.leb128(offset)[0]
+        if not entry_code:
+            raise DwarfError(f'missing abbreviation {code}')
+        if match is None:
+            raise DwarfError('malformed abbreviation table')
+        if entry_code == code:
+            break
+        offset = match.end() - abbrev.start
+
+    tag, offset = abbrev.leb128(match.end(1) - abbrev.start)
+    # DW_CHILDREN_yes or no
+    offset += 1
+    attributes = []
+    while True:
+        name, offset = abbrev.leb128(offset)
+        form, offset = abbrev.leb128(offset)
+        if not name and not form:
+            break
+        implicit = None
+        if form == DW_FORM_implicit_const:
+            implicit, offset = abbrev.leb128(offset, signed=True)
+        attributes.append((name, form, implicit))
+    return tag, attributes
+
+
+def _leb128(data):
+    value = 0
+    for shift, byte in enumerate(data):
+        value |= (byte & 0x7f) << (7 * shift)
+    return value
+
+
+def _compile_unit(sections, info, offset, attributes, unit):
+    producer = None
+    str_offsets_base = None
+    for name, form, _ in attributes:
+        while form == DW_FORM_indirect:
+            form, offset = info.leb128(offset)
+        value, offset = _value(info, offset, form, unit)
+        if name == DW_AT_producer:
+            producer = (form, value)
+        elif name == DW_AT_str_offsets_base:
+            str_offsets_base = value
+
+    if producer is None:
+        return {}
+    form, value = producer
+    if form in STRX_FORMS:
+        # the offsets start behind the header of .debug_str_offsets
+        if str_offsets_base is None:
+            str_offsets_base = 2 * unit['offset_size']
+        value = _section(sections, '.debug_str_offsets').number(
+            unit['offset_size'], str_offsets_base + value * unit['offset_size'])
+        form = DW_FORM_strp
+    if form == DW_FORM_strp:
+        value = _section(sections, '.debug_str').string(value)[0]
+    elif form == DW_FORM_line_strp:
+        value = _section(sections, '.debug_line_str').string(value)[0]
+    elif form in (DW_FORM_GNU_strp_alt, DW_FORM_strp_sup, DW_FORM_GNU_str_index):
+        # dwz or split DWARF, the string is in another file
+        raise DwarfError('producer in a supplementary or split debug file')
+    elif form != DW_FORM_string:
+        raise DwarfError(f'unsupported producer form 0x{form:x}')
+    return {'producer': value}
+
+
+def _section(sections, name):
+    if name not in sections:
+        raise DwarfError(f'missing {name} section')
+    return sections[name]
+
+
+def _value(info, offset, form, unit):
+    """Return value of the attribute (None for blocks) and the offset behind it."""
+    if form == DW_FORM_string:
+        return info.string(offset)
+    if form == DW_FORM_sdata:
+        return info.leb128(offset, signed=True)
+    if form in (DW_FORM_block, DW_FORM_exprloc):
+        length, offset = info.leb128(offset)
+        return None, offset + length
+    if form in BLOCK_FORMS:
+        length = info.number(BLOCK_FORMS[form], offset)
+        return None, offset + BLOCK_FORMS[form] + length
+
+    if form == DW_FORM_ref_addr:
+        size = unit['address_size'] if unit['version'] == 2 else unit['offset_size']
+    else:
+        size = FORM_SIZES.get(form)
+    if size is None:
+        raise DwarfError(f'unsupported form 0x{form:x}')
+    if size == 'uleb':
+        return info.leb128(offset)
+    if size == 'offset':
+        size = unit['offset_size']
+    elif size == 'address':
+        size = unit['address_size']
+    return info.number(size, offset), offset + size
@@ -0,0 +1,350 @@
+from collections import namedtuple
+import functools
+import glob
+import os
+import sys
+
+from rpmlint.elffile import ElfError, read_elf_objects
+
+
+LD_SO_CONF = '/etc/ld.so.conf'
+
+ET_EXEC = 2
+ET_DYN = 3
+STB_LOCAL = 0
+STB_WEAK = 2
+# symbol bindings (GLOBAL, WEAK, GNU_UNIQUE) and types (NOTYPE, OBJECT,
+# FUNC, COMMON, TLS, GNU_IFUNC) the dynamic linker binds references to
+RESOLVABLE_BINDS = (1, 2, 10)
+RESOLVABLE_TYPES = (0, 1, 2, 5, 6, 10)
+
+# version_index of the symbol in a versioned object, the first two are
+# the local and the global (unversioned) symbols
+Definition = namedtuple('Definition', 'version version_index hidden')
+
+
+def ld_so_conf_paths(conf=LD_SO_CONF):
+    """Return library directories listed in ld.so.conf and the files it includes."""
+    paths = []
+    try:
+        with open(conf, encoding='utf-8', errors='replace') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return paths
+    for line in lines:
+        line = line.split('#', 1)[0].strip()
+        if not line or line.startswith('hwcap '):
+            continue
+        if line.startswith('include '):
+            for pattern in line.split()[1:]:
+                if not os.path.isabs(pattern):
+                    pattern = os.path.join(os.path.dirname(conf), pattern)
+                for included in sorted(glob.glob(pattern)):
+                    paths.extend(ld_so_conf_paths(included))
+            continue
+        for path in line.replace(',', ' ').split():
+            # old syntax for the library type ("dir=libc6")
+            paths.append(path.split('=', 1)[0])
+    return paths
+
+
+class LibraryIndex:
+    """
+    Shared libraries found in the library search path, mapped by their
+    file names.
+
+    The directories are listed once, candidates for a DT_NEEDED name are
+    returned in the order the dynamic linker tries them.
+    """
+
+    def __init__(self, directories):
+        self.directories = directories
+        self.libraries = {}
+        for directory in directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        self.libraries.setdefault(entry.name, []).append(entry.path)
+            except OSError:
+                continue
+
+    def find(self, name):
+        return self.libraries.get(name, [])
+
+
+@functools.lru_cache
+def library_index(system_lib_paths):
+    """
+    Return LibraryIndex of ld.so.conf directories followed by
+    system_lib_paths (a tuple), built once per run, see reset().
+    """
+    directories = ld_so_conf_paths() + list(system_lib_paths)
+    return LibraryIndex(tuple(dict.fromkeys(os.path.normpath(d) for d in directories)))
+
+
+class DynamicObject:
+    """
+    Dynamically linked ELF object as seen by the dynamic linker: its
+    dependencies, search paths and the symbols it defines and uses.
+    """
+
+    def __init__(self, path):
+        objects = read_elf_objects(path, dynamic_symbols=True)
+        if len(objects) != 1 or objects[0].type not in (ET_EXEC, ET_DYN):
+            raise ElfError(f'{path} is not an executable or a shared library')
+        elf = objects[0]
+        if not elf.dynamic:
+            raise ElfError(f'{path} is not dynamically linked')
+        self.path = path
+        self.is_64 = elf.is_64
+        self.machine = elf.machine
+        self.interpreter = elf.interpreter
+        values = elf.dynamic_values
+        self.soname = values.get('SONAME', [None])[0]
+        self.needed = values.get('NEEDED', [])
+        origin = os.path.dirname(os.path.abspath(path))
+        self.rpath = self._search_path(values.get('RPATH', []), origin)
+        self.runpath = self._search_path(values.get('RUNPATH', []), origin)
+        self.has_versions = elf.has_versions
+        self.symbols = elf.dynamic_symbols
+        self.relocated_symbols = elf.relocated_symbols
+        # undefined symbols of the library by the objects loaded with it
+        self.unresolved = {}
+        self.definitions = {}
+        for symbol in elf.dynamic_symbols:
+            if symbol.defined and symbol.bind in RESOLVABLE_BINDS and symbol.type in RESOLVABLE_TYPES:
+                version = symbol.version if symbol.version_index >= 2 else None
+                self.definitions.setdefault(symbol.name, []).append(
+                    Definition(version, symbol.version_index, symbol.hidden))
+
+    def _search_path(self, values, origin):
+        paths = []
+        for value in values:
+            for path in value.split(':'):
+                for token in ('$ORIGIN', '${ORIGIN}'):
+                    path = path.replace(token, origin)
+                for token in ('$LIB', '${LIB}'):
+                    path = path.replace(token, 'lib64' if self.is_64 else 'lib')
+                for token in ('$PLATFORM', '${PLATFORM}'):
+                    path = path.replace(token, os.uname().machine)
+                if path:
+                    paths.append(path)
+        return paths
+
+    def defines(self, symbol):
+        """Return True if the object has a definition the reference can bind to."""
+        definitions = self.definitions.get(symbol.name)
+        if not definitions:
+            return False
+        if not self.has_versions:
+            return True
+        for definition in definitions:
+            if symbol.version_index >= 2:
+                # the same version or an unversioned definition
+                if definition.version == symbol.version or \
+                        (definition.version_index < 2 and not definition.hidden and not symbol.hidden):
+                    return True
+            # unversioned references take the base version or a default one
+            elif definition.version_index < 3 or not definition.hidden:
+                return True
+        return False
+
+
+@functools.lru_cache(maxsize=256)
+def _load_object(path):
+    """Return DynamicObject of the library, None if it can not be loaded."""
+    try:
+        return DynamicObject(path)
+    except ElfError:
+        return None
+
+
+@functools.lru_cache
+def _default_interpreter():
+    """Return the dynamic linker of the running python, ldd uses it for shared libraries."""
+    obj = _load_object(os.path.realpath(sys.executable))
+    return obj.interpreter if obj is not None else None
+
+
+def reset():
+    """
+    Forget the library index and the loaded objects with their memos.
+
+    Called at the start of every run so that a long running process (the
+    --server) sees the libraries installed meanwhile and does not keep the
+    dependency scopes of all the packages it ever checked.
+    """
+    library_index.cache_clear()
+    _load_object.cache_clear()
+    _default_interpreter.cache_clear()
+
+
+def _file_id(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_dev, st.st_ino)
+
+
+class DependencyResolver:
+    """
+    Resolve shared library dependencies of an ELF object like the dynamic
+    linker does for 'ldd -u' and 'ldd -r', without running it.
+
+    The dependencies are searched in DT_RPATH/DT_RUNPATH and in the
+    LibraryIndex of ld.so.conf and system_lib_paths. Missing dependencies
+    are reported as not found instead of failing. ElfError is raised for
+    objects the resolver does not understand.
+    """
+
+    def __init__(self, path, system_lib_paths):
+        self.main = DynamicObject(path)
+        self.index = library_index(tuple(system_lib_paths))
+        # (NEEDED name, DynamicObject or None) in the load order
+        self.loaded = []
+        self._load_dependencies()
+
+    def _compatible(self, obj):
+        return obj is not None and obj.is_64 == self.main.is_64 and obj.machine == self.main.machine
+
+    def _search(self, name, loader_chain):
+        obj = loader_chain[-1]
+        if '/' in name:
+            candidates = [name]
+        else:
+            directories = []
+            if not obj.runpath:
+                # DT_RPATH of the object and of the objects that loaded it
+                for loader in reversed(loader_chain):
+                    if not loader.runpath:
+                        directories += loader.rpath
+            directories += obj.runpath
+            candidates = [os.path.join(directory, name) for directory in directories]
+            candidates += self.index.find(name)
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                dependency = _load_object(candidate)
+                if self._compatible(dependency):
+                    return dependency
+        return None
+
+    def _load_dependencies(self):
+        # the loaded objects by the names they were asked for and by the files
+        self.names = {}
+        file_ids = {_file_id(self.main.path): self.main}
+        interpreter_path = self.main.interpreter or _default_interpreter()
+        interpreter = _load_object(interpreter_path) if interpreter_path else None
+        if self._compatible(interpreter):
+            for name in (interpreter_path, os.path.basename(interpreter_path), interpreter.soname):
+                if name:
+                    self.names[name] = interpreter
+            file_ids[_file_id(interpreter_path)] = interpreter
+        else:
+            interpreter = None
+
+        queue = [(self.main, [self.main])]
+        while queue:
+            obj, loader_chain = queue.pop(0)
+            for name in obj.needed:
+                if name in self.names:
+                    if self.names[name] is interpreter and interpreter is not None and \
+                            (interpreter_path, interpreter) not in self.loaded:
+                        self.loaded.append((interpreter_path, interpreter))
+                    continue
+                dependency = self._search(name, loader_chain)
+                if dependency is None:
+                    self.names[name] = None
+                    self.loaded.append((name, None))
+                    continue
+                file_id = _file_id(dependency.path)
+                if file_id in file_ids:
+                    self.names[name] = file_ids[file_id]
+                    continue
+                self.names[name] = dependency
+                if dependency.soname:
+                    self.names.setdefault(dependency.soname, dependency)
+                file_ids[file_id] = dependency
+                self.loaded.append((name, dependency))
+                queue.append((dependency, loader_chain + [dependency]))
+
+        # the dynamic linker of an executable is loaded even if nothing needs
+        # it, nothing is loaded for objects without dependencies
+        if self.loaded and self.main.interpreter and interpreter is not None and \
+                (interpreter_path, interpreter) not in self.loaded:
+            self.loaded.append((interpreter_path, interpreter))
+
+    def _lookup(self, symbol, referrer):
+        """Return the object the symbol reference binds to, None if there is none."""
+        # copy relocations are resolved in the other objects
+        skip = referrer if symbol.defined and symbol.needed_version else None
+        if skip is not self.main and self.main.defines(symbol):
+            return self.main
+        for _, obj in self.loaded:
+            if obj is not None and obj is not skip and obj.defines(symbol):
+                return obj
+        return None
+
+    @staticmethod
+    def _references(obj):
+        """Return the symbols the relocations of the object refer to."""
+        for index in obj.relocated_symbols:
+            if index < len(obj.symbols):
+                symbol = obj.symbols[index]
+                if symbol.name and symbol.bind != STB_LOCAL:
+                    yield symbol
+
+    def dependencies(self):
+        """Return the dependencies formatted like the lines of 'ldd' (without the addresses)."""
+        lines = []
+        for name, obj in self.loaded:
+            if obj is None:
+                lines.append(f'{name} => not found')
+            elif name == obj.path:
+                lines.append(obj.path)
+            else:
+                lines.append(f'{name} => {obj.path}')
+        return lines
+
+    def unused_dependencies(self):
+        """
+        Return direct dependencies no symbol reference of the object binds
+        to (as 'ldd -u' does).
+        """
+        used = set()
+        for symbol in self._references(self.main):
+            obj = self._lookup(symbol, self.main)
+            if obj is not None:
+                used.add(id(obj))
+
+        unused = []
+        for name in dict.fromkeys(self.main.needed):
+            obj = self.names[name]
+            if obj is None:
+                unused.append(name)
+            elif id(obj) not in used:
+                unused.append(obj.path)
+        return unused
+
+    def undefined_symbols(self):
+        """
+        Return names of the non-weak symbol references of the object and
+        of its dependencies that can not be bound (as 'ldd -r' does).
+        """
+        undefined = []
+        scope = tuple(obj.path for _, obj in self.loaded if obj is not None)
+        # the dependencies are relocated first
+        for _, obj in reversed(self.loaded):
+            if obj is not None:
+                # the libraries are shared by many binaries with the same dependencies
+                if scope not in obj.unresolved:
+                    obj.unresolved[scope] = self._unresolved(obj)
+                undefined += obj.unresolved[scope]
+        return undefined + self._unresolved(self.main)
+
+    def _unresolved(self, obj):
+        names = {}
+        for symbol in self._references(obj):
+            if symbol.bind != STB_WEAK and symbol.name not in names and self._lookup(symbol, obj) is None:
+                names[symbol.name] = True
+        return list(names)
@@ -0,0 +1,576 @@
+from collections import namedtuple
+import mmap
+import struct
+import zlib
+
+from rpmlint.arfile import ArArchive, ArError, is_archive
+from rpmlint.dwarf import compile_units, DEBUG_SECTIONS, DwarfError, Section
+import zstandard as zstd
+
+
+class ElfError(Exception):
+    """The file is not an ELF object (or an archive of them) we understand."""
+
+
+ELF_MAGIC = b'\x7fELF'
+
+ET_REL = 1
+SHT_SYMTAB = 2
+SHT_RELA = 4
+SHT_NOBITS = 8
+SHT_DYNAMIC = 6
+SHT_REL = 9
+SHT_DYNSYM = 11
+SHT_GNU_VERDEF = 0x6ffffffd
+SHT_GNU_VERNEED = 0x6ffffffe
+SHT_GNU_VERSYM = 0x6fffffff
+SHF_COMPRESSED = 0x800
+ELFCOMPRESS_ZLIB = 1
+ELFCOMPRESS_ZSTD = 2
+SHN_UNDEF = 0
+SHN_XINDEX = 0xffff
+PN_XNUM = 0xffff
+PT_LOAD = 1
+PT_DYNAMIC = 2
+PT_INTERP = 3
+PF_X = 1
+PF_W = 2
+PF_R = 4
+STT_FUNC = 2
+VERSYM_HIDDEN = 0x8000
+VERSYM_VERSION = 0x7fff
+
+EM_MIPS = 8
+EM_ARM = 40
+EM_AARCH64 = 183
+EM_RISCV = 243
+
+# program header types as named by readelf
+SEGMENT_TYPES = {
+    0: 'NULL',
+    1: 'LOAD',
+    2: 'DYNAMIC',
+    3: 'INTERP',
+    4: 'NOTE',
+    5: 'SHLIB',
+    6: 'PHDR',
+    7: 'TLS',
+    0x6474e550: 'GNU_EH_FRAME',
+    0x6474e551: 'GNU_STACK',
+    0x6474e552: 'GNU_RELRO',
+    0x6474e553: 'GNU_PROPERTY',
+    0x6474e554: 'GNU_SFRAME',
+}
+MACHINE_SEGMENT_TYPES = {
+    EM_ARM: {0x70000001: 'EXIDX'},
+    EM_AARCH64: {0x70000002: 'AARCH64_MEMTAG_MTE'},
+    EM_MIPS: {0x70000000: 'REGINFO', 0x70000001: 'RTPROC', 0x70000002: 'OPTIONS',
+              0x70000003: 'ABIFLAGS'},
+    EM_RISCV: {0x70000003: 'RISCV_ATTRIBUTES'},
+}
+
+# dynamic section tags as named by readelf
+DYNAMIC_TAGS = {
+    0: 'NULL', 1: 'NEEDED', 2: 'PLTRELSZ', 3: 'PLTGOT', 4: 'HASH', 5: 'STRTAB', 6: 'SYMTAB',
+    7: 'RELA', 8: 'RELASZ', 9: 'RELAENT', 10: 'STRSZ', 11: 'SYMENT', 12: 'INIT', 13: 'FINI',
+    14: 'SONAME', 15: 'RPATH', 16: 'SYMBOLIC', 17: 'REL', 18: 'RELSZ', 19: 'RELENT',
+    20: 'PLTREL', 21: 'DEBUG', 22: 'TEXTREL', 23: 'JMPREL', 24: 'BIND_NOW', 25: 'INIT_ARRAY',
+    26: 'FINI_ARRAY', 27: 'INIT_ARRAYSZ', 28: 'FINI_ARRAYSZ', 29: 'RUNPATH', 30: 'FLAGS',
+    32: 'PREINIT_ARRAY', 33: 'PREINIT_ARRAYSZ', 34: 'SYMTAB_SHNDX', 35: 'RELRSZ', 36: 'RELR',
+    37: 'RELRENT',
+    0x6ffffdf4: 'GNU_FLAGS_1', 0x6ffffdf5: 'GNU_PRELINKED', 0x6ffffdf6: 'GNU_CONFLICTSZ',
+    0x6ffffdf7: 'GNU_LIBLISTSZ', 0x6ffffdf8: 'CHECKSUM', 0x6ffffdf9: 'PLTPADSZ',
+    0x6ffffdfa: 'MOVEENT', 0x6ffffdfb: 'MOVESZ', 0x6ffffdfc: 'FEATURE', 0x6ffffdfd: 'POSFLAG_1',
+    0x6ffffdfe: 'SYMINSZ', 0x6ffffdff: 'SYMINENT',
+    0x6ffffef5: 'GNU_HASH', 0x6ffffef6: 'TLSDESC_PLT', 0x6ffffef7: 'TLSDESC_GOT',
+    0x6ffffef8: 'GNU_CONFLICT', 0x6ffffef9: 'GNU_LIBLIST', 0x6ffffefa: 'CONFIG',
+    0x6ffffefb: 'DEPAUDIT', 0x6ffffefc: 'AUDIT', 0x6ffffefd: 'PLTPAD', 0x6ffffefe: 'MOVETAB',
+    0x6ffffeff: 'SYMINFO',
+    0x6ffffff0: 'VERSYM', 0x6ffffff9: 'RELACOUNT', 0x6ffffffa: 'RELCOUNT', 0x6ffffffb: 'FLAGS_1',
+    0x6ffffffc: 'VERDEF', 0x6ffffffd: 'VERDEFNUM', 0x6ffffffe: 'VERNEED', 0x6fffffff: 'VERNEEDNUM',
+    0x7ffffffd: 'AUXILIARY', 0x7ffffffe: 'USED', 0x7fffffff: 'FILTER',
+}
+# values printed as a string from the dynamic string table
+DYNAMIC_STRINGS = {
+    'NEEDED': 'Shared library', 'SONAME': 'Library soname', 'RPATH': 'Library rpath',
+    'RUNPATH': 'Library runpath', 'AUXILIARY': 'Auxiliary library', 'FILTER': 'Filter library',
+    'CONFIG': 'Configuration file', 'DEPAUDIT': 'Dependency audit library', 'AUDIT': 'Audit library',
+}
+# values printed as a size
+DYNAMIC_SIZES = {
+    'PLTRELSZ', 'RELASZ', 'RELAENT', 'STRSZ', 'SYMENT', 'RELSZ', 'RELENT', 'INIT_ARRAYSZ',
+    'FINI_ARRAYSZ', 'PREINIT_ARRAYSZ', 'RELRSZ', 'RELRENT', 'GNU_CONFLICTSZ', 'GNU_LIBLISTSZ',
+    'PLTPADSZ', 'MOVEENT', 'MOVESZ', 'SYMINSZ', 'SYMINENT',
+}
+# values printed as a decimal number
+DYNAMIC_NUMBERS = {'VERDEFNUM', 'VERNEEDNUM', 'RELACOUNT', 'RELCOUNT'}
+DYNAMIC_FLAGS = ('ORIGIN', 'SYMBOLIC', 'TEXTREL', 'BIND_NOW', 'STATIC_TLS')
+DYNAMIC_FLAGS_1 = ('NOW', 'GLOBAL', 'GROUP', 'NODELETE', 'LOADFLTR', 'INITFIRST', 'NOOPEN',
+                   'ORIGIN', 'DIRECT', 'TRANS', 'INTERPOSE', 'NODEFLIB', 'NODUMP', 'CONFALT',
+                   'ENDFILTEE', 'DISPRELDNE', 'DISPRELPND', 'NODIRECT', 'IGNMULDEF', 'NOKSYMS',
+                   'NOHDR', 'EDITED', 'NORELOC', 'SYMINTPOSE', 'GLOBAUDIT', 'SINGLETON', 'STUB',
+                   'PIE', 'KMOD', 'WEAKFILTER', 'NOCOMMON')
+
+
+# symbol of the dynamic symbol table as the dynamic linker sees it, version
+# is the name of the defined or needed version of the symbol
+DynamicSymbol = namedtuple('DynamicSymbol', 'name bind type defined version version_index hidden needed_version')
+
+
+def read_elf_objects(path, dynamic_symbols=False, debug_info=False):
+    """
+    Read the ELF file or all ELF objects of the ar archive (the members of
+    thin archives are read from their files).
+
+    ElfError is raised for anything else, including archives with members
+    that are not ELF objects. See ElfFile for dynamic_symbols and
+    debug_info.
+    """
+    try:
+        with open(path, 'rb') as f:
+            if not f.seek(0, 2):
+                raise ElfError(f'{path} is empty')
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if is_archive(data):
+                    with ArArchive(path, data) as archive:
+                        return [ElfFile(*archive.member_data(member), dynamic_symbols, debug_info)
+                                for member in archive.members]
+                return [ElfFile(data, 0, len(data), dynamic_symbols, debug_info)]
+    except (OSError, ValueError, struct.error, IndexError, ArError) as e:
+        raise ElfError(str(e)) from e
+
+
+class ElfFile:
+    """
+    Information about one ELF object read directly from its data, the
+    values are the same as readelf reports them.
+
+    With dynamic_symbols the dynamic symbol table and the symbols used by
+    the dynamic relocations are read too (for DependencyResolver), with
+    debug_info the compile units of the DWARF debug information (see
+    rpmlint.dwarf.compile_units).
+    """
+
+    def __init__(self, data, start, size, dynamic_symbols=False, debug_info=False):
+        self.data = data
+        self.start = start
+        self.end = start + size
+        ident = data[start:start + 16]
+        if size < 52 or ident[:4] != ELF_MAGIC:
+            raise ElfError('not an ELF file')
+        if ident[4] not in (1, 2) or ident[5] not in (1, 2):
+            raise ElfError('unsupported ELF class or data encoding')
+        self.is_64 = ident[4] == 2
+        self.order = '<' if ident[5] == 1 else '>'
+        word = 'Q' if self.is_64 else 'I'
+        (self.type, self.machine, _, _, phoff, shoff, _, _, phentsize, phnum, shentsize, shnum,
+         shstrndx) = self._unpack(f'HHI{word}{word}{word}IHHHHHH', 16)
+
+        self.sections = []
+        if shoff:
+            self._read_sections(shoff, shentsize, shnum, shstrndx)
+        if phnum == PN_XNUM and self.sections:
+            phnum = self.sections[0]['info']
+        self.segments = []
+        if phoff:
+            self._read_segments(phoff, phentsize, phnum)
+
+        self.program_headers = self._program_headers()
+        self.dynamic = self._dynamic()
+        self.functions = self._functions()
+        self.comments = self._comments()
+        self.interpreter = self._interpreter()
+        self.dynamic_symbols = []
+        self.has_versions = False
+        # indexes of the dynamic symbols used by the dynamic relocations
+        self.relocated_symbols = []
+        if dynamic_symbols:
+            self._read_dynamic_symbols()
+        self.compile_units = []
+        if debug_info:
+            self.compile_units = self._compile_units()
+        # do not keep the mmap alive
+        self.data = None
+
+    def _unpack(self, fmt, offset):
+        offset += self.start
+        fmt = self.order + fmt
+        if offset < self.start or offset + struct.calcsize(fmt) > self.end:
+            raise ElfError('truncated ELF file')
+        return struct.unpack_from(fmt, self.data, offset)
+
+    def _bytes(self, offset, size):
+        if offset < 0 or size < 0 or offset + size > self.end - self.start:
+            raise ElfError('truncated ELF file')
+        return self.data[self.start + offset:self.start + offset + size]
+
+    def _read_sections(self, shoff, shentsize, shnum, shstrndx):
+        if self.is_64:
+            fmt = 'IIQQQQIIQQ'
+        else:
+            fmt = 'IIIIIIIIII'
+        first = self._unpack(fmt, shoff)
+        if not shnum:
+            shnum = first[5]
+        if shstrndx == SHN_XINDEX:
+            shstrndx = first[6]
+        for idx in range(shnum):
+            name, sh_type, flags, _, offset, size, link, info, _, entsize = \
+                self._unpack(fmt, shoff + idx * shentsize)
+            self.sections.append({'name_offset': name, 'type': sh_type, 'flags': flags, 'offset': offset,
+                                  'size': size, 'link': link, 'info': info, 'entsize': entsize})
+        if shstrndx >= len(self.sections):
+            raise ElfError('invalid section name string table index')
+        strtab = self.sections[shstrndx]
+        for section in self.sections:
+            section['name'] = self._string(strtab, section['name_offset'])
+
+    def _read_segments(self, phoff, phentsize, phnum):
+        for idx in range(phnum):
+            if self.is_64:
+                p_type, flags, offset, vaddr, _, filesz, _, _ = self._unpack('IIQQQQQQ', phoff + idx * phentsize)
+            else:
+                p_type, offset, vaddr, _, filesz, _, flags, _ = self._unpack('IIIIIIII', phoff + idx * phentsize)
+            self.segments.append({'type': p_type, 'flags': flags, 'offset': offset, 'vaddr': vaddr,
+                                  'filesz': filesz})
+
+    def _section_data(self, section):
+        if section['type'] == SHT_NOBITS:
+            return b''
+        if section['flags'] & SHF_COMPRESSED:
+            raise ElfError(f'compressed section {section["name"]}')
+        return self._bytes(section['offset'], section['size'])
+
+    def _string(self, strtab, offset):
+        if offset >= strtab['size']:
+            raise ElfError('string offset out of range')
+        data = self._bytes(strtab['offset'] + offset, strtab['size'] - offset)
+        end = data.find(b'\0')
+        return (data if end < 0 else data[:end]).decode('utf-8', 'replace')
+
+    def _program_headers(self):
+        """Return (readelf name, flags) of the program headers."""
+        names = dict(SEGMENT_TYPES, **MACHINE_SEGMENT_TYPES.get(self.machine, {}))
+        headers = []
+        for segment in self.segments:
+            name = names.get(segment['type'])
+            if name is None:
+                # readelf prints a description which is not a single word
+                continue
+            flags = segment['flags']
+            headers.append((name, ('R' if flags & PF_R else '') + ('W' if flags & PF_W else '') +
+                            ('E' if flags & PF_X else '')))
+        return headers
+
+    def _vaddr_offset(self, vaddr):
+        for segment in self.segments:
+            if segment['type'] == PT_LOAD and segment['vaddr'] <= vaddr < segment['vaddr'] + segment['filesz']:
+                return vaddr - segment['vaddr'] + segment['offset']
+        return None
+
+    def _dynamic(self):
+        """Return (readelf name, readelf value) of the dynamic section entries."""
+        # raw values (strings for the string entries) by the readelf names
+        self.dynamic_values = {}
+        offset = size = strtab = None
+        for segment in self.segments:
+            if segment['type'] == PT_DYNAMIC:
+                offset, size = segment['offset'], segment['filesz']
+                break
+        for section in self.sections:
+            if section['type'] == SHT_DYNAMIC:
+                if offset is None:
+                    offset, size = section['offset'], section['size']
+                if section['link'] < len(self.sections):
+                    strtab = self.sections[section['link']]
+                break
+        if offset is None:
+            return []
+
+        fmt, entsize = ('qQ', 16) if self.is_64 else ('iI', 8)
+        raw = []
+        for idx in range(size // entsize):
+            tag, value = self._unpack(fmt, offset + idx * entsize)
+            raw.append((tag, value))
+            if not tag:
+                break
+        if strtab is None:
+            strtab_addr = dict(raw).get(5)
+            strtab_size = dict(raw).get(10)
+            strtab_offset = self._vaddr_offset(strtab_addr) if strtab_addr is not None else None
+            if strtab_offset is not None and strtab_size is not None:
+                strtab = {'offset': strtab_offset, 'size': strtab_size}
+
+        entries = []
+        for tag, value in raw:
+            name = DYNAMIC_TAGS.get(tag)
+            if name is None:
+                entries.append((self._unknown_dynamic_tag(tag), f'0x{value:x}'))
+                continue
+            if name in DYNAMIC_STRINGS:
+                if strtab is None:
+                    raise ElfError('missing dynamic string table')
+                string = self._string(strtab, value)
+                self.dynamic_values.setdefault(name, []).append(string)
+                value = f'{DYNAMIC_STRINGS[name]}: [{string}]'
+                entries.append((name, value))
+                continue
+            self.dynamic_values.setdefault(name, []).append(value)
+            if name in DYNAMIC_SIZES:
+                value = f'{value} (bytes)'
+            elif name in DYNAMIC_NUMBERS:
+                value = str(value)
+            elif name == 'PLTREL':
+                value = DYNAMIC_TAGS.get(value, f'0x{value:x}')
+            elif name == 'FLAGS':
+                value = ' '.join(_flag_names(value, DYNAMIC_FLAGS, 'unknown'))
+            elif name == 'FLAGS_1':
+                value = 'Flags:' + (''.join(' ' + x for x in _flag_names(value, DYNAMIC_FLAGS_1)) or ' None')
+            elif name in ('GNU_PRELINKED', 'POSFLAG_1', 'FEATURE', 'GNU_FLAGS_1'):
+                raise ElfError(f'unsupported dynamic tag {name}')
+            else:
+                value = f'0x{value:x}'
+            entries.append((name, value))
+        return entries
+
+    def _unknown_dynamic_tag(self, tag):
+        tag &= 0xffffffffffffffff if self.is_64 else 0xffffffff
+        if 0x70000000 <= tag <= 0x7fffffff:
+            # readelf knows names of some of the processor specific tags
+            raise ElfError(f'unsupported processor specific dynamic tag {tag:x}')
+        if 0x6000000d <= tag <= 0x6ffff000:
+            return f'Operating System specific: {tag:x}'
+        return f'<unknown>: {tag:x}'
+
+    def _functions(self):
+        """Return names of the function symbols, with versions like readelf prints them."""
+        functions = set()
+        versions = None
+        for section in self.sections:
+            if section['type'] not in (SHT_SYMTAB, SHT_DYNSYM):
+                continue
+            if section['link'] >= len(self.sections):
+                raise ElfError('invalid symbol string table index')
+            strtab = self.sections[section['link']]
+            entsize = 24 if self.is_64 else 16
+            fmt = 'IBBHQQ' if self.is_64 else 'IIIBBH'
+            data_size = len(self._section_data(section))
+            for idx in range(data_size // entsize):
+                fields = self._unpack(fmt, section['offset'] + idx * entsize)
+                if self.is_64:
+                    name, info, _, shndx = fields[:4]
+                else:
+                    name, info, shndx = fields[0], fields[3], fields[5]
+                if info & 0xf != STT_FUNC or not name:
+                    continue
+                symbol = self._string(strtab, name)
+                if not symbol:
+                    continue
+                if section['type'] == SHT_DYNSYM:
+                    if versions is None:
+                        versions = self._versions()
+                    symbol += self._symbol_version(versions, idx, name, shndx)
+                functions.add(symbol)
+        return functions
+
+    def _versions(self):
+        """Return versym indexes and names of defined and needed versions."""
+        versym = []
+        defined = {}
+        needed = {}
+        for section in self.sections:
+            if section['type'] == SHT_GNU_VERSYM:
+                data = self._section_data(section)
+                versym = struct.unpack(f'{self.order}{len(data) // 2}H', data[:len(data) // 2 * 2])
+            elif section['type'] == SHT_GNU_VERDEF:
+                strtab = self.sections[section['link']]
+                offset = section['offset']
+                for _ in range(section['info']):
+                    _, _, ndx, cnt, _, aux, nxt = self._unpack('HHHHIII', offset)
+                    if cnt:
+                        vda_name, _ = self._unpack('II', offset + aux)
+                        defined[ndx] = (vda_name, self._string(strtab, vda_name))
+                    if not nxt:
+                        break
+                    offset += nxt
+            elif section['type'] == SHT_GNU_VERNEED:
+                strtab = self.sections[section['link']]
+                offset = section['offset']
+                for _ in range(section['info']):
+                    _, cnt, _, aux, nxt = self._unpack('HHIII', offset)
+                    aux_offset = offset + aux
+                    for _ in range(cnt):
+                        _, _, other, vna_name, vna_next = self._unpack('IHHII', aux_offset)
+                        needed[other] = self._string(strtab, vna_name)
+                        if not vna_next:
+                            break
+                        aux_offset += vna_next
+                    if not nxt:
+                        break
+                    offset += nxt
+        return versym, defined, needed
+
+    @staticmethod
+    def _symbol_version(versions, idx, name, shndx):
+        versym, defined, needed = versions
+        # local and global symbols are not versioned
+        if idx >= len(versym) or versym[idx] in (0, 1):
+            return ''
+        vers_data = versym[idx]
+        version = vers_data & VERSYM_VERSION
+        if shndx != SHN_UNDEF and vers_data != 0x8001 and version in defined:
+            vda_name, version_name = defined[version]
+            if name == vda_name:
+                # the symbol defining the version
+                return ''
+            return ('@' if vers_data & VERSYM_HIDDEN else '@@') + version_name
+        if version in needed:
+            return '@' + needed[version]
+        return ''
+
+    def _interpreter(self):
+        for segment in self.segments:
+            if segment['type'] == PT_INTERP:
+                return self._bytes(segment['offset'], segment['filesz']).rstrip(b'\0').decode('utf-8', 'replace')
+        return None
+
+    def _read_dynamic_symbols(self):
+        dynsym_index = next((index for index, section in enumerate(self.sections)
+                             if section['type'] == SHT_DYNSYM), None)
+        if dynsym_index is None:
+            if self.dynamic:
+                # the dynamic linker finds the symbols without the section headers
+                raise ElfError('dynamic symbol table without section headers')
+            return
+
+        section = self.sections[dynsym_index]
+        strtab = self.sections[section['link']]
+        versym, defined, needed = self._versions()
+        self.has_versions = bool(versym)
+        fmt = 'IBBHQQ' if self.is_64 else 'IIIBBH'
+        entsize = struct.calcsize(fmt)
+        data = self._section_data(section)
+        for idx, fields in enumerate(struct.iter_unpack(self.order + fmt, data[:len(data) // entsize * entsize])):
+            if self.is_64:
+                name, info, _, shndx = fields[:4]
+            else:
+                name, info, shndx = fields[0], fields[3], fields[5]
+            version_index = versym[idx] & VERSYM_VERSION if idx < len(versym) else 0
+            hidden = idx < len(versym) and bool(versym[idx] & VERSYM_HIDDEN)
+            version = defined[version_index][1] if version_index in defined else needed.get(version_index)
+            self.dynamic_symbols.append(DynamicSymbol(self._string(strtab, name) if name else '', info >> 4,
+                                                      info & 0xf, shndx != SHN_UNDEF, version, version_index,
+                                                      hidden, version_index in needed))
+
+        for section in self.sections:
+            if section['type'] not in (SHT_REL, SHT_RELA) or section['link'] != dynsym_index:
+                continue
+            if self.is_64:
+                fmt, shift = ('QQq' if section['type'] == SHT_RELA else 'QQ'), 32
+            else:
+                fmt, shift = ('IIi' if section['type'] == SHT_RELA else 'II'), 8
+            entsize = struct.calcsize(fmt)
+            data = self._section_data(section)
+            for entry in struct.iter_unpack(self.order + fmt, data[:len(data) // entsize * entsize]):
+                symbol = entry[1] >> shift
+                if symbol:
+                    self.relocated_symbols.append(symbol)
+
+    def _compile_units(self):
+        sections = {}
+        for idx, section in enumerate(self.sections):
+            name = section['name']
+            if name.startswith('.zdebug_'):
+                name = '.debug_' + name[len('.zdebug_'):]
+            if name not in DEBUG_SECTIONS or section['type'] == SHT_NOBITS:
+                continue
+            if self.type == ET_REL and any(rel['type'] in (SHT_REL, SHT_RELA) and rel['info'] == idx
+                                           for rel in self.sections):
+                # the offsets in object files are known only after relocation
+                raise ElfError(f'relocatable debug section {section["name"]}')
+            sections[name] = self._debug_section(section)
+        try:
+            return compile_units(sections)
+        except DwarfError as e:
+            raise ElfError(str(e)) from e
+
+    def _debug_section(self, section):
+        """Return the debug section for rpmlint.dwarf, compressed sections are decompressed."""
+        if section['flags'] & SHF_COMPRESSED:
+            if self.is_64:
+                compression, _, size, _ = self._unpack('IIQQ', section['offset'])
+                header = 24
+            else:
+                compression, size, _ = self._unpack('III', section['offset'])
+                header = 12
+            data = self._bytes(section['offset'] + header, section['size'] - header)
+            return Section(_decompress(compression, data, size), self.order)
+
+        data = self._bytes(section['offset'], min(section['size'], 12))
+        if section['name'].startswith('.zdebug_') and data[:4] == b'ZLIB':
+            # the GNU format used before SHF_COMPRESSED, sections which
+            # would not get smaller are not compressed
+            size = int.from_bytes(data[4:12], 'big')
+            data = self._bytes(section['offset'] + 12, section['size'] - 12)
+            return Section(_decompress(ELFCOMPRESS_ZLIB, data, size), self.order)
+        if section['offset'] + section['size'] > self.end - self.start:
+            raise ElfError('truncated ELF file')
+        # read directly from the mapped file
+        return Section(self.data, self.order, self.start + section['offset'], section['size'])
+
+    def _comments(self):
+        """Return strings of the .comment section like readelf -p prints them."""
+        comments = []
+        for section in self.sections:
+            if section['name'] != '.comment':
+                continue
+            data = self._section_data(section)
+            pos = 0
+            while pos < len(data):
+                # readelf skips non-printable characters in front of the strings
+                if not 0x20 <= data[pos] < 0x7f:
+                    pos += 1
+                    continue
+                end = data.find(b'\0', pos)
+                if end < 0:
+                    end = len(data)
+                string = data[pos:end]
+                # only the first line of strings with new lines is reported
+                string = string.split(b'\n', 1)[0]
+                comments.append(_printable(string).lstrip())
+                pos = end + 1
+        return comments
+
+
+def _decompress(compression, data, size):
+    try:
+        if compression == ELFCOMPRESS_ZLIB:
+            data = zlib.decompress(data, bufsize=size)
+        elif compression == ELFCOMPRESS_ZSTD:
+            data = zstd.ZstdDecompressor().decompress(data, max_output_size=size)
+        else:
+            raise ElfError(f'unknown section compression {compression}')
+    except (zlib.error, zstd.ZstdError) as e:
+        raise ElfError(f'corrupted compressed section: {e}') from e
+    if len(data) != size:
+        raise ElfError('unexpected size of decompressed section')
+    return data
+
+
+def _flag_names(value, names, unknown=None):
+    flags = []
+    for bit, name in enumerate(names):
+        if value & (1 << bit):
+            flags.append(name)
+            value &= ~(1 << bit)
+    if value and unknown:
+        flags.append(unknown)
+    elif value:
+        raise ElfError(f'unknown dynamic flags {value:x}')
+    return flags
+
+
+def _printable(data):
+    """Decode the string, control characters are shown as readelf does (^X)."""
+    return ''.join(f'^{chr(c + 0x40)}' if c < 0x20 else chr(c) for c in data) if data.isascii() \
+        else data.decode('utf-8', 'replace')
@@ -1,3 +1,5 @@
+from collections import namedtuple
+import contextlib
 from pathlib import Path
 import re
 import textwrap
@@ -11,6 +13,21 @@ except ImportError:
     import tomli as tomllib
 
 
+# Minimal package identity used by add_info when diagnostics are replayed
+DiagnosticSource = namedtuple('DiagnosticSource', ('name', 'arch', 'current_linenum'))
+# Raw, unfiltered rpmlint issue as reported by a check
+Diagnostic = namedtuple('Diagnostic', ('level', 'source', 'rpmlint_issue', 'details'))
+# Raw diagnostics of one checked package: those of the package checks,
+# those of after_checks (None if they were not run) and descriptions
+# registered by the checks meanwhile
+CheckResult = namedtuple('CheckResult', ('source', 'diagnostics', 'after_checks', 'error_details'))
+
+
+def diagnostic_source(package):
+    """Return picklable DiagnosticSource describing the package."""
+    return DiagnosticSource(str(package.name), package.arch, package.current_linenum)
+
+
 class Filter:
     """
     Handle all printing/formatting/filtering of the rpmlint output.
@@ -19,12 +36,14 @@ class Filter:
     sorted and formatted based on the rules specified by the user/config
     """
 
-    def __init__(self, config):
+    def __init__(self, config, error_details=None):
         """
         Initialize options from configuration and load rpmlint descriptions.
 
         Args:
             config: Config object with parsed rpmlint configuration.
+            error_details: Already loaded descriptions, they are copied
+                           instead of loading the toml files again.
         """
         # badness stuff
         self.badness_threshold = config.configuration['BadnessThreshold']
@@ -45,7 +64,9 @@ class Filter:
         # Dictionary containing mapped values of descriptions for the errors.
         self.error_details = {}
         # Load it up with the toml descriptions
-        self.error_details.update(self._load_descriptions())
+        if error_details is None:
+            error_details = self._load_descriptions()
+        self.error_details.update(error_details)
         # Counter of how many issues we encountered
         self.printed_messages = {'I': 0, 'W': 0, 'E': 0}
         # Number of promoted warnings and infos to errors
@@ -54,6 +75,8 @@ class Filter:
         self.filtered_out = 0
         # Messages
         self.results = []
+        # DiagnosticRecorder that add_info is diverted to, see recording()
+        self.recorder = None
 
     @staticmethod
     def _load_descriptions():
@@ -93,6 +116,10 @@ class Filter:
             *details: Details of the rpmlint issue
         """
 
+        if self.recorder is not None:
+            self.recorder.add_info(level, package, rpmlint_issue, *details)
+            return
+
         if ' ' in rpmlint_issue:
             raise ValueError(f'Space cannot be part of an issue name: "{rpmlint_issue}"')
 
@@ -221,7 +248,58 @@ class Filter:
         xs = x.split()
         return (xs[2], xs[1])
 
+    @contextlib.contextmanager
+    def recording(self):
+        """
+        Record raw diagnostics passed to add_info within the block instead
+        of processing them. They can be processed later with replay().
+        Recordings can be nested, the outer one continues after the block.
+        """
+        previous = self.recorder
+        self.recorder = DiagnosticRecorder()
+        try:
+            yield self.recorder
+        finally:
+            self.recorder = previous
+
+    def replay(self, diagnostics):
+        """
+        Feed raw diagnostics collected by a DiagnosticRecorder through add_info.
+
+        Filtering, scoring and counters are then identical to the case where
+        the checks reported the issues directly to this Filter.
+        """
+        for diag in diagnostics:
+            self.add_info(diag.level, diag.source, diag.rpmlint_issue, *diag.details)
+
     def validate_filters(self, pkg):
         for f in self.rpmlintrc_filters:
             if f not in self.used_filters:
                 self.add_info('E', pkg, 'unused-rpmlintrc-filter', f'"{f}"')
+
+
+class DiagnosticRecorder:
+    """
+    Record raw rpmlint issues passed to Filter.add_info.
+
+    It is used where the output of checks is processed later or elsewhere
+    (e.g. cached or sent from a worker process) with Filter.replay.
+    """
+
+    def __init__(self):
+        self.diagnostics = []
+
+    def add_info(self, level, package, rpmlint_issue, *details):
+        if ' ' in rpmlint_issue:
+            raise ValueError(f'Space cannot be part of an issue name: "{rpmlint_issue}"')
+        # empty details are skipped by Filter.add_info, keep the rest as text
+        # so that the diagnostic can be pickled
+        details = tuple(str(detail) for detail in details if detail)
+        self.diagnostics.append(Diagnostic(level, diagnostic_source(package),
+                                           rpmlint_issue, details))
+
+    def take(self):
+        """Return the recorded diagnostics and start from scratch."""
+        diagnostics = self.diagnostics
+        self.diagnostics = []
+        return diagnostics
@@ -1,7 +1,10 @@
 import re
-import subprocess
 
+from rpmlint.demangler import demangle
+from rpmlint.dynamiclinker import DependencyResolver
+from rpmlint.elffile import ElfError
 from rpmlint.helpers import ENGLISH_ENVIRONMENT
+from rpmlint.toolrunner import submit_tool
 
 
 class LddParser:
@@ -33,24 +36,54 @@ class LddParser:
     undefined symbol: gss_accept_sec_context, version gssapi_krb5_2_MIT	(./test/ldd/libtirpc.so.3.0.0)
     undefined symbol: gss_verify_mic, version gssapi_krb5_2_MIT	(./test/ldd/libtirpc.so.3.0.0)
     undefined symbol: gss_get_mic, version gssapi_krb5_2_MIT	(./test/ldd/libtirpc.so.3.0.0)
+
+    The 'native' backend computes the same information with
+    DependencyResolver without running ldd, ldd is still used for files
+    the resolver does not understand.
     """
 
+    BACKENDS = ('native', 'ldd')
+    # library directories searched when no system_lib_paths are given
+    DEFAULT_LIB_PATHS = ('/lib64', '/usr/lib64', '/lib', '/usr/lib')
+
     unused_regex = re.compile(r'^\s+(?P<lib>\S+)')
-    undef_regex = re.compile(r'^undefined symbol:\s+(?P<symbol>[^, ]+)')
+    undef_regex = re.compile(r'^undefined symbol:\s+(?P<symbol>[^,\s]+)')
 
-    def __init__(self, pkgfile_path, path, is_installed_pkg):
+    def __init__(self, pkgfile_path, path, is_installed_pkg, backend='native', system_lib_paths=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f'unknown ldd backend {backend}')
         self.pkgfile_path = pkgfile_path
+        self.system_lib_paths = system_lib_paths or self.DEFAULT_LIB_PATHS
         self.dependencies = []
         self.unused_dependencies = []
         self.undefined_symbols = []
         self.parsing_failed_reason = None
+        self.backend = backend
         if is_installed_pkg:
-            self.parse_dependencies()
-            self.parse_undefined_symbols()
+            if backend == 'native':
+                try:
+                    self.resolve_dependencies()
+                    return
+                except ElfError:
+                    self.backend = 'ldd'
+            # both ldd runs are started at once
+            unused = self._submit_ldd('-u')
+            undefined = self._submit_ldd('-r')
+            self.parse_dependencies(unused.result())
+            self.parse_undefined_symbols(undefined.result())
+
+    def resolve_dependencies(self):
+        resolver = DependencyResolver(self.pkgfile_path, self.system_lib_paths)
+        self.dependencies = resolver.dependencies()
+        self.unused_dependencies = resolver.unused_dependencies()
+        self.undefined_symbols = resolver.undefined_symbols()
+        self.demangle_undefined_symbols()
 
-    def parse_dependencies(self):
-        r = subprocess.run(['ldd', '-u', self.pkgfile_path], encoding='utf8',
+    def _submit_ldd(self, option):
+        return submit_tool(['ldd', option, self.pkgfile_path], encoding='utf8',
                            capture_output=True, env=ENGLISH_ENVIRONMENT)
+
+    def parse_dependencies(self, r):
         if r.returncode == 0:
             return
 
@@ -66,9 +99,7 @@ class LddParser:
                 else:
                     is_unused = False
 
-    def parse_undefined_symbols(self):
-        r = subprocess.run(['ldd', '-r', self.pkgfile_path], encoding='utf8',
-                           capture_output=True, env=ENGLISH_ENVIRONMENT)
+    def parse_undefined_symbols(self, r):
         # here ldd should always return 0
         if r.returncode != 0:
             self.parsing_failed_reason = r.stderr
@@ -81,12 +112,12 @@ class LddParser:
                 self.undefined_symbols.append(r.group('symbol'))
             else:
                 self.dependencies.append(line.strip())
+        self.demangle_undefined_symbols()
 
-        # run c++filt demangler for all collected symbols
+    def demangle_undefined_symbols(self):
+        # the c++filt demangler is shared by all the files
         if self.undefined_symbols:
-            r = subprocess.run(['c++filt'] + self.undefined_symbols, encoding='utf8',
-                               capture_output=True, env=ENGLISH_ENVIRONMENT)
-            if r.returncode != 0:
-                self.parsing_failed_reason = r.stderr
-            else:
-                self.undefined_symbols = r.stdout.splitlines()
+            try:
+                self.undefined_symbols = demangle(self.undefined_symbols)
+            except OSError as e:
+                self.parsing_failed_reason = str(e)
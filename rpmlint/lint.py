@@ -1,64 +1,140 @@
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+import concurrent.futures
+import contextlib
 import cProfile
 import importlib
 import operator
+import os
 from pstats import Stats
 import sys
 from tempfile import gettempdir
 import time
 
+from rpmlint import dynamiclinker
+from rpmlint.cache import MagicCache, ResultCache
 from rpmlint.color import Color
 from rpmlint.config import Config
-from rpmlint.filter import Filter
+from rpmlint.filter import CheckResult, diagnostic_source, Filter
 from rpmlint.helpers import print_warning, string_center
-from rpmlint.pkg import FakePkg, get_installed_pkgs, Pkg
+from rpmlint.pkg import (ContentFilter, FakePkg, get_installed_pkgs, magic_version, PackageIndex, Pkg,
+                         PkgPrefetcher)
+from rpmlint.toolrunner import get_runner
 from rpmlint.version import __version__
 
 
+# Outcome of a package checked in a worker process
+WorkerResult = namedtuple('WorkerResult', ('result', 'check_duration', 'skipped_checks', 'checked_files', 'packages_checked',
+                                           'specfiles_checked', 'magic_cache_stats', 'tool_stats'))
+
+# Lint instance of a worker process, see Lint._validate_files_parallel
+_worker_lint = None
+
+
 class Lint:
     """
     Generic object handling the basic rpmlint operations
     """
 
-    def __init__(self, options):
+    def __init__(self, options, config=None, output=None, checks=None):
         # initialize configuration
         self.checks = {}
         self.options = options
         self.packages_checked = 0
         self.specfiles_checked = 0
         self.check_duration = defaultdict(int)
-        if options['config']:
-            self.config = Config(options['config'])
-        else:
-            self.config = Config()
+        # number of packages the checks did not apply to
+        self.skipped_checks = defaultdict(int)
+        self.prefetcher = None
         if options['profile']:
             self.profile = cProfile.Profile()
             self.profile.enable()
         else:
             self.profile = None
 
-        if options['rpmlintrc']:
-            options['rpmlintrc'] = [options['rpmlintrc']]
-        self._load_rpmlintrc()
-        if options['verbose']:
-            self.config.info = options['verbose']
-        if options['strict']:
-            self.config.strict = options['strict']
-        if options['permissive']:
-            self.config.permissive = options['permissive']
-        if not self.config.configuration['ExtractDir']:
-            self.config.configuration['ExtractDir'] = gettempdir()
+        self.result_cache = None
+        if config:
+            # configuration including rpmlintrc was already set up by the
+            # caller, e.g. by the parent process of a worker
+            self.config = config
+        else:
+            self._load_config()
         # initialize output buffer
-        self.output = Filter(self.config)
+        self.output = output if output is not None else Filter(self.config)
         # preload the check list if we not print config
         # some of the config values are transformed e.g. to regular
         # expressions
-        if not self.options['print_config']:
+        self.config_state = None
+        if checks is not None:
+            # already loaded checks, e.g. kept warm by the rpmlint server
+            self.checks = checks
+            for check in self.checks.values():
+                check.output = self.output
+        elif not self.options['print_config']:
+            self.config_state = ResultCache.config_state(self.config.configuration)
             self.load_checks()
+            if not config:
+                self.result_cache = self.create_result_cache(self.config_state)
+        self.content_filter = self._content_filter()
+        self.magic_cache = self.create_magic_cache()
+        self.configure_tools()
+
+    def create_result_cache(self, config_state):
+        """
+        Return ResultCache for the loaded checks or None if CacheDir is not
+        configured.
+        """
+        configuration = self.config.configuration
+        if not configuration.get('CacheDir'):
+            return None
+        return ResultCache(configuration['CacheDir'], configuration['ResultCacheSize'] * 1024 * 1024,
+                           config_state, self.config.rpmlintrc_filters, list(self.checks), self.options)
+
+    def create_magic_cache(self):
+        """Return MagicCache or None if CacheDir is not configured."""
+        configuration = self.config.configuration
+        if not configuration.get('CacheDir'):
+            return None
+        return MagicCache(configuration['CacheDir'], configuration['MagicCacheSize'] * 1024 * 1024,
+                          magic_version())
+
+    def configure_tools(self, workers=1):
+        """
+        Set up the runner of the external tools, the workers of --jobs share
+        the number of CPUs if ToolJobs is not set.
+        """
+        configuration = self.config.configuration
+        jobs = configuration['ToolJobs'] or max(1, (os.cpu_count() or 1) // workers)
+        get_runner().configure(jobs, configuration['ToolTimeouts'])
+
+    def _content_filter(self):
+        """
+        Return ContentFilter selecting the files the loaded checks read or
+        None if everything has to be extracted.
+        """
+        if self.options.get('extract_all'):
+            return None
+        patterns = []
+        magic = []
+        for check in self.checks.values():
+            if check.content_files is None:
+                return None
+            patterns += check.content_files
+            magic += check.content_magic
+        return ContentFilter(patterns, magic)
+
+    def _load_config(self):
+        options = self.options
+        if options['config']:
+            self.config = Config(options['config'])
+        else:
+            self.config = Config()
+        apply_options(self.config, options)
 
     def _run(self):
         start = time.monotonic()
         retcode = 0
+        # the host libraries may have changed since the previous run (--server)
+        dynamiclinker.reset()
         # if we just want to print config, do so and leave
         if self.options['print_config']:
             self.print_config()
@@ -128,7 +204,11 @@ class Lint:
     def _print_time_report(self):
         PERCENT_THRESHOLD = 1
         TIME_THRESHOLD = 0.1
-        total = sum(self.check_duration.values())
+        # CPU time of the timers measured also in wall clock time, e.g. of
+        # libmagic running in parallel
+        cpu_timers = {k: v for k, v in self.check_duration.items() if k.endswith('-cpu')}
+        durations = {k: v for k, v in self.check_duration.items() if k not in cpu_timers}
+        total = sum(durations.values())
         checked_files = [check.checked_files for check in self.checks.values() if check.checked_files]
         total_checked_files = max(checked_files) if checked_files else ''
         print(f'{Color.Bold}Check time report{Color.Reset} (>{PERCENT_THRESHOLD}% & >{TIME_THRESHOLD}s):')
@@ -138,7 +218,7 @@ class Lint:
         fraction = format('Fraction (in %)', '>17')
         print(f'{Color.Bold}    {check} {duration} {fraction}  Checked files{Color.Reset}')
 
-        for check, duration in sorted(self.check_duration.items(), key=operator.itemgetter(1), reverse=True):
+        for check, duration in sorted(durations.items(), key=operator.itemgetter(1), reverse=True):
             fraction = 100.0 * duration / total
             if fraction < PERCENT_THRESHOLD or duration < TIME_THRESHOLD:
                 continue
@@ -152,6 +232,37 @@ class Lint:
 
         print(f'    {"TOTAL":32s} {total:15.1f} {100:17.1f} {total_checked_files:>14}\n')       # noqa Q000
 
+        if any(cpu_timers.values()):
+            print(f'{Color.Bold}Wall clock vs. CPU time{Color.Reset} (in s):')
+            timer, wall, cpu = format('Timer', '32s'), format('Wall clock', '>15'), format('CPU', '>17')
+            print(f'{Color.Bold}    {timer} {wall} {cpu}{Color.Reset}')
+            for timer, cpu_time in sorted(cpu_timers.items()):
+                name = timer[:-len('-cpu')]
+                print(f'    {name:32s} {durations.get(name, 0):15.1f} {cpu_time:17.1f}')
+            print()
+
+        if self.skipped_checks:
+            print(f'{Color.Bold}Skipped checks{Color.Reset} (not applicable to the package):')
+            for check, skipped in sorted(self.skipped_checks.items(), key=operator.itemgetter(1), reverse=True):
+                print(f'    {check:32s} {skipped:>15} packages')
+            print()
+
+        if self.magic_cache and (self.magic_cache.hits or self.magic_cache.misses):
+            print(f'{Color.Bold}Magic cache{Color.Reset} (files classified by libmagic):')
+            print(f'    {"hits":32s} {self.magic_cache.hits:>15}')  # noqa Q000
+            print(f'    {"misses":32s} {self.magic_cache.misses:>15}\n')  # noqa Q000
+
+        tool_stats = get_runner().stats
+        if tool_stats:
+            print(f'{Color.Bold}External tools{Color.Reset} (at most {get_runner().jobs} running at a time):')
+            tool, calls, duration = format('Tool', '32s'), format('Calls', '>15'), format('Duration (in s)', '>17')
+            output, timeouts = format('Output (in MiB)', '>17'), format('Timeouts', '>10')
+            print(f'{Color.Bold}    {tool} {calls} {duration} {output} {timeouts}{Color.Reset}')
+            for tool, stats in sorted(tool_stats.items(), key=lambda item: item[1].duration, reverse=True):
+                output = stats.output_size / 1024 / 1024
+                print(f'    {tool:32s} {stats.calls:>15} {stats.duration:17.1f} {output:17.1f} {stats.timeouts:>10}')
+            print()
+
     def _print_cprofile(self):
         N = 30
         print(f'{Color.Bold}cProfile report:{Color.Reset}')
@@ -173,35 +284,6 @@ class Lint:
                 print_warning(f'(none): E: there is no installed rpm "{name}".')
         return existing_packages
 
-    def _load_rpmlintrc(self):
-        """
-        Load rpmlintrc from argument or load up from folder
-        """
-        if self.options['rpmlintrc']:
-            # Right now, we allow loading of just a single file, but the 'opensuse'
-            # branch contains auto-loading mechanism that can eventually load
-            # multiple files.
-            for rcfile in self.options['rpmlintrc']:
-                self.config.load_rpmlintrc(rcfile)
-        else:
-            # load only from the same folder specname.rpmlintrc or specname-rpmlintrc
-            # do this only in a case where there is one folder parameter or one file
-            # to avoid multiple folders handling
-            rpmlintrc = []
-            if len(self.options['rpmfile']) != 1:
-                return
-            pkg = self.options['rpmfile'][0]
-            if pkg.is_file():
-                pkg = pkg.parent
-            rpmlintrc += sorted(pkg.glob('*.rpmlintrc'))
-            rpmlintrc += sorted(pkg.glob('*-rpmlintrc'))
-            if len(rpmlintrc) > 1:
-                # multiple rpmlintrcs are highly undesirable
-                print_warning('There are multiple items to be loaded for rpmlintrc, ignoring them: {}.'.format(' '.join(map(str, rpmlintrc))))
-            elif len(rpmlintrc) == 1:
-                self.options['rpmlintrc'] = rpmlintrc[0]
-                self.config.load_rpmlintrc(rpmlintrc[0])
-
     def _print_header(self):
         """
         Print out header information about the state of the
@@ -242,9 +324,105 @@ class Lint:
 
         # Sort the files so that the output is stable
         packages = sorted(packages)
-        for pkg in packages:
-            self.validate_file(pkg, pkg == packages[-1])
-            self.reset_checks()
+        jobs = self.options.get('jobs') or 1
+        if jobs > 1 and len(packages) > 1 and self.checks:
+            if self.options.get('prefetch'):
+                print_warning('--prefetch is ignored with --jobs, the worker processes extract the packages themselves.')
+            self._validate_files_parallel(packages, jobs)
+            return
+
+        prefetch = self.options.get('prefetch') or 0
+        if prefetch > 0 and not self.options.get('header_only'):
+            rpms = [pname for pname in packages if pname.suffix in ('.rpm', '.spm')]
+            budget = self.config.configuration.get('PrefetchBudget', 0) * 1024 * 1024
+            self.prefetcher = PkgPrefetcher(rpms, self.config.configuration['ExtractDir'],
+                                            prefetch, budget, verbose=self.config.info,
+                                            content_filter=self.content_filter,
+                                            content_budget=self._content_budget(),
+                                            magic_cache=self.magic_cache)
+        try:
+            for pkg in packages:
+                self.validate_file(pkg, pkg == packages[-1])
+                self.reset_checks()
+        finally:
+            if self.prefetcher:
+                self.prefetcher.close()
+                self.prefetcher = None
+
+    def _validate_files_parallel(self, packages, jobs):
+        """
+        Run all the checks for the sorted package list in worker processes.
+
+        Every worker loads its own instances of the checks and returns raw
+        diagnostics which are replayed to our Filter in the package order,
+        so the output is the same as for a serial run.
+        """
+        initargs = (self.config, self.options, list(self.checks), jobs)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                                    initargs=initargs) as executor:
+            scheduled = []
+            for pname in packages:
+                is_last = pname == packages[-1]
+                key, result = self._get_cached_result(pname, is_last)
+                if result is None:
+                    result = executor.submit(_validate_file_in_worker, pname, is_last)
+                scheduled.append((pname, key, result))
+
+            for pname, key, result in scheduled:
+                if isinstance(result, concurrent.futures.Future):
+                    try:
+                        worker_result = result.result()
+                    except Exception as e:
+                        for _, _, pending in scheduled:
+                            if isinstance(pending, concurrent.futures.Future):
+                                pending.cancel()
+                        self._fatal_error(pname, e)
+                    result = worker_result.result
+                    self._merge_worker_result(worker_result)
+                    if key:
+                        self.result_cache.put_result(key, result)
+                else:
+                    self.packages_checked += 1
+                self._replay_result(result, pname == packages[-1])
+
+    def _merge_worker_result(self, worker_result):
+        for k, v in worker_result.check_duration.items():
+            self.check_duration[k] += v
+        for k, v in worker_result.skipped_checks.items():
+            self.skipped_checks[k] += v
+        for k, v in worker_result.checked_files.items():
+            check = self.checks[k]
+            check.checked_files = (check.checked_files or 0) + v
+        self.packages_checked += worker_result.packages_checked
+        self.specfiles_checked += worker_result.specfiles_checked
+        if self.magic_cache and worker_result.magic_cache_stats:
+            hits, misses = worker_result.magic_cache_stats
+            self.magic_cache.hits += hits
+            self.magic_cache.misses += misses
+        get_runner().merge_stats(worker_result.tool_stats)
+
+    def _get_cached_result(self, pname, is_last):
+        """
+        Look up the result cache for the rpm file.
+
+        Return the cache key (None when the cache does not apply) and the
+        CheckResult if it is usable for the package.
+        """
+        if not self.result_cache or pname.suffix not in ('.rpm', '.spm'):
+            return None, None
+        key = self.result_cache.key(pname)
+        result = self.result_cache.get_result(key)
+        # the last package needs results of after_checks too
+        if result is not None and is_last and result.after_checks is None:
+            result = None
+        return key, result
+
+    def _replay_result(self, result, is_last):
+        self.output.error_details.update(result.error_details)
+        self.output.replay(result.diagnostics)
+        if is_last:
+            self.output.replay(result.after_checks)
+            self.validate_filters(result.source)
 
     def _expand_filelist(self, files):
         packages = []
@@ -257,43 +435,117 @@ class Lint:
 
     def validate_file(self, pname, is_last):
         try:
-            if pname.suffix == '.rpm' or pname.suffix == '.spm':
-                with Pkg(pname, self.config.configuration['ExtractDir'],
-                         verbose=self.config.info) as pkg:
+            self._validate_file(pname, is_last)
+        except Exception as e:
+            self._fatal_error(pname, e)
+
+    def _validate_file(self, pname, is_last):
+        """
+        Run all the checks for one rpm or spec file.
+
+        Return DiagnosticSource of the checked package.
+        """
+        key, result = self._get_cached_result(pname, is_last)
+        if result is not None:
+            if self.prefetcher:
+                self.prefetcher.skip(pname)
+            self.packages_checked += 1
+            self._replay_result(result, is_last)
+            return result.source
+        if key:
+            result = self._check_file_recorded(pname, is_last)
+            self.result_cache.put_result(key, result)
+            self._replay_result(result, is_last)
+            return result.source
+
+        pkg = None
+        with self._open_file(pname) as pkg:
+            if pkg is not None:
+                self.run_checks(pkg, is_last)
+        return diagnostic_source(pkg) if pkg is not None else None
+
+    def _check_file_recorded(self, pname, is_last):
+        """
+        Run all the checks for one rpm or spec file and return CheckResult
+        with the raw diagnostics instead of passing them to our Filter.
+        """
+        known_details = set(self.output.error_details)
+        with self.output.recording() as recorder:
+            with self._open_file(pname) as pkg:
+                self.run_checks(pkg, False)
+                diagnostics = recorder.take()
+                after_checks = None
+                if is_last:
+                    self.run_after_checks()
+                    after_checks = recorder.take()
+        error_details = {k: v for k, v in self.output.error_details.items() if k not in known_details}
+        return CheckResult(diagnostic_source(pkg), diagnostics, after_checks, error_details)
+
+    @contextlib.contextmanager
+    def _open_file(self, pname):
+        if pname.suffix == '.rpm' or pname.suffix == '.spm':
+            with self._open_pkg(pname) as pkg:
+                try:
+                    yield pkg
+                finally:
+                    # magic is detected while the checks run
                     for k, v in pkg.timers.items():
                         self.check_duration[k] += v
-                    self.run_checks(pkg, is_last)
-            elif pname.suffix == '.spec':
-                with FakePkg(pname) as pkg:
-                    self.run_checks(pkg, is_last)
-        except Exception as e:
-            print_warning(f'(none): E: fatal error while reading {pname}: {e}')
-            if self.config.info:
-                raise e
-            else:
-                sys.exit(3)
+        elif pname.suffix == '.spec':
+            with FakePkg(pname) as pkg:
+                yield pkg
+        else:
+            yield None
+
+    def _open_pkg(self, pname):
+        if self.prefetcher:
+            return self.prefetcher.open_pkg(pname)
+        return Pkg(pname, self.config.configuration['ExtractDir'],
+                   verbose=self.config.info, header_only=self.options.get('header_only', False),
+                   content_filter=self.content_filter, content_budget=self._content_budget(),
+                   magic_cache=self.magic_cache)
+
+    def _content_budget(self):
+        return self.config.configuration.get('ContentMemoryBudget', 0) * 1024 * 1024
+
+    def _fatal_error(self, pname, e):
+        print_warning(f'(none): E: fatal error while reading {pname}: {e}')
+        if self.config.info:
+            raise e
+        else:
+            sys.exit(3)
 
     def run_checks(self, pkg, is_last):
         spec_checks = isinstance(pkg, FakePkg)
+        index = None if spec_checks else PackageIndex(pkg)
         for checker in self.checks:
             start = time.monotonic()
+            if index is not None and not self.checks[checker].is_applicable(pkg, index):
+                self.skipped_checks[checker] += 1
+                self.check_duration[checker] += time.monotonic() - start
+                continue
             fn = self.checks[checker].check_spec if spec_checks else self.checks[checker].check
             fn(pkg)
             self.check_duration[checker] += time.monotonic() - start
 
         # run post check function and validate used filters in rpmlintrc
         if is_last:
-            for checker in self.checks.values():
-                checker.after_checks()
-
-            if not self.options['ignore_unused_rpmlintrc']:
-                self.output.validate_filters(pkg)
+            self.run_after_checks()
+            self.validate_filters(pkg)
 
         if spec_checks:
             self.specfiles_checked += 1
         else:
             self.packages_checked += 1
 
+    def run_after_checks(self):
+        for checker in self.checks.values():
+            checker.after_checks()
+
+    def validate_filters(self, pkg):
+        if not self.options['ignore_unused_rpmlintrc']:
+            self.output.validate_filters(pkg)
+
     def print_config(self):
         """
         Just output the current configuration
@@ -330,8 +582,13 @@ class Lint:
         for check in self.config.configuration['Checks']:
             if check in self.checks:
                 continue
-            if not selected_checks or check in selected_checks:
-                self.checks[check] = self.load_check(check)
+            if selected_checks and check not in selected_checks:
+                continue
+            klass = self.load_check_class(check)
+            if self.options.get('header_only') and klass.needs_content:
+                # the files are not going to be extracted
+                continue
+            self.checks[check] = klass(self.config, self.output)
 
     def reset_checks(self):
         """
@@ -342,7 +599,91 @@ class Lint:
 
     def load_check(self, name):
         """Load a (check) module by its name, unless it is already loaded."""
-        module = importlib.import_module(f'.{name}', package='rpmlint.checks')
-        klass = getattr(module, name)
+        klass = self.load_check_class(name)
         obj = klass(self.config, self.output)
         return obj
+
+    @staticmethod
+    def load_check_class(name):
+        module = importlib.import_module(f'.{name}', package='rpmlint.checks')
+        return getattr(module, name)
+
+
+def apply_options(config, options):
+    """
+    Apply command line options and rpmlintrc to the loaded configuration.
+    """
+    if options['rpmlintrc']:
+        options['rpmlintrc'] = [options['rpmlintrc']]
+    _load_rpmlintrc(config, options)
+    if options['verbose']:
+        config.info = options['verbose']
+    if options['strict']:
+        config.strict = options['strict']
+    if options['permissive']:
+        config.permissive = options['permissive']
+    if not config.configuration['ExtractDir']:
+        config.configuration['ExtractDir'] = gettempdir()
+
+
+def _load_rpmlintrc(config, options):
+    """
+    Load rpmlintrc from argument or load up from folder
+    """
+    if options['rpmlintrc']:
+        # Right now, we allow loading of just a single file, but the 'opensuse'
+        # branch contains auto-loading mechanism that can eventually load
+        # multiple files.
+        for rcfile in options['rpmlintrc']:
+            config.load_rpmlintrc(rcfile)
+    else:
+        # load only from the same folder specname.rpmlintrc or specname-rpmlintrc
+        # do this only in a case where there is one folder parameter or one file
+        # to avoid multiple folders handling
+        rpmlintrc = []
+        if len(options['rpmfile']) != 1:
+            return
+        pkg = options['rpmfile'][0]
+        if pkg.is_file():
+            pkg = pkg.parent
+        rpmlintrc += sorted(pkg.glob('*.rpmlintrc'))
+        rpmlintrc += sorted(pkg.glob('*-rpmlintrc'))
+        if len(rpmlintrc) > 1:
+            # multiple rpmlintrcs are highly undesirable
+            print_warning('There are multiple items to be loaded for rpmlintrc, ignoring them: {}.'.format(' '.join(map(str, rpmlintrc))))
+        elif len(rpmlintrc) == 1:
+            options['rpmlintrc'] = rpmlintrc[0]
+            config.load_rpmlintrc(rpmlintrc[0])
+
+
+def _init_worker(config, options, checks, workers):
+    """
+    Initialize a worker process with its own Lint instance.
+    """
+    global _worker_lint
+    options = dict(options, checks=','.join(checks), profile=False, jobs=1)
+    # the tools run by the parent before fork are accounted there
+    get_runner().take_stats()
+    _worker_lint = Lint(options, config)
+    _worker_lint.configure_tools(workers)
+
+
+def _validate_file_in_worker(pname, is_last):
+    lint = _worker_lint
+    lint.check_duration = defaultdict(int)
+    lint.skipped_checks = defaultdict(int)
+    lint.packages_checked = 0
+    lint.specfiles_checked = 0
+    magic_cache_stats = None
+    if lint.magic_cache:
+        lint.magic_cache.hits = lint.magic_cache.misses = 0
+    try:
+        result = lint._check_file_recorded(pname, is_last)
+        checked_files = {name: check.checked_files for name, check in lint.checks.items() if check.checked_files}
+    finally:
+        lint.reset_checks()
+    if lint.magic_cache:
+        magic_cache_stats = (lint.magic_cache.hits, lint.magic_cache.misses)
+    return WorkerResult(result, dict(lint.check_duration), dict(lint.skipped_checks), checked_files,
+                        lint.packages_checked, lint.specfiles_checked, magic_cache_stats,
+                        get_runner().take_stats())
@@ -1,6 +1,6 @@
-import subprocess
-
+from rpmlint.elffile import ElfError, read_elf_objects
 from rpmlint.helpers import ENGLISH_ENVIRONMENT
+from rpmlint.toolrunner import run_tool
 
 
 class ObjdumpParser:
@@ -20,19 +20,41 @@ class ObjdumpParser:
        <2c>   DW_AT_language    : 32769    (MIPS assembler)
      Compilation Unit @ offset 0x2e:
       Length:        0x3c (32-bit)
+
+    The 'native' backend reads just the producer of the compile units
+    with rpmlint.elffile instead, objdump is still run for files it does
+    not understand (e.g. object files whose debug sections need
+    relocations or producers stored in a dwz supplementary file). The
+    'objdump' backend always runs it.
     """
 
+    BACKENDS = ('native', 'objdump')
     dw_at_prefix = 'DW_AT_'
 
-    def __init__(self, pkgfile_path, path):
+    def __init__(self, pkgfile_path, path, backend='native'):
+        if backend not in self.BACKENDS:
+            raise ValueError(f'unknown debug info reader backend {backend}')
         self.pkgfile_path = pkgfile_path
         self.compile_units = []
         self.parsing_failed_reason = None
+        self.backend = backend
+        if backend == 'native':
+            try:
+                self.read_compile_units()
+                return
+            except ElfError:
+                self.backend = 'objdump'
         self.parse_dwarf_compilation_units()
 
+    def read_compile_units(self):
+        compile_units = []
+        for elf_object in read_elf_objects(self.pkgfile_path, debug_info=True):
+            compile_units += elf_object.compile_units
+        self.compile_units = compile_units
+
     def parse_dwarf_compilation_units(self):
-        r = subprocess.run(['objdump', '--dwarf=info', '--dwarf-depth=1', self.pkgfile_path], encoding='utf8',
-                           capture_output=True, env=ENGLISH_ENVIRONMENT)
+        r = run_tool(['objdump', '--dwarf=info', '--dwarf-depth=1', self.pkgfile_path], encoding='utf8',
+                     capture_output=True, env=ENGLISH_ENVIRONMENT)
         # here ldd should always return 0
         if r.returncode != 0:
             self.parsing_failed_reason = r.stderr
@@ -51,3 +73,16 @@ class ObjdumpParser:
                     cu_data[parts[0]] = parts[-1]
                     i += 1
                 self.compile_units.append(cu_data)
+
+    def to_dict(self):
+        return {'compile_units': self.compile_units, 'backend': self.backend}
+
+    @classmethod
+    def from_dict(cls, pkgfile_path, data):
+        """Return the parser with results of to_dict(), the file is not read."""
+        parser = cls.__new__(cls)
+        parser.pkgfile_path = pkgfile_path
+        parser.compile_units = data['compile_units']
+        parser.backend = data['backend']
+        parser.parsing_failed_reason = None
+        return parser
@@ -0,0 +1,311 @@
+import os
+import stat
+import threading
+
+import rpm
+from rpmlint.helpers import byte_to_string
+
+
+# "new ASCII" cpio format used for rpm payloads
+CPIO_NEWC_MAGIC = b'070701'
+CPIO_HEADER_SIZE = 110
+CPIO_TRAILER = 'TRAILER!!!'
+CHUNK_SIZE = 1024 * 1024
+
+
+class PayloadError(Exception):
+    """The payload can not be extracted in-process."""
+
+
+class PayloadContent:
+    """
+    Content of regular files of the payload kept in memory.
+
+    extract_cpio() hands over the content of the files as long as the total
+    size stays within the budget (in bytes) and creates the files empty on
+    the disk. The package then reads them from memory, materialize()
+    writes a file to the disk for tools that need its path.
+    """
+
+    def __init__(self, dirname, budget):
+        self.dirname = dirname
+        self.budget = budget
+        self.size = 0
+        # number of files written to the disk on demand
+        self.materialized = 0
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, stream, entry):
+        """
+        Read content of the entry from the stream and keep it, return False
+        (without reading anything) if it does not fit into the budget.
+        """
+        size = entry['filesize']
+        if self.size + size > self.budget:
+            return False
+        data = _read_exact(stream, size)
+        if len(data) != size:
+            raise PayloadError(f'truncated payload in {entry["name"]}')
+        self._files[name] = (data, entry['mtime'])
+        self.size += size
+        return True
+
+    def get(self, name):
+        """Return content of the file or None if it is not kept in memory."""
+        with self._lock:
+            item = self._files.get(_entry_name(name))
+        return None if item is None else item[0]
+
+    def materialize(self, name):
+        """Write the file to the disk if it is kept in memory."""
+        name = _entry_name(name)
+        with self._lock:
+            if name not in self._files:
+                return
+            data, mtime = self._files[name]
+            path = os.path.join(self.dirname, name)
+            mode = os.lstat(path).st_mode
+            # the file is ours only if nothing swapped it for a symlink
+            if not stat.S_ISREG(mode) or not _is_inside(self.dirname, path):
+                return
+            # the file may be read-only
+            os.chmod(path, mode | stat.S_IWUSR)
+            with _open_nofollow(path, os.O_TRUNC) as f:
+                f.write(data)
+            os.chmod(path, stat.S_IMODE(mode))
+            os.utime(path, (mtime, mtime))
+            del self._files[name]
+            self.size -= len(data)
+            self.materialized += 1
+
+
+def extract_payload(filename, dirname, wanted=None, memory=None):
+    """
+    Extract payload of the rpm file to dirname without spawning any
+    process.
+
+    The payload is decompressed by the rpm bindings and the cpio archive
+    is parsed here. PayloadError is raised for payloads we do not
+    understand (e.g. the stripped cpio format of packages with files
+    bigger than 4 GiB). See extract_cpio for the meaning of wanted and
+    memory.
+    """
+    ts = rpm.TransactionSet()
+    ts.setVSFlags(rpm._RPMVSF_NOSIGNATURES)
+    fd = rpm.fd.open(str(filename))
+    try:
+        # reading the header moves us to the start of the payload
+        header = ts.hdrFromFdno(fd)
+        if byte_to_string(header[rpm.RPMTAG_PAYLOADFORMAT]) not in ('cpio', None, ''):
+            raise PayloadError(f'unsupported payload format {header[rpm.RPMTAG_PAYLOADFORMAT]}')
+        compressor = byte_to_string(header[rpm.RPMTAG_PAYLOADCOMPRESSOR]) or 'gzip'
+        payload = rpm.fd.open(fd, flags=compressor)
+        try:
+            extract_cpio(payload, dirname, wanted, memory)
+        finally:
+            payload.close()
+    finally:
+        fd.close()
+
+
+def extract_cpio(stream, dirname, wanted=None, memory=None):
+    """
+    Extract "new ASCII" cpio archive read from the stream to dirname.
+
+    Regular files, directories, symlinks and hardlinks are created,
+    device files, fifos and sockets are skipped. Permissions are set so
+    that everything is readable (like 'chmod -R +rX'), directory
+    permissions are applied once everything is extracted.
+
+    Symlinks are created after all the other entries (like tar does) and
+    nothing is created, removed or changed where the parent directory
+    resolves outside dirname, so a hostile payload can not write through
+    its own symlinks (e.g. ./link -> /tmp followed by ./link/file).
+
+    If wanted (a set of paths relative to dirname) is given, content is
+    written only for the regular files listed there, the other ones are
+    created empty so that the extracted tree keeps its shape. Content of
+    the files can be kept in a PayloadContent (memory) instead of being
+    written. Hardlinked files are always written.
+    """
+    directories = []
+    symlinks = []
+    # hardlinked files waiting for the entry carrying the content
+    pending_links = {}
+    # hardlinked files already written
+    written_links = {}
+    while True:
+        entry = _read_entry(stream)
+        if entry is None or entry['name'] == CPIO_TRAILER:
+            break
+        target = _target_path(dirname, entry['name'])
+        mode = entry['mode']
+        if target is not None and not _is_inside(dirname, target):
+            target = None
+        if target is None or stat.S_ISDIR(mode):
+            _skip(stream, entry['filesize'])
+            if target is not None:
+                os.makedirs(target, mode=0o755, exist_ok=True)
+                directories.append((target, _readable(mode)))
+            continue
+
+        if stat.S_ISLNK(mode):
+            linkto = _read_exact(stream, entry['filesize'])
+            _skip_padding(stream, entry['filesize'])
+            symlinks.append((linkto.decode('utf-8', 'surrogateescape'), target))
+            continue
+        os.makedirs(os.path.dirname(target), mode=0o755, exist_ok=True)
+        if os.path.lexists(target):
+            os.unlink(target)
+        if not stat.S_ISREG(mode):
+            _skip(stream, entry['filesize'])
+            continue
+
+        link_key = (entry['ino'], entry['devmajor'], entry['devminor']) if entry['nlink'] > 1 else None
+        if link_key is not None and not entry['filesize']:
+            # content of the hardlinked files comes with the last link
+            if link_key in written_links:
+                os.link(written_links[link_key], target, follow_symlinks=False)
+            else:
+                pending_links.setdefault(link_key, []).append(target)
+            continue
+
+        name = _entry_name(entry['name'])
+        if link_key is None and wanted is not None and name not in wanted:
+            # nobody reads the content
+            _create_file(target, entry)
+            _skip(stream, entry['filesize'])
+        elif link_key is None and memory is not None and memory.add(name, stream, entry):
+            _create_file(target, entry)
+            _skip_padding(stream, entry['filesize'])
+        else:
+            _create_file(target, entry, stream)
+            _skip_padding(stream, entry['filesize'])
+        if link_key is not None:
+            written_links[link_key] = target
+            for link in pending_links.pop(link_key, []):
+                os.link(target, link, follow_symlinks=False)
+
+    # hardlinks of empty files never get any content
+    for links in pending_links.values():
+        with _open_nofollow(links[0], os.O_CREAT | os.O_TRUNC):
+            pass
+        for link in links[1:]:
+            os.link(links[0], link, follow_symlinks=False)
+
+    # the parents of every symlink are checked again as the previous ones
+    # may point anywhere
+    for linkto, target in symlinks:
+        if not _is_inside(dirname, target):
+            continue
+        os.makedirs(os.path.dirname(target), mode=0o755, exist_ok=True)
+        if os.path.lexists(target):
+            if stat.S_ISDIR(os.lstat(target).st_mode):
+                continue
+            os.unlink(target)
+        os.symlink(linkto, target)
+
+    # deepest first so that we can still write to the parents
+    for target, mode in reversed(directories):
+        if _is_inside(dirname, target) and stat.S_ISDIR(os.lstat(target).st_mode):
+            os.chmod(target, mode)
+
+
+def _read_entry(stream):
+    header = _read_exact(stream, CPIO_HEADER_SIZE)
+    if not header:
+        return None
+    if len(header) != CPIO_HEADER_SIZE or header[:6] != CPIO_NEWC_MAGIC:
+        raise PayloadError(f'unsupported cpio header {header[:6]!r}')
+    try:
+        fields = [int(header[i:i + 8], 16) for i in range(6, CPIO_HEADER_SIZE, 8)]
+    except ValueError:
+        fields = None
+    # int() takes a sign too
+    if fields is None or min(fields) < 0:
+        raise PayloadError('malformed cpio header')
+    entry = dict(zip(('ino', 'mode', 'uid', 'gid', 'nlink', 'mtime', 'filesize',
+                      'devmajor', 'devminor', 'rdevmajor', 'rdevminor', 'namesize', 'check'),
+                     fields))
+    name = _read_exact(stream, entry['namesize'])
+    _skip_padding(stream, CPIO_HEADER_SIZE + entry['namesize'])
+    entry['name'] = name.rstrip(b'\0').decode('utf-8', 'surrogateescape')
+    return entry
+
+
+def _entry_name(name):
+    """Return normalized relative path of the entry, None for entries escaping the root."""
+    if name.startswith('./'):
+        name = name[2:]
+    name = os.path.normpath(name.lstrip('/'))
+    if name in ('', '.') or name.startswith('..'):
+        return None
+    return name
+
+
+def _target_path(dirname, name):
+    """Return path of the entry in dirname, None for entries escaping it."""
+    name = _entry_name(name)
+    return None if name is None else os.path.join(dirname, name)
+
+
+def _is_inside(dirname, target):
+    """Return True if the parent directory of target resolves inside dirname."""
+    root = os.path.realpath(dirname)
+    parent = os.path.realpath(os.path.dirname(target))
+    return parent == root or parent.startswith(root + os.sep)
+
+
+def _open_nofollow(path, flags):
+    """Open the file for writing, fail if it is a symlink."""
+    return os.fdopen(os.open(path, os.O_WRONLY | os.O_NOFOLLOW | flags, 0o600), 'wb')
+
+
+def _readable(mode):
+    """Return permissions after 'chmod +rX'."""
+    perm = stat.S_IMODE(mode) | 0o444
+    if stat.S_ISDIR(mode) or perm & 0o111:
+        perm |= 0o111
+    return perm
+
+
+def _create_file(target, entry, stream=None):
+    """Create the file with content read from the stream, empty if there is none."""
+    with _open_nofollow(target, os.O_CREAT | os.O_EXCL) as f:
+        remaining = entry['filesize'] if stream is not None else 0
+        while remaining:
+            chunk = stream.read(min(remaining, CHUNK_SIZE))
+            if not chunk:
+                raise PayloadError(f'truncated payload in {entry["name"]}')
+            f.write(chunk)
+            remaining -= len(chunk)
+        os.fchmod(f.fileno(), _readable(entry['mode']))
+    os.utime(target, (entry['mtime'], entry['mtime']))
+
+
+def _read_exact(stream, size):
+    data = b''
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def _skip(stream, size):
+    remaining = size
+    while remaining:
+        chunk = stream.read(min(remaining, CHUNK_SIZE))
+        if not chunk:
+            raise PayloadError('truncated payload')
+        remaining -= len(chunk)
+    _skip_padding(stream, size)
+
+
+def _skip_padding(stream, size):
+    # entries are aligned to 4 bytes
+    padding = -size % 4
+    if padding:
+        _read_exact(stream, padding)
@@ -1,6 +1,12 @@
+from array import array
+import bisect
 import bz2
 from collections import namedtuple
+from collections.abc import Mapping, Set
+import concurrent.futures
 import contextlib
+from fnmatch import translate
+import functools
 import gzip
 import hashlib
 import io
@@ -8,14 +14,17 @@ import lzma
 import mmap
 import os
 from pathlib import Path, PurePath
+import posixpath
 import re
 from shlex import quote
 import shutil
 import stat
 import subprocess
 import tempfile
+import threading
 import time
 from urllib.parse import urljoin
+import weakref
 
 try:
     import magic
@@ -24,8 +33,10 @@ except ImportError:
     has_magic = False
 import rpm
 from rpmlint.helpers import (byte_to_string, ENGLISH_ENVIRONMENT,
-                             print_warning, pushd)
-from rpmlint.pkgfile import PkgFile
+                             print_warning)
+from rpmlint.payload import extract_payload, PayloadContent, PayloadError
+from rpmlint.pkgfile import PkgFile, PkgFileView
+from rpmlint.toolrunner import run_tool
 import zstandard as zstd
 
 
@@ -56,6 +67,17 @@ SCRIPT_TAGS = [
      '%transfiletrigger'),
 ]
 
+# tags whose values Pkg decodes to strings. Note that text tags we want to
+# try decoding for real in TagsCheck such as summary, description and
+# changelog are not here.
+STRING_TAGS = frozenset((rpm.RPMTAG_NAME, rpm.RPMTAG_VERSION, rpm.RPMTAG_RELEASE,
+                         rpm.RPMTAG_ARCH, rpm.RPMTAG_GROUP, rpm.RPMTAG_BUILDHOST,
+                         rpm.RPMTAG_LICENSE, rpm.RPMTAG_HEADERI18NTABLE,
+                         rpm.RPMTAG_PACKAGER, rpm.RPMTAG_SOURCERPM,
+                         rpm.RPMTAG_DISTRIBUTION, rpm.RPMTAG_VENDOR) +
+                        tuple(x[0] for x in SCRIPT_TAGS) +
+                        tuple(x[1] for x in SCRIPT_TAGS))
+
 RPM_SCRIPTLETS = ('pre', 'post', 'preun', 'postun', 'pretrans', 'posttrans',
                   'trigger', 'triggerin', 'triggerprein', 'triggerun',
                   'triggerpostun', 'verifyscript', 'filetriggerin',
@@ -99,17 +121,23 @@ def compression_algorithm(fname):
         return None
 
 
-def is_utf8(fname):
+def is_utf8(fname, fileobj=None):
+    """
+    Return True if the (possibly compressed) file is UTF-8. The content is
+    read from fileobj (opened in binary mode) if it is given.
+    """
     compression = compression_algorithm(fname)
-    if compression is None:
-        with open(fname, 'rb') as f:
-            return is_utf8_bytestr(f.read())
+    if fileobj is None:
+        fileobj = open(fname, 'rb')
+    with fileobj:
+        if compression is None:
+            return is_utf8_bytestr(fileobj.read())
 
-    with compression.open(fname, 'rb') as f:
-        try:
-            return is_utf8_bytestr(f.read())
-        except OSError:
-            return True
+        with compression.open(fileobj, 'rb') as f:
+            try:
+                return is_utf8_bytestr(f.read())
+            except OSError:
+                return True
 
 
 def is_utf8_bytestr(s):
@@ -357,15 +385,36 @@ def parse_deps(line):
     return prcos
 
 
-def _get_magic_libmagic(path):
-    return magic.detect_from_filename(path).name
+# libmagic handles must not be shared by threads, every thread gets its own
+_magic_handles = threading.local()
+
+
+def _magic_handle():
+    handle = getattr(_magic_handles, 'handle', None)
+    if handle is None:
+        if hasattr(magic, 'from_file'):
+            handle = magic.Magic()
+        else:
+            handle = magic.open(magic.MAGIC_NONE)
+            handle.load()
+        _magic_handles.handle = handle
+    return handle
+
+
+def _get_magic_libmagic(path, data=None):
+    if data is not None:
+        return _magic_handle().buffer(data)
+    return _magic_handle().file(path)
 
 
-def _get_magic_python_magic(path):
-    return magic.from_file(path)
+def _get_magic_python_magic(path, data=None):
+    if data is not None:
+        return _magic_handle().from_buffer(data)
+    return _magic_handle().from_file(path)
 
 
-def get_magic(path):
+def get_magic(path, data=None):
+    """Return magic of the file, of its content in data if it is given."""
     # python-magic & libmagic compatibility code
     # https://github.com/ahupp/python-magic/blob/master/COMPAT.md
     detect_magic = _get_magic_python_magic
@@ -374,19 +423,84 @@ def get_magic(path):
         detect_magic = _get_magic_libmagic
 
     try:
-        return detect_magic(path)
+        return detect_magic(path, data)
     except (ValueError, FileNotFoundError):
         return ''
 
 
+_magic_executor = None
+_magic_executor_pid = None
+_magic_executor_lock = threading.Lock()
+
+
+def _magic_pool():
+    """Return pool of threads detecting magic, see Pkg.detect_magic."""
+    global _magic_executor, _magic_executor_pid
+    with _magic_executor_lock:
+        # threads of the pool do not survive fork of worker processes
+        if _magic_executor is None or _magic_executor_pid != os.getpid():
+            _magic_executor = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                                                    thread_name_prefix='rpmlint-magic')
+            _magic_executor_pid = os.getpid()
+        return _magic_executor
+
+
+def magic_version():
+    """Return version of libmagic, a part of the keys of MagicCache."""
+    try:
+        return str(magic.version())
+    except (AttributeError, NameError, NotImplementedError):
+        # python bindings which do not expose it
+        return getattr(magic, '__version__', 'unknown') if has_magic else 'none'
+
+
+def read_header(filename):
+    """Read header of the rpm file, signatures are not checked."""
+    ts = rpm.TransactionSet()
+    # Don't check signatures here...
+    ts.setVSFlags(rpm._RPMVSF_NOSIGNATURES)
+    fd = os.open(filename, os.O_RDONLY)
+    try:
+        return ts.hdrFromFdno(fd)
+    finally:
+        os.close(fd)
+
+
 # classes representing package
 
 class AbstractPkg:
+    # only the header is available, the files are not extracted
+    header_only = False
+    # PayloadContent keeping content of the files in memory
+    content = None
+    # MagicCache consulted before running libmagic
+    magic_cache = None
+    # (files, FileNameIndex) built by file_index()
+    _file_index = None
+
     def cleanup(self):
         pass
 
-    def _calc_magic(self, pkgfile):
-        magic = pkgfile.magic
+    def _calc_magic(self, pkgfile, magic=None):
+        """
+        Return magic of the file, magic from the header is used if there
+        is any, libmagic is run on the content otherwise.
+        """
+        magic = self._known_magic(pkgfile, magic)
+        if magic is None:
+            start = time.monotonic()
+            magic, cpu_time = self._detect_magic(pkgfile)
+            self.timers['libmagic'] += time.monotonic() - start
+            self.timers['libmagic-cpu'] += cpu_time
+        return magic
+
+    def _known_magic(self, pkgfile, magic=None):
+        """
+        Return magic of the file known without looking at its content, None
+        if libmagic has to detect it.
+        """
+        if magic is None:
+            magic = pkgfile.magic
         if not magic:
             if stat.S_ISDIR(pkgfile.mode):
                 magic = 'directory'
@@ -394,19 +508,40 @@ class AbstractPkg:
                 magic = "symbolic link to `%s'" % pkgfile.linkto
             elif not pkgfile.size:
                 magic = 'empty'
-        if not magic and not pkgfile.is_ghost and has_magic:
-            start = time.monotonic()
-            magic = get_magic(pkgfile.path)
-            self.timers['libmagic'] += time.monotonic() - start
+        if not magic and not pkgfile.is_ghost and has_magic and not self.header_only:
+            return None
+        return self._usable_magic(magic)
+
+    def _detect_magic(self, pkgfile):
+        """Detect magic of the file content, return it and the CPU time spent."""
+        start = time.thread_time()
+        magic = self.magic_cache.get_magic(pkgfile.md5) if self.magic_cache and pkgfile.md5 else None
+        if magic is None:
+            data = self.content.get(pkgfile.name) if self.content else None
+            # the path would write the content kept in memory to the disk
+            magic = get_magic(pkgfile.path if data is None else None, data)
+            if magic and self.magic_cache and pkgfile.md5:
+                self.magic_cache.put_magic(pkgfile.md5, magic)
+        return self._usable_magic(magic), time.thread_time() - start
+
+    @staticmethod
+    def _usable_magic(magic):
         if magic is None or Pkg._magic_from_compressed_re.search(magic):
             # Discard magic from inside compressed files ('file -z')
             # until PkgFile gets decompression support.  We may get
             # such magic strings from package headers already now;
             # for example Fedora's rpmbuild as of F-11's 4.7.1 is
             # patched so it generates them.
-            magic = ''
+            return ''
         return magic
 
+    def detect_magic(self, names=None):
+        """
+        Make sure magic of the files (all by default) is known, see
+        Pkg.detect_magic.
+        """
+        return
+
     # internal function to gather dependency info used by the above ones
     def _gather_aux(self, header, xs, nametag, flagstag, versiontag,
                     prereq=None):
@@ -497,42 +632,74 @@ class AbstractPkg:
     def read_with_mmap(self, filename):
         """Mmap a file, return it's content decoded."""
         try:
+            data = self.content.get(filename) if self.content else None
+            if data is not None:
+                return data.decode()
             with open(Path(self.dir_name() or '/', filename.lstrip('/'))) as in_file:
                 return mmap.mmap(in_file.fileno(), 0, mmap.MAP_SHARED, mmap.PROT_READ).read().decode()
         except Exception:
             return ''
 
+    def open_file(self, filename, mode='rb', encoding=None):
+        """
+        Open a file of the package for reading like open() does, the
+        content is not written to the disk if it is kept in memory.
+        """
+        data = self.content.get(filename) if self.content else None
+        if data is None:
+            return open(Path(self.dir_name() or '/', filename.lstrip('/')), mode, encoding=encoding)
+        if 'b' in mode:
+            return io.BytesIO(data)
+        return io.TextIOWrapper(io.BytesIO(data), encoding=encoding)
+
+    def file_index(self):
+        """
+        Return FileNameIndex of the files of the package.
+
+        It is built on the first use and rebuilt when files are added to
+        the package afterwards.
+        """
+        key = (id(self.files), len(self.files))
+        if self._file_index is None or self._file_index[0] != key:
+            self._file_index = (key, FileNameIndex(self.files))
+        return self._file_index[1]
+
+    def is_readable(self, filename):
+        """Return True if the file of the package can be read."""
+        if self.content and self.content.get(filename) is not None:
+            return True
+        return os.access(Path(self.dir_name() or '/', filename.lstrip('/')), os.R_OK)
+
 
 class Pkg(AbstractPkg):
     _magic_from_compressed_re = re.compile(r'\([^)]+\s+compressed\s+data\b')
 
-    def __init__(self, filename, dirname, header=None, is_source=False, extracted=False, verbose=False):
+    def __init__(self, filename, dirname, header=None, is_source=False, extracted=False, verbose=False,
+                 header_only=False, content_filter=None, content_budget=0, magic_cache=None):
         self.filename = filename
         self.extracted = extracted
-
-        # record decompression and extraction time
-        start = time.monotonic()
-        self.dirname = self._extract_rpm(dirname, verbose)
-        self.timers = {'ExtractRpm': time.monotonic() - start, 'libmagic': 0}
-        self.current_linenum = None
-
-        self._req_names = -1
+        self.header_only = header_only
+        self.magic_cache = magic_cache
+        # decoded values of the header tags, see __getitem__ and langtag
+        self._tags = {}
+        self._langtags = {}
 
         if header:
             self.header = header
             self.is_source = is_source
         else:
             # Create a package object from the file name
-            ts = rpm.TransactionSet()
-            # Don't check signatures here...
-            ts.setVSFlags(rpm._RPMVSF_NOSIGNATURES)
-            fd = os.open(filename, os.O_RDONLY)
-            try:
-                self.header = ts.hdrFromFdno(fd)
-            finally:
-                os.close(fd)
+            self.header = read_header(filename)
             self.is_source = not self.header[rpm.RPMTAG_SOURCERPM]
 
+        # record decompression and extraction time
+        start = time.monotonic()
+        self.dirname = self._extract_rpm(dirname, verbose, content_filter, content_budget)
+        self.timers = {'ExtractRpm': time.monotonic() - start, 'libmagic': 0, 'libmagic-cpu': 0}
+        self.current_linenum = None
+
+        self._req_names = -1
+
         self.name = self[rpm.RPMTAG_NAME]
 
         (self.requires, self.prereq, self.provides, self.conflicts,
@@ -542,11 +709,11 @@ class Pkg(AbstractPkg):
         self.req_names = [x[0] for x in self.requires + self.prereq]
 
         self.files = self._gather_files_info()
-        self.config_files = [x.name for x in self.files.values() if x.is_config]
-        self.doc_files = [x.name for x in self.files.values() if x.is_doc]
-        self.ghost_files = [x.name for x in self.files.values() if x.is_ghost]
-        self.noreplace_files = [x.name for x in self.files.values() if x.is_noreplace]
-        self.missingok_files = [x.name for x in self.files.values() if x.is_missingok]
+        self.config_files = self.files.names_with_flag(rpm.RPMFILE_CONFIG)
+        self.doc_files = self.files.names_with_flag(rpm.RPMFILE_DOC)
+        self.ghost_files = self.files.names_with_flag(rpm.RPMFILE_GHOST)
+        self.noreplace_files = self.files.names_with_flag(rpm.RPMFILE_NOREPLACE)
+        self.missingok_files = self.files.names_with_flag(rpm.RPMFILE_MISSINGOK)
 
         if self.is_no_source:
             self.arch = 'nosrc'
@@ -563,32 +730,32 @@ class Pkg(AbstractPkg):
 
     # access the tags like an array
     def __getitem__(self, key):
+        # the header is read only once for every tag
+        try:
+            val = self._tags[key]
+        except KeyError:
+            val = self._tags[key] = self._read_tag(key)
+        # the callers must not modify the cached value
+        return list(val) if isinstance(val, list) else val
+
+    def _read_tag(self, key):
         try:
             val = self.header[key]
         except KeyError:
             val = []
         if val == []:
             return None
-        else:
-            # Note that text tags we want to try decoding for real in TagsCheck
-            # such as summary, description and changelog are not here.
-            if key in (rpm.RPMTAG_NAME, rpm.RPMTAG_VERSION, rpm.RPMTAG_RELEASE,
-                       rpm.RPMTAG_ARCH, rpm.RPMTAG_GROUP, rpm.RPMTAG_BUILDHOST,
-                       rpm.RPMTAG_LICENSE, rpm.RPMTAG_HEADERI18NTABLE,
-                       rpm.RPMTAG_PACKAGER, rpm.RPMTAG_SOURCERPM,
-                       rpm.RPMTAG_DISTRIBUTION, rpm.RPMTAG_VENDOR) \
-            or key in (x[0] for x in SCRIPT_TAGS) \
-            or key in (x[1] for x in SCRIPT_TAGS):
-                val = byte_to_string(val)
-                if key == rpm.RPMTAG_GROUP and val == 'Unspecified':
-                    val = None
-            return val
+        if key in STRING_TAGS:
+            val = byte_to_string(val)
+            if key == rpm.RPMTAG_GROUP and val == 'Unspecified':
+                val = None
+        return val
 
     # return the name of the directory where the package is extracted
     def dir_name(self):
         return self.dirname
 
-    def _extract_rpm(self, dirname, verbose):
+    def _extract_rpm(self, dirname, verbose, content_filter=None, content_budget=0):
         if not Path(dirname).is_dir():
             print_warning('Unable to access dir %s' % dirname)
         elif dirname == '/':
@@ -599,26 +766,53 @@ class Pkg(AbstractPkg):
                 prefix='rpmlint.%s.' % Path(self.filename).name, dir=dirname
             )
             dirname = self.__tmpdir.name
-
-            # BusyBox' cpio does not support '-D' argument and the only safe
-            # usage is doing chdir before invocation.
-            filename = Path(self.filename).resolve()
-            with pushd(dirname):
-                stderr = None if verbose else subprocess.DEVNULL
-                if shutil.which('rpm2archive'):
-                    with open(filename, 'rb') as rpm_data:
-                        subprocess.check_output('rpm2archive - | tar -xz && chmod -R +rX .', shell=True, env=ENGLISH_ENVIRONMENT,
-                                                stderr=stderr, stdin=rpm_data)
-                else:
-                    command_str = f'rpm2cpio {quote(str(filename))} | cpio -id ; chmod -R +rX .'
-                    subprocess.check_output(command_str, shell=True, env=ENGLISH_ENVIRONMENT, stderr=stderr)
             self.extracted = True
+            if self.header_only:
+                # the empty directory makes sure file paths do not point
+                # to anything
+                return dirname
+
+            wanted = None
+            if content_filter is not None and not self.is_source:
+                wanted = content_filter.select(self.header)
+            if content_budget > 0 and not self.is_source:
+                self.content = PayloadContent(dirname, content_budget)
+            try:
+                extract_payload(self.filename, dirname, wanted, self.content)
+            except (PayloadError, rpm.error, OSError) as e:
+                if verbose:
+                    print_warning(f'(none): W: falling back to rpm2archive/rpm2cpio for {self.filename}: {e}')
+                self.content = None
+                self._extract_rpm_external(dirname, verbose)
         return dirname
 
+    def _extract_rpm_external(self, dirname, verbose):
+        """Extract the payload to the (cleaned) dirname with shell tools."""
+        for entry in os.scandir(dirname):
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+
+        # BusyBox' cpio does not support '-D' argument and the only safe
+        # usage is doing chdir before invocation. Let subprocess do the
+        # chdir in the child so that packages can be extracted in
+        # a background thread (see PkgPrefetcher).
+        filename = Path(self.filename).resolve()
+        stderr = None if verbose else subprocess.DEVNULL
+        if shutil.which('rpm2archive'):
+            with open(filename, 'rb') as rpm_data:
+                run_tool('rpm2archive - | tar -xz && chmod -R +rX .', shell=True, env=ENGLISH_ENVIRONMENT,
+                         stdout=subprocess.PIPE, stderr=stderr, stdin=rpm_data, cwd=dirname, check=True)
+        else:
+            command_str = f'rpm2cpio {quote(str(filename))} | cpio -id ; chmod -R +rX .'
+            run_tool(command_str, shell=True, env=ENGLISH_ENVIRONMENT, stdout=subprocess.PIPE, stderr=stderr,
+                     cwd=dirname, check=True)
+
     def check_signature(self):
-        ret = subprocess.run(('rpm', '-Kv', self.filename),
-                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                             env=ENGLISH_ENVIRONMENT, text=True)
+        ret = run_tool(('rpm', '-Kv', self.filename),
+                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                       env=ENGLISH_ENVIRONMENT, text=True)
         text = ret.stdout
         if text.endswith('\n'):
             text = text[:-1]
@@ -640,68 +834,49 @@ class Pkg(AbstractPkg):
 
     def langtag(self, tag, lang):
         """Get value of tag in the given language."""
-        # LANGUAGE trumps other env vars per GNU gettext docs, see also #166
-        orig = os.environ.get('LANGUAGE')
-        os.environ['LANGUAGE'] = lang
-        ret = self[tag]
-        if orig is not None:
-            os.environ['LANGUAGE'] = orig
-        return ret
+        key = (tag, lang)
+        if key not in self._langtags:
+            # rpm looks the translation up in the environment, LANGUAGE
+            # trumps other env vars per GNU gettext docs, see also #166
+            orig = os.environ.get('LANGUAGE')
+            os.environ['LANGUAGE'] = lang
+            try:
+                self._langtags[key] = self._read_tag(tag)
+            finally:
+                if orig is None:
+                    del os.environ['LANGUAGE']
+                else:
+                    os.environ['LANGUAGE'] = orig
+        return self._langtags[key]
 
-    # extract information about the files
-    def _gather_files_info(self):
-        ret = {}
-        flags = self.header[rpm.RPMTAG_FILEFLAGS]
-        modes = self.header[rpm.RPMTAG_FILEMODES]
-        users = self.header[rpm.RPMTAG_FILEUSERNAME]
-        groups = self.header[rpm.RPMTAG_FILEGROUPNAME]
-        links = [byte_to_string(x) for x in self.header[rpm.RPMTAG_FILELINKTOS]]
-        sizes = self.header[rpm.RPMTAG_FILESIZES]
-        if len(sizes) != len(flags):
-            sizes = self.header[rpm.RPMTAG_LONGFILESIZES]
-        md5s = self.header[rpm.RPMTAG_FILEMD5S]
-        mtimes = self.header[rpm.RPMTAG_FILEMTIMES]
-        rdevs = self.header[rpm.RPMTAG_FILERDEVS]
-        langs = self.header[rpm.RPMTAG_FILELANGS]
-        inodes = self.header[rpm.RPMTAG_FILEINODES]
-        requires = [byte_to_string(x) for x in self.header[rpm.RPMTAG_FILEREQUIRE]]
-        provides = [byte_to_string(x) for x in self.header[rpm.RPMTAG_FILEPROVIDE]]
-        files = [byte_to_string(x) for x in self.header[rpm.RPMTAG_FILENAMES]]
-        magics = [byte_to_string(x) for x in self.header[rpm.RPMTAG_FILECLASS]]
-        try:  # rpm >= 4.7.0
-            filecaps = self.header[rpm.RPMTAG_FILECAPS]
-        except AttributeError:
-            filecaps = None
+    def detect_magic(self, names=None):
+        """
+        Make sure magic of the files (all by default) is known.
 
-        # rpm-python < 4.6 does not return a list for this (or FILEDEVICES,
-        # FWIW) for packages containing exactly one file
-        if not isinstance(inodes, list):
-            inodes = [inodes]
+        Checks looking at magic of every file call it first: the files
+        whose magic is not known from the header are classified by libmagic
+        all at once in a pool of threads (libmagic does not hold the GIL).
+        """
+        todo = []
+        for pkgfile, file_magic in self.files.unknown_magic(names):
+            file_magic = self._known_magic(pkgfile, file_magic)
+            if file_magic is None:
+                todo.append(pkgfile)
+            else:
+                pkgfile.magic = file_magic
+        if not todo:
+            return
+        start = time.monotonic()
+        # map keeps the order, so the result does not depend on the threads
+        for pkgfile, (file_magic, cpu_time) in zip(todo, _magic_pool().map(self._detect_magic, todo)):
+            pkgfile.magic = file_magic
+            self.timers['libmagic-cpu'] += cpu_time
+        self.timers['libmagic'] += time.monotonic() - start
 
-        if files:
-            for idx, file in enumerate(files):
-                pkgfile = PkgFile(file)
-                pkgfile.path = os.path.normpath(os.path.join(
-                    self.dir_name() or '/', pkgfile.name.lstrip('/')))
-                pkgfile.flags = flags[idx]
-                pkgfile.mode = modes[idx]
-                pkgfile.user = byte_to_string(users[idx])
-                pkgfile.group = byte_to_string(groups[idx])
-                pkgfile.linkto = links[idx] and os.path.normpath(links[idx])
-                pkgfile.size = sizes[idx]
-                pkgfile.md5 = md5s[idx]
-                pkgfile.mtime = mtimes[idx]
-                pkgfile.rdev = rdevs[idx]
-                pkgfile.inode = inodes[idx]
-                pkgfile.requires = parse_deps(requires[idx])
-                pkgfile.provides = parse_deps(provides[idx])
-                pkgfile.lang = byte_to_string(langs[idx])
-                pkgfile.magic = magics[idx]
-                pkgfile.magic = self._calc_magic(pkgfile)
-                if filecaps:
-                    pkgfile.filecaps = byte_to_string(filecaps[idx])
-                ret[pkgfile.name] = pkgfile
-        return ret
+    # extract information about the files
+    def _gather_files_info(self):
+        # magic is calculated when a check asks for it
+        return FileTable(self.header, self.dir_name() or '/', self.content, self._calc_magic)
 
     def readlink(self, pkgfile):
         """
@@ -727,6 +902,436 @@ class Pkg(AbstractPkg):
         return False
 
 
+class FileSet(Set):
+    """
+    Immutable set of file names keeping the order of the package.
+
+    Used for the file lists of packages (doc_files, ghost_files, ...) which
+    the checks test membership of for every file of the package.
+    """
+
+    def __init__(self, names=()):
+        self._names = dict.fromkeys(names)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({list(self._names)!r})'
+
+
+class FileNameIndex:
+    """
+    File names of a package indexed by directory, basename and prefix, see
+    AbstractPkg.file_index.
+    """
+
+    def __init__(self, names):
+        self._by_dir = {}
+        self._by_basename = {}
+        for name in names:
+            dirname, basename = posixpath.split(name)
+            self._by_dir.setdefault(dirname, []).append(name)
+            self._by_basename.setdefault(basename, []).append(name)
+        self._sorted = sorted(name for names in self._by_dir.values() for name in names)
+
+    def in_dir(self, dirname):
+        """Return names of the files directly in the directory."""
+        return list(self._by_dir.get(dirname.rstrip('/') or '/', ()))
+
+    def named(self, basename):
+        """Return names of the files with the basename."""
+        return list(self._by_basename.get(basename, ()))
+
+    def with_prefix(self, prefix):
+        """Return sorted names of the files starting with the prefix."""
+        start = bisect.bisect_left(self._sorted, prefix)
+        end = start
+        while end < len(self._sorted) and self._sorted[end].startswith(prefix):
+            end += 1
+        return self._sorted[start:end]
+
+
+class _PooledColumn:
+    """Column of often repeating values kept as indexes to the distinct ones."""
+
+    def __init__(self, values):
+        self.values = []
+        self._ids = {}
+        self.indexes = array('I', (self._id(value) for value in values))
+
+    def _id(self, value):
+        if value not in self._ids:
+            self._ids[value] = len(self.values)
+            self.values.append(value)
+        return self._ids[value]
+
+    def __getitem__(self, idx):
+        return self.values[self.indexes[idx]]
+
+    def __setitem__(self, idx, value):
+        self.indexes[idx] = self._id(value)
+
+
+class FileTable(Mapping):
+    """
+    Metadata of the files of a package kept column-wise.
+
+    It is a read-only mapping of the file names to PkgFileView objects,
+    which are created on access. Numbers are kept in arrays, repeating
+    strings (owners, magic) only once, and the values that need decoding
+    or parsing (dependencies, link targets, ...) are converted when they
+    are accessed. This keeps packages with 100k+ files cheap.
+
+    Magic of a file is calculated by calc_magic(pkgfile, header_magic) the
+    first time it is accessed and remembered, so libmagic runs only for
+    the files the checks look at.
+    """
+
+    def __init__(self, header, dirname, content=None, calc_magic=None):
+        self.dirname = dirname
+        self.content = content
+        self.calc_magic = calc_magic
+        self.names = [byte_to_string(x) for x in header[rpm.RPMTAG_FILENAMES]]
+        self._index = {name: idx for idx, name in enumerate(self.names)}
+        count = len(self.names)
+
+        self.flags = array('q', header[rpm.RPMTAG_FILEFLAGS][:count])
+        self.mode = array('q', header[rpm.RPMTAG_FILEMODES][:count])
+        sizes = header[rpm.RPMTAG_FILESIZES]
+        if len(sizes) != len(self.flags):
+            sizes = header[rpm.RPMTAG_LONGFILESIZES]
+        self.size = array('q', sizes[:count])
+        self.mtime = array('q', header[rpm.RPMTAG_FILEMTIMES][:count])
+        self.rdev = array('q', header[rpm.RPMTAG_FILERDEVS][:count])
+        inodes = header[rpm.RPMTAG_FILEINODES]
+        # rpm-python < 4.6 does not return a list for this (or FILEDEVICES,
+        # FWIW) for packages containing exactly one file
+        if not isinstance(inodes, list):
+            inodes = [inodes]
+        self.inode = array('q', inodes[:count])
+        self.user = _PooledColumn(byte_to_string(x) for x in header[rpm.RPMTAG_FILEUSERNAME])
+        self.group = _PooledColumn(byte_to_string(x) for x in header[rpm.RPMTAG_FILEGROUPNAME])
+        self.magic = _PooledColumn(byte_to_string(x) for x in header[rpm.RPMTAG_FILECLASS])
+        # rows of the magic column which are final
+        self._magic_done = bytearray(count)
+        # converted on access
+        self._linkto = header[rpm.RPMTAG_FILELINKTOS]
+        self.md5 = header[rpm.RPMTAG_FILEMD5S]
+        self._requires = header[rpm.RPMTAG_FILEREQUIRE]
+        self._provides = header[rpm.RPMTAG_FILEPROVIDE]
+        self._lang = header[rpm.RPMTAG_FILELANGS]
+        try:  # rpm >= 4.7.0
+            self._filecaps = header[rpm.RPMTAG_FILECAPS]
+        except AttributeError:
+            self._filecaps = None
+
+    def __getitem__(self, name):
+        return PkgFileView(self, self._index[name])
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def names_with_flag(self, flag):
+        """Return FileSet of the files with the (RPMFILE_*) flag set."""
+        return FileSet(name for name, flags in zip(self.names, self.flags) if flags & flag)
+
+    def file_magic(self, idx):
+        """Return magic of the file with the index, calculate it on first use."""
+        if not self._magic_done[idx]:
+            magic = self.magic[idx]
+            if self.calc_magic is not None:
+                magic = self.calc_magic(PkgFileView(self, idx), magic)
+            self.set_magic(idx, magic)
+        return self.magic[idx]
+
+    def unknown_magic(self, names=None):
+        """
+        Return (PkgFileView, magic from the header) of the files (all by
+        default) whose magic was not calculated yet.
+        """
+        indexes = range(len(self.names)) if names is None else (self._index[name] for name in names)
+        return [(PkgFileView(self, idx), self.magic[idx]) for idx in indexes if not self._magic_done[idx]]
+
+    def set_magic(self, idx, magic):
+        self.magic[idx] = magic
+        self._magic_done[idx] = 1
+
+    def value(self, attr, idx):
+        """Return the attribute of the file with the index."""
+        if attr == 'name':
+            return self.names[idx]
+        if attr == 'path':
+            return os.path.normpath(os.path.join(self.dirname, self.names[idx].lstrip('/')))
+        if attr == 'linkto':
+            linkto = byte_to_string(self._linkto[idx])
+            return linkto and os.path.normpath(linkto)
+        if attr in ('requires', 'provides'):
+            return parse_deps(byte_to_string(getattr(self, '_' + attr)[idx]))
+        if attr == 'lang':
+            return byte_to_string(self._lang[idx])
+        if attr == 'filecaps':
+            return byte_to_string(self._filecaps[idx]) if self._filecaps else None
+        return getattr(self, attr)[idx]
+
+
+# PkgPrefetchers that were not closed yet, see paused_prefetching
+_prefetchers = weakref.WeakSet()
+
+
+@contextlib.contextmanager
+def paused_prefetching():
+    """
+    Pause the background threads of all the PkgPrefetchers within the
+    block, the extraction running at the moment is finished first.
+
+    Processes must be forked only like this: a child forked while the
+    thread works would inherit the locks it holds (libmagic, the SQLite
+    caches, the tool runner, ...) and could deadlock on them. The other
+    thread pools of ours (libmagic, tool runner) are idle while the checks
+    run, they finish their work before the check goes on.
+    """
+    prefetchers = list(_prefetchers)
+    for prefetcher in prefetchers:
+        prefetcher.pause()
+    try:
+        yield
+    finally:
+        for prefetcher in prefetchers:
+            prefetcher.resume()
+
+
+class PkgPrefetcher:
+    """
+    Open and extract rpm packages in a background thread ahead of time.
+
+    Packages have to be requested with open_pkg() in the order they were
+    passed in. While the caller checks one package, up to `lookahead` of
+    the following ones are extracted. The installed size of all extracted
+    packages that were not cleaned up yet is kept under `budget` bytes
+    (0 means no limit); a package is always extracted when nothing else is.
+    The thread can be paused, see paused_prefetching.
+    """
+
+    def __init__(self, filenames, dirname, lookahead, budget=0, verbose=False, content_filter=None,
+                 content_budget=0, magic_cache=None):
+        self.filenames = list(filenames)
+        self.dirname = dirname
+        self.lookahead = lookahead
+        self.budget = budget
+        self.verbose = verbose
+        self.content_filter = content_filter
+        self.content_budget = content_budget
+        self.magic_cache = magic_cache
+        self._used = 0
+        self._closed = False
+        self._paused = 0
+        self._working = False
+        self._condition = threading.Condition()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1,
+                                                               thread_name_prefix='rpmlint-prefetch')
+        self._futures = {}
+        self._next = 0
+        _prefetchers.add(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _submit(self):
+        while len(self._futures) < self.lookahead and self._next < len(self.filenames):
+            filename = self.filenames[self._next]
+            self._futures[filename] = self._executor.submit(self._extract, filename)
+            self._next += 1
+
+    def _extract(self, filename):
+        with self._work():
+            header = read_header(filename)
+        size = header[rpm.RPMTAG_LONGSIZE] or 0
+        with self._condition:
+            while self.budget and self._used and self._used + size > self.budget:
+                if self._closed:
+                    raise RuntimeError('prefetching was cancelled')
+                self._condition.wait()
+            self._used += size
+        try:
+            with self._work():
+                pkg = Pkg(filename, self.dirname, header=header,
+                          is_source=not header[rpm.RPMTAG_SOURCERPM], verbose=self.verbose,
+                          content_filter=self.content_filter, content_budget=self.content_budget,
+                          magic_cache=self.magic_cache)
+        except Exception:
+            self._release(size)
+            raise
+        return pkg, size
+
+    @contextlib.contextmanager
+    def _work(self):
+        """Run the block in the thread unless it is paused."""
+        with self._condition:
+            while self._paused and not self._closed:
+                self._condition.wait()
+            self._working = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._working = False
+                self._condition.notify_all()
+
+    def pause(self):
+        """Wait until the thread stops working, it does not start anything new until resume()."""
+        with self._condition:
+            self._paused += 1
+            while self._working:
+                self._condition.wait()
+
+    def resume(self):
+        with self._condition:
+            self._paused -= 1
+            self._condition.notify_all()
+
+    def _release(self, size):
+        with self._condition:
+            self._used -= size
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def open_pkg(self, filename):
+        """Return the (already extracted) Pkg, clean it up afterwards."""
+        future = self._futures.pop(filename, None)
+        if future is None:
+            future = self._executor.submit(self._extract, filename)
+        self._submit()
+        pkg, size = future.result()
+        try:
+            with pkg:
+                yield pkg
+        finally:
+            self._release(size)
+
+    def skip(self, filename):
+        """Drop the package, it is not going to be requested."""
+        future = self._futures.pop(filename, None)
+        if future is not None and not future.cancel():
+            future.add_done_callback(self._discard)
+        self._submit()
+
+    def _discard(self, future):
+        if not future.exception():
+            pkg, size = future.result()
+            pkg.cleanup()
+            self._release(size)
+
+    def close(self):
+        """Stop prefetching and remove packages that were not requested."""
+        _prefetchers.discard(self)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for future in self._futures.values():
+            future.cancel()
+        self._executor.shutdown(wait=True)
+        for future in self._futures.values():
+            if not future.cancelled() and not future.exception():
+                pkg, size = future.result()
+                pkg.cleanup()
+        self._futures = {}
+
+
+class PackageIndex:
+    """
+    File lookups of a package shared by the applicability predicates of the
+    checks, see AbstractCheck.is_applicable.
+
+    The answers are memoized, so every predicate is evaluated only once per
+    package no matter how many checks declare it.
+    """
+
+    def __init__(self, pkg):
+        self.pkg = pkg
+        self._matches = {}
+        self._magic = {}
+
+    def match_files(self, regex):
+        """Return True if any file path of the package matches the regex."""
+        if regex not in self._matches:
+            self._matches[regex] = any(regex.match(fname) for fname in self.pkg.files)
+        return self._matches[regex]
+
+    def has_files(self, patterns):
+        """Return True if any file path matches one of the glob patterns."""
+        return bool(patterns) and self.match_files(_glob_regex(tuple(patterns)))
+
+    def has_magic(self, substrings, patterns=()):
+        """
+        Return True if magic of any file contains one of the substrings.
+
+        The files matching the glob patterns are looked at first. Magic is
+        read file by file (libmagic runs only for files without magic in the
+        header) and the search stops at the first match.
+        """
+        if not substrings:
+            return False
+        substrings = tuple(substrings)
+        if substrings not in self._magic:
+            files = self.pkg.files
+            names = list(files)
+            if patterns:
+                regex = _glob_regex(tuple(patterns))
+                names.sort(key=lambda name: not regex.match(name))
+            self._magic[substrings] = any(s in files[name].magic for name in names for s in substrings)
+        return self._magic[substrings]
+
+
+class ContentFilter:
+    """
+    Files of binary packages whose content is read by the checks, see
+    AbstractCheck.content_files.
+
+    A file is selected if its path matches one of the glob patterns or its
+    header magic contains one of the substrings. Files without header magic
+    are always selected as libmagic needs their content.
+    """
+
+    def __init__(self, patterns=(), magic=()):
+        self.patterns = tuple(sorted(set(patterns)))
+        self.magic = tuple(sorted(set(magic)))
+
+    def select(self, header):
+        """Return set of the selected file paths relative to the root."""
+        regex = _glob_regex(self.patterns) if self.patterns else None
+        files = [byte_to_string(x) for x in header[rpm.RPMTAG_FILENAMES]]
+        magics = [byte_to_string(x) for x in header[rpm.RPMTAG_FILECLASS]]
+        if len(magics) != len(files):
+            magics = [''] * len(files)
+        selected = set()
+        for name, file_class in zip(files, magics):
+            if (not file_class or any(s in file_class for s in self.magic) or
+                    (regex and regex.match(name))):
+                selected.add(os.path.normpath(name.lstrip('/')))
+        return selected
+
+
+@functools.lru_cache(maxsize=None)
+def _glob_regex(patterns):
+    return re.compile('|'.join(translate(pattern) for pattern in patterns))
+
+
 def get_installed_pkgs(name):
     """Get list of installed package objects by name."""
 
@@ -807,7 +1412,7 @@ class FakePkg(AbstractPkg):
     ]
 
     def __init__(self, name, is_source=False):
-        self.timers = {'ExtractRpm': 0, 'libmagic': 0}
+        self.timers = {'ExtractRpm': 0, 'libmagic': 0, 'libmagic-cpu': 0}
         self.name = str(name)
         self.filename = f'{name}.rpm'
         self.arch = None
@@ -817,7 +1422,7 @@ class FakePkg(AbstractPkg):
 
         # files are dictionary where key is name of a file
         self.files = {}
-        self.ghost_files = {}
+        self.ghost_files = FileSet()
 
         # header is a dictionary to mock rpm metadata
         self.header = FakeHeader()
@@ -933,11 +1538,11 @@ class FakePkg(AbstractPkg):
 
     def initiate_files_base_data(self):
         """ This method is called after adding metadata of each file """
-        self.config_files = [x.name for x in self.files.values() if x.is_config]
-        self.doc_files = [x.name for x in self.files.values() if x.is_doc]
-        self.ghost_files = [x.name for x in self.files.values() if x.is_ghost]
-        self.noreplace_files = [x.name for x in self.files.values() if x.is_noreplace]
-        self.missingok_files = [x.name for x in self.files.values() if x.is_missingok]
+        self.config_files = FileSet(x.name for x in self.files.values() if x.is_config)
+        self.doc_files = FileSet(x.name for x in self.files.values() if x.is_doc)
+        self.ghost_files = FileSet(x.name for x in self.files.values() if x.is_ghost)
+        self.noreplace_files = FileSet(x.name for x in self.files.values() if x.is_noreplace)
+        self.missingok_files = FileSet(x.name for x in self.files.values() if x.is_missingok)
 
     def add_header(self, header):
         for k, v in header.items():
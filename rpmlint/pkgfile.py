@@ -2,14 +2,16 @@ import rpm
 
 
 class PkgFile:
-    __slots__ = ['name', 'path', 'flags', 'mode', 'user', 'group', 'linkto',
+    __slots__ = ['name', '_path', 'content', 'flags', 'mode', 'user', 'group', 'linkto',
                  'size', 'md5', 'mtime', 'rdev', 'inode', 'requires', 'provides',
                  'lang', 'magic', 'filecaps']
 
     def __init__(self, name):
         self.name = name
         # Real path to the file (taking extract dir into account)
-        self.path = name
+        self._path = name
+        # PayloadContent possibly keeping content of the file in memory
+        self.content = None
         self.flags = 0
         self.mode = 0
         self.user = None
@@ -26,6 +28,20 @@ class PkgFile:
         self.magic = ''
         self.filecaps = None
 
+    @property
+    def path(self):
+        """
+        Real path to the file, its content is written to the disk first
+        if it is kept in memory.
+        """
+        if self.content is not None:
+            self.content.materialize(self.name)
+        return self._path
+
+    @path.setter
+    def path(self, path):
+        self._path = path
+
     @property
     def is_config(self):
         return self.flags & rpm.RPMFILE_CONFIG
@@ -45,3 +61,54 @@ class PkgFile:
     @property
     def is_missingok(self):
         return self.flags & rpm.RPMFILE_MISSINGOK
+
+
+def _column(attr):
+    """Property reading the attribute from the row of the FileTable."""
+    return property(lambda self: self._table.value(attr, self._index))
+
+
+class PkgFileView(PkgFile):
+    """
+    PkgFile reading its attributes from a row of FileTable (see Pkg.files)
+    instead of keeping its own copy of them.
+    """
+    __slots__ = ['_table', '_index']
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    name = _column('name')
+    flags = _column('flags')
+    mode = _column('mode')
+    user = _column('user')
+    group = _column('group')
+    linkto = _column('linkto')
+    size = _column('size')
+    md5 = _column('md5')
+    mtime = _column('mtime')
+    rdev = _column('rdev')
+    inode = _column('inode')
+    requires = _column('requires')
+    provides = _column('provides')
+    lang = _column('lang')
+    filecaps = _column('filecaps')
+
+    @property
+    def content(self):
+        return self._table.content
+
+    @property
+    def path(self):
+        if self._table.content is not None:
+            self._table.content.materialize(self.name)
+        return self._table.value('path', self._index)
+
+    @property
+    def magic(self):
+        return self._table.file_magic(self._index)
+
+    @magic.setter
+    def magic(self, magic):
+        self._table.set_magic(self._index, magic)
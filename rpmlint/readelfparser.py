@@ -1,8 +1,25 @@
+import functools
 from itertools import dropwhile, takewhile
 import re
-import subprocess
 
+from rpmlint.elffile import ElfError, read_elf_objects
 from rpmlint.helpers import ENGLISH_ENVIRONMENT
+from rpmlint.toolrunner import run_tool
+
+
+def run_readelf(path, options, extra_flags):
+    return run_tool(['readelf'] + options + [path] + extra_flags, encoding='utf8',
+                    errors='replace', capture_output=True, env=ENGLISH_ENVIRONMENT)
+
+
+@functools.lru_cache(maxsize=None)
+def readelf_extra_flags():
+    """Return flags passed to every readelf call, detected once per process."""
+    # Do not follow debug info links
+    output = run_tool(['readelf', '--help'], encoding='utf8', errors='replace',
+                      capture_output=True, env=ENGLISH_ENVIRONMENT).stdout
+    flag = '--debug-dump=no-follow-links'
+    return [flag] if flag in output else []
 
 
 class ElfSection:
@@ -11,7 +28,8 @@ class ElfSection:
     """
     def __init__(self, name, size):
         self.name = name
-        self.size = int(size, 16)
+        # readelf prints the size in hex
+        self.size = int(size, 16) if isinstance(size, str) else size
 
 
 class ElfProgramHeader:
@@ -65,17 +83,41 @@ class ElfSectionInfo:
     section_regex = re.compile(r'.*\] (?P<section>\S*)\s*\S+\s*\S*\s*\S*\s*(?P<size>\w*)')
     pic_regex = re.compile(r'\.rela?\.(data|text)')
 
-    def __init__(self, path, extra_flags):
+    readelf_options = ['-W', '-S']
+
+    def __init__(self, path, extra_flags, elf_objects=None, readelf_output=None):
         self.path = path
         self.elf_files = []
         self.parsing_failed_reason = None
         self.pic = False
         self.extra_flags = extra_flags
-        self.parse()
+        if elf_objects is None:
+            self.parse(readelf_output)
+        else:
+            self.parse_elf_objects(elf_objects)
+
+    def to_dict(self):
+        return {'elf_files': [[[s.name, s.size] for s in elf_file] for elf_file in self.elf_files], 'pic': self.pic}
+
+    @classmethod
+    def from_dict(cls, path, data):
+        info = cls(path, [], elf_objects=[])
+        info.elf_files = [[ElfSection(name, size) for name, size in elf_file] for elf_file in data['elf_files']]
+        info.pic = data['pic']
+        return info
+
+    def parse_elf_objects(self, elf_objects):
+        for elf_object in elf_objects:
+            # skip the empty section
+            parsed_sections = [ElfSection(s['name'], s['size']) for s in elf_object.sections[1:]]
+            if any(self.pic_regex.search(section.name) for section in parsed_sections):
+                self.pic = True
+            if parsed_sections:
+                self.elf_files.append(parsed_sections)
 
-    def parse(self):
-        r = subprocess.run(['readelf', '-W', '-S', self.path] + self.extra_flags, encoding='utf8',
-                           errors='replace', capture_output=True, env=ENGLISH_ENVIRONMENT)
+    def parse(self, r=None):
+        if r is None:
+            r = run_readelf(self.path, self.readelf_options, self.extra_flags)
         if r.returncode != 0:
             self.parsing_failed_reason = r.stderr
             return
@@ -135,16 +177,34 @@ class ElfProgramHeaderInfo:
 
     header_regex = re.compile('\\s+(?P<header>\\w+)(\\s+\\w+){5}\\s+(?P<flags>[RWE ]{3}).*')
 
-    def __init__(self, path, extra_flags):
+    readelf_options = ['-W', '-l']
+
+    def __init__(self, path, extra_flags, elf_objects=None, readelf_output=None):
         self.path = path
         self.headers = []
         self.parsing_failed_reason = None
         self.extra_flags = extra_flags
-        self.parse()
-
-    def parse(self):
-        r = subprocess.run(['readelf', '-W', '-l', self.path] + self.extra_flags, encoding='utf8',
-                           errors='replace', capture_output=True, env=ENGLISH_ENVIRONMENT)
+        if elf_objects is None:
+            self.parse(readelf_output)
+        else:
+            self.parse_elf_objects(elf_objects)
+
+    def to_dict(self):
+        return {'headers': [[h.name, h.flags] for h in self.headers]}
+
+    @classmethod
+    def from_dict(cls, path, data):
+        info = cls(path, [], elf_objects=[])
+        info.headers = [ElfProgramHeader(name, flags) for name, flags in data['headers']]
+        return info
+
+    def parse_elf_objects(self, elf_objects):
+        for elf_object in elf_objects:
+            self.headers += [ElfProgramHeader(name, flags) for name, flags in elf_object.program_headers]
+
+    def parse(self, r=None):
+        if r is None:
+            r = run_readelf(self.path, self.readelf_options, self.extra_flags)
         if r.returncode != 0:
             self.parsing_failed_reason = r.stderr
             return
@@ -209,17 +269,36 @@ class ElfDynamicSectionInfo:
     runpath_regex = re.compile('Library runpath: \\[(?P<path>[^\\]]+)\\]')
     rpath_regex = re.compile('Library rpath: \\[(?P<path>[^\\]]+)\\]')
 
-    def __init__(self, path, extra_flags):
+    readelf_options = ['-W', '-d']
+
+    def __init__(self, path, extra_flags, elf_objects=None, readelf_output=None):
         self.path = path
         self.sections = []
         self.parsing_failed_reason = None
         self.extra_flags = extra_flags
-        self.parse()
+        if elf_objects is None:
+            self.parse(readelf_output)
+        else:
+            self.parse_elf_objects(elf_objects)
         self.parse_meta()
 
-    def parse(self):
-        r = subprocess.run(['readelf', '-W', '-d', self.path] + self.extra_flags, encoding='utf8',
-                           errors='replace', capture_output=True, env=ENGLISH_ENVIRONMENT)
+    def to_dict(self):
+        return {'sections': [[x.key, x.value] for x in self.sections]}
+
+    @classmethod
+    def from_dict(cls, path, data):
+        info = cls(path, [], elf_objects=[])
+        info.sections = [ElfDynamicSection(key, value) for key, value in data['sections']]
+        info.parse_meta()
+        return info
+
+    def parse_elf_objects(self, elf_objects):
+        for elf_object in elf_objects:
+            self.sections += [ElfDynamicSection(key, value) for key, value in elf_object.dynamic]
+
+    def parse(self, r=None):
+        if r is None:
+            r = run_readelf(self.path, self.readelf_options, self.extra_flags)
         if r.returncode != 0:
             self.parsing_failed_reason = r.stderr
             return
@@ -230,7 +309,7 @@ class ElfDynamicSectionInfo:
         lines = list(dropwhile(lambda x: needle not in x, lines))
         # skip header
         lines = lines[2:]
-        for line in lines:
+        for line in takewhile(lambda x: x.strip() != '', lines):
             r = self.section_regex.search(line)
             self.sections.append(ElfDynamicSection(r.group('key'), r.group('value')))
 
@@ -276,25 +355,51 @@ class ElfSymbolTableInfo:
      8: 0000000000000000    21 FUNC    GLOBAL DEFAULT    1 main
     """
 
-    def __init__(self, path, extra_flags):
+    readelf_options = ['-Ui', '-W', '-s']
+
+    def __init__(self, path, extra_flags, elf_objects=None, readelf_output=None):
         self.path = path
         self.functions = set()
         self.parsing_failed_reason = None
         self.extra_flags = extra_flags
-        self.parse()
+        if elf_objects is None:
+            self.parse(readelf_output)
+        else:
+            self.parse_elf_objects(elf_objects)
+
+    def to_dict(self):
+        return {'functions': sorted(self.functions)}
+
+    @classmethod
+    def from_dict(cls, path, data):
+        info = cls(path, [], elf_objects=[])
+        info.functions = set(data['functions'])
+        return info
 
-    def parse(self):
+    def parse_elf_objects(self, elf_objects):
+        for elf_object in elf_objects:
+            self.functions.update(elf_object.functions)
+
+    def parse(self, r=None):
         try:
-            r = subprocess.run(['readelf', '-Ui', '-W', '-s', self.path] + self.extra_flags, encoding='utf8',
-                               errors='replace', capture_output=True, env=ENGLISH_ENVIRONMENT)
+            if r is None:
+                r = run_readelf(self.path, self.readelf_options, self.extra_flags)
             if r.returncode != 0:
                 self.parsing_failed_reason = r.stderr
                 return
 
             lines = r.stdout.splitlines()
+            in_table = False
             for line in lines:
+                # the output may contain more than the symbol tables
+                if line.startswith('Symbol table '):
+                    in_table = True
+                    continue
+                if not line.strip():
+                    in_table = False
+                    continue
                 parts = line.split()
-                if len(parts) >= 8 and parts[3] == 'FUNC':
+                if in_table and len(parts) >= 8 and parts[3] == 'FUNC':
                     self.functions.add(parts[7])
         except UnicodeDecodeError as e:
             self.parsing_failed_reason = str(e)
@@ -311,53 +416,124 @@ class ElfCommentInfo:
       [     1]  GHC 8.6.5
     """
 
-    comment_regex = re.compile('\\s+\\[[\\s[0-9]+\\]\\s+(?P<comment>.*)')
+    # the offsets are printed in hex
+    comment_regex = re.compile('\\s+\\[[\\s0-9a-f]+\\]\\s+(?P<comment>.*)')
+
+    readelf_options = ['-p', '.comment']
 
-    def __init__(self, path, extra_flags):
+    def __init__(self, path, extra_flags, elf_objects=None, readelf_output=None):
         self.path = path
         self.comments = []
         self.parsing_failed_reason = None
         self.extra_flags = extra_flags
-        self.parse()
-
-    def parse(self):
-        r = subprocess.run(['readelf', '-p', '.comment', self.path] + self.extra_flags, encoding='utf8',
-                           errors='replace', capture_output=True, env=ENGLISH_ENVIRONMENT)
+        if elf_objects is None:
+            self.parse(readelf_output)
+        else:
+            self.parse_elf_objects(elf_objects)
+
+    def to_dict(self):
+        return {'comments': self.comments}
+
+    @classmethod
+    def from_dict(cls, path, data):
+        info = cls(path, [], elf_objects=[])
+        info.comments = data['comments']
+        return info
+
+    def parse_elf_objects(self, elf_objects):
+        for elf_object in elf_objects:
+            self.comments += elf_object.comments
+
+    def parse(self, r=None):
+        if r is None:
+            r = run_readelf(self.path, self.readelf_options, self.extra_flags)
         if r.returncode != 0:
             self.parsing_failed_reason = r.stderr
             return
 
         lines = r.stdout.splitlines()
-        for line in lines:
-            r = self.comment_regex.search(line)
-            if r:
-                self.comments.append(r.group('comment'))
+        needle = "String dump of section '.comment':"
+
+        # archive files can contain multiple files
+        while lines:
+            lines = list(dropwhile(lambda x: needle not in x, lines))[1:]
+            strings = list(takewhile(lambda x: x.strip() != '', lines))
+            for line in strings:
+                r = self.comment_regex.search(line)
+                if r:
+                    self.comments.append(r.group('comment'))
+            lines = lines[len(strings):]
 
 
 class ReadelfParser:
     """
     Class contains all information obtained by readelf command
     in a structured format.
+
+    With the 'native' backend the file is read by rpmlint.elffile without
+    running readelf, the results are the same. readelf is still run for
+    files the native reader does not understand (e.g. files which are not
+    ELF at all) so that the errors are reported the usual way. The
+    'readelf' backend always runs it.
+
+    readelf is run once per file with the options of all the parsers, its
+    output is then split among them.
     """
 
     NOT_ELF_ERROR = 'Error: Not an ELF file - it has the wrong magic bytes at the start'
+    BACKENDS = ('native', 'readelf')
+    # options of all the INFO_CLASSES
+    READELF_OPTIONS = ['-W', '-S', '-l', '-d', '-Ui', '-s', '-p', '.comment']
+    INFO_CLASSES = {
+        'section_info': ElfSectionInfo,
+        'program_header_info': ElfProgramHeaderInfo,
+        'dynamic_section_info': ElfDynamicSectionInfo,
+        'symbol_table_info': ElfSymbolTableInfo,
+        'comment_section_info': ElfCommentInfo,
+    }
     so_regex = re.compile(r'/lib(64)?/[^/]+\.so(\.[0-9]+)*$')
 
-    def __init__(self, pkgfile_path, path):
+    def __init__(self, pkgfile_path, path, backend='native'):
+        if backend not in self.BACKENDS:
+            raise ValueError(f'unknown ELF reader backend {backend}')
+        self._detect_kind(path)
+
+        elf_objects = None
+        if backend == 'native':
+            try:
+                elf_objects = read_elf_objects(pkgfile_path)
+            except ElfError:
+                backend = 'readelf'
+        self.backend = backend
+
+        extra_flags = []
+        output = None
+        if elf_objects is None:
+            extra_flags = readelf_extra_flags()
+            output = run_readelf(pkgfile_path, self.READELF_OPTIONS, extra_flags)
+
+        for name, info in self.INFO_CLASSES.items():
+            setattr(self, name, info(pkgfile_path, extra_flags, elf_objects, output))
+
+    def _detect_kind(self, path):
         self.is_archive = path.endswith('.a')
         self.is_shlib = self.so_regex.search(path)
         self.is_debug = path.endswith('.debug')
 
-        # Do not follow debug info links
-        output = subprocess.check_output('readelf --help', shell=True, encoding='utf8')
-        flag = '--debug-dump=no-follow-links'
-        extra_flags = [flag] if flag in output else []
-
-        self.section_info = ElfSectionInfo(pkgfile_path, extra_flags)
-        self.program_header_info = ElfProgramHeaderInfo(pkgfile_path, extra_flags)
-        self.dynamic_section_info = ElfDynamicSectionInfo(pkgfile_path, extra_flags)
-        self.symbol_table_info = ElfSymbolTableInfo(pkgfile_path, extra_flags)
-        self.comment_section_info = ElfCommentInfo(pkgfile_path, extra_flags)
+    def to_dict(self):
+        data = {name: getattr(self, name).to_dict() for name in self.INFO_CLASSES}
+        data['backend'] = self.backend
+        return data
+
+    @classmethod
+    def from_dict(cls, pkgfile_path, path, data):
+        """Return the parser with results of to_dict(), the file is not read."""
+        parser = cls.__new__(cls)
+        parser._detect_kind(path)
+        parser.backend = data['backend']
+        for name, info in cls.INFO_CLASSES.items():
+            setattr(parser, name, info.from_dict(pkgfile_path, data[name]))
+        return parser
 
     def parsing_failed_reason(self):
         reasons = [self.section_info.parsing_failed_reason,
@@ -365,7 +541,8 @@ class ReadelfParser:
                    self.dynamic_section_info.parsing_failed_reason,
                    self.symbol_table_info.parsing_failed_reason,
                    self.comment_section_info.parsing_failed_reason]
-        reasons = [r for r in reasons if r]
+        # the parsers may share the output of a single readelf run
+        reasons = list(dict.fromkeys(r for r in reasons if r))
         for reason in reasons:
             if self.NOT_ELF_ERROR in reason:
                 return self.NOT_ELF_ERROR
@@ -0,0 +1,197 @@
+import contextlib
+import json
+import os
+from pathlib import Path
+from shutil import get_terminal_size
+import socket
+import sys
+import traceback
+
+from rpmlint.filter import Filter
+from rpmlint.helpers import print_warning, pushd
+from rpmlint.lint import apply_options, Lint
+
+
+class LintServer:
+    """
+    Run rpmlint on request with warm configuration, checks and descriptions.
+
+    The server listens on a Unix socket. A request is a single JSON line
+    {"argv": [...], "cwd": "...", "columns": N} where argv are the usual
+    rpmlint command line arguments. Output of the run is streamed back as
+    {"stdout": "..."} and {"stderr": "..."} lines terminated by
+    {"exit": code}. Requests are handled one at a time, the checks are reset
+    before and after every one of them.
+    """
+
+    def __init__(self, socket_path, options, parse_args):
+        """
+        Load the configuration and the checks.
+
+        Args:
+            socket_path: Path of the Unix socket to listen on.
+            options: Parsed command line options the server was started with.
+            parse_args: Function parsing rpmlint command line arguments of a
+                        request into options.
+        """
+        self.socket_path = Path(socket_path)
+        self.parse_args = parse_args
+        self.conf_paths = self._conf_paths(options)
+        # per-run options are applied for every request separately
+        options = dict(options, rpmfile=[], rpmlintrc=None, verbose=False, strict=False,
+                       permissive=False, print_config=False, checks=None, profile=False)
+        self.lint = Lint(options)
+        configuration = self.lint.config.configuration
+        self.filters = list(configuration['Filters'])
+        self.scoring = dict(configuration['Scoring'])
+
+    @staticmethod
+    def _conf_paths(options):
+        return sorted(path.resolve() for path in options['config'] or [])
+
+    def serve_forever(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            with contextlib.suppress(FileNotFoundError):
+                self.socket_path.unlink()
+            sock.bind(str(self.socket_path))
+            sock.listen()
+            try:
+                while True:
+                    conn, _ = sock.accept()
+                    with conn:
+                        try:
+                            self.handle(conn)
+                        except (OSError, ValueError) as e:
+                            print_warning(f'(none): W: rpmlint server request failed: {e}')
+            finally:
+                with contextlib.suppress(FileNotFoundError):
+                    self.socket_path.unlink()
+
+    def handle(self, conn):
+        """Read one request from the connection and stream back the result."""
+        with conn.makefile('rb') as rfile, conn.makefile('w', encoding='utf-8') as wfile:
+            request = json.loads(rfile.readline())
+            code = self._handle_request(request, wfile)
+            _send(wfile, exit=code)
+
+    def _handle_request(self, request, wfile):
+        columns = os.environ.get('COLUMNS')
+        if request.get('columns'):
+            # used by string_center
+            os.environ['COLUMNS'] = str(request['columns'])
+        try:
+            with pushd(request['cwd']), \
+                    contextlib.redirect_stdout(_Channel(wfile, 'stdout')), \
+                    contextlib.redirect_stderr(_Channel(wfile, 'stderr')):
+                try:
+                    return self.run(request['argv'])
+                except SystemExit as e:
+                    return e.code if isinstance(e.code, int) else int(e.code is not None)
+                except Exception:
+                    traceback.print_exc()
+                    return 1
+        finally:
+            if columns is None:
+                os.environ.pop('COLUMNS', None)
+            else:
+                os.environ['COLUMNS'] = columns
+
+    def run(self, argv):
+        """
+        Run rpmlint with the command line arguments and return the exit code.
+        """
+        options = self.parse_args(argv)
+        if options['server']:
+            print_warning('(none): E: rpmlint server cannot start another server')
+            return 2
+        if options['print_config'] or self._conf_paths(options) != self.conf_paths:
+            # the warm configuration does not match, do it the slow way
+            return Lint(options).run()
+
+        config = self.lint.config
+        self._reset_config()
+        apply_options(config, options)
+        # reuse descriptions already loaded (and registered by the checks)
+        output = Filter(config, self.lint.output.error_details)
+        selected_checks = options['checks'].split(',') if options['checks'] else None
+        checks = {name: check for name, check in self.lint.checks.items()
+                  if (not selected_checks or name in selected_checks) and
+                  not (options['header_only'] and check.needs_content)}
+        self.lint.reset_checks()
+        try:
+            lint = Lint(options, config, output, checks)
+            # rpmlintrc is applied on top of the warm configuration
+            config_state = json.dumps([self.lint.config_state, config.configuration['Scoring']],
+                                      sort_keys=True, default=str)
+            lint.result_cache = lint.create_result_cache(config_state)
+            return lint.run()
+        finally:
+            self.lint.reset_checks()
+            for check in self.lint.checks.values():
+                check.output = self.lint.output
+
+    def _reset_config(self):
+        """Drop rpmlintrc and options applied by the previous request."""
+        config = self.lint.config
+        config.configuration['Filters'] = list(self.filters)
+        config.configuration['Scoring'] = dict(self.scoring)
+        config.rpmlintrc_filters = []
+        config.info = False
+        config.strict = False
+        config.permissive = False
+
+
+class _Channel:
+    """Text stream forwarding everything written to the client."""
+
+    def __init__(self, wfile, name):
+        self.wfile = wfile
+        self.name = name
+
+    def write(self, text):
+        if text:
+            _send(self.wfile, **{self.name: text})
+        return len(text)
+
+    def flush(self):
+        self.wfile.flush()
+
+    def isatty(self):
+        return False
+
+
+def _send(wfile, **message):
+    wfile.write(json.dumps(message) + '\n')
+    wfile.flush()
+
+
+def run_client(socket_path, argv):
+    """
+    Run rpmlint with the command line arguments on the server listening on
+    socket_path, print its output and return the exit code.
+
+    OSError is raised if the server is not reachable, the caller can then
+    run the checks itself.
+    """
+    request = {
+        'argv': argv,
+        'cwd': os.getcwd(),
+        'columns': get_terminal_size().columns,
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        try:
+            sock.sendall(json.dumps(request).encode() + b'\n')
+            with sock.makefile('r', encoding='utf-8') as rfile:
+                for line in rfile:
+                    message = json.loads(line)
+                    if 'exit' in message:
+                        return message['exit']
+                    for name in ('stdout', 'stderr'):
+                        if name in message:
+                            getattr(sys, name).write(message[name])
+        except OSError as e:
+            print_warning(f'(none): E: connection to rpmlint server {socket_path} failed: {e}')
+            return 3
+    print_warning(f'(none): E: rpmlint server {socket_path} closed the connection')
+    return 3
@@ -1,24 +1,154 @@
-import subprocess
+import mmap
+import re
 
-from rpmlint.helpers import ENGLISH_ENVIRONMENT
+
+# characters of the strings as 'strings -a' finds them
+PRINTABLE = b'\t' + bytes(range(0x20, 0x7f))
+STRING_REGEX = re.compile(rb'[\t\x20-\x7e]{4,}')
+NON_PRINTABLE_REGEX = re.compile(rb'[^\t\x20-\x7e]')
+BLOCK_SIZE = 1024 * 1024
+# parts of regexps depending on what is around the match (anchors, word
+# boundaries and lookarounds), '[^' is fine
+CONTEXT_REGEX = re.compile(r'\\[AZbB]|\(\?<?[=!]|(?<!\[)\^|\$')
+
+
+def _blocks(data):
+    """
+    Yield blocks of about BLOCK_SIZE bytes of the data, the blocks do not
+    split any string.
+    """
+    size = len(data)
+    start = 0
+    while start < size:
+        end = min(start + BLOCK_SIZE, size)
+        block = data[start:end]
+        if end < size:
+            keep = len(block.rstrip(PRINTABLE))
+            if keep:
+                block = block[:keep]
+                end = start + keep
+            else:
+                match = NON_PRINTABLE_REGEX.search(data, end)
+                end = match.start() if match else size
+                block = data[start:end]
+        yield block
+        start = end
+
+
+def _strings(block):
+    return [string.decode('ascii') for string in STRING_REGEX.findall(block)]
+
+
+def iter_strings(path):
+    """
+    Yield printable strings of the whole file, the same ones 'strings -a'
+    prints. The file is mapped into memory and scanned in blocks so that
+    only the strings of one block exist at a time.
+    """
+    with open(path, 'rb') as f:
+        if not f.seek(0, 2):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for block in _blocks(data):
+                yield from _strings(block)
 
 
 class StringsParser:
     """
-    Class contains all information obtained by strings command.
+    Class contains the names of the waivers matched by the strings of the
+    file (see iter_strings).
+
+    waivers maps names to compiled regexps, each one is waived by the
+    first string it is found in. The file is scanned once for all of them
+    with the regexps combined into one and the scan stops as soon as every
+    waiver matched.
     """
 
-    def __init__(self, pkgfile_path):
+    def __init__(self, pkgfile_path, waivers):
         self.pkgfile_path = pkgfile_path
-        self.strings = []
+        self.waived = set()
         self.parsing_failed_reason = None
-        self.parse()
+        self.parse(waivers)
 
-    def parse(self):
-        r = subprocess.run(['strings', self.pkgfile_path], encoding='utf8',
-                           capture_output=True, env=ENGLISH_ENVIRONMENT)
-        if r.returncode != 0:
-            self.parsing_failed_reason = r.stderr
+    def parse(self, waivers):
+        remaining = dict(waivers)
+        if not remaining:
             return
+        try:
+            with open(self.pkgfile_path, 'rb') as f:
+                if not f.seek(0, 2):
+                    return
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    self._scan(data, remaining)
+        except OSError as e:
+            self.parsing_failed_reason = str(e)
+
+    def _scan(self, data, remaining):
+        pattern, prefilter = self._combine(remaining)
+        for block in _blocks(data):
+            # most of the blocks do not contain anything similar
+            if prefilter is not None and not prefilter.search(block):
+                continue
+            strings = iter(_strings(block))
+            while True:
+                string = next(filter(pattern.search, strings), None)
+                if string is None:
+                    break
+                for name, regex in list(remaining.items()):
+                    if regex.search(string):
+                        self.waived.add(name)
+                        del remaining[name]
+                if not remaining:
+                    return
+                pattern, prefilter = self._combine(remaining)
+
+    @staticmethod
+    def _combine(waivers):
+        """
+        Return one regexp matching the strings any of the waivers match and
+        a bytes regexp finding all these matches in the raw data (None if
+        some of the waivers can not be searched there).
+        """
+        regexes = list(waivers.values())
+        pattern = None
+        # the group numbers of the other regexps would change and flags
+        # given to re.compile() would be lost
+        if not any(regex.groups or regex.flags & ~re.UNICODE for regex in regexes):
+            combined = '|'.join(f'(?:{regex.pattern})' for regex in regexes)
+            try:
+                pattern = re.compile(combined)
+            except re.error:
+                # e.g. global flags which must start the regexp
+                pass
+        if pattern is None:
+            return _AnyRegex(regexes), None
+
+        prefilter = None
+        if combined.isascii() and not CONTEXT_REGEX.search(combined):
+            try:
+                prefilter = re.compile(combined.encode('ascii'))
+            except re.error:
+                pass
+        return pattern, prefilter
+
+    def to_dict(self):
+        return {'waived': sorted(self.waived)}
+
+    @classmethod
+    def from_dict(cls, pkgfile_path, data):
+        """Return the parser with results of to_dict(), the file is not scanned."""
+        parser = cls.__new__(cls)
+        parser.pkgfile_path = pkgfile_path
+        parser.waived = set(data['waived'])
+        parser.parsing_failed_reason = None
+        return parser
+
+
+class _AnyRegex:
+    """Regexps searched one by one when they can not be combined."""
+
+    def __init__(self, regexes):
+        self.regexes = regexes
 
-        self.strings = r.stdout.splitlines()
+    def search(self, string):
+        return any(regex.search(string) for regex in self.regexes)
@@ -0,0 +1,178 @@
+from collections import namedtuple
+import concurrent.futures
+import contextlib
+import os
+import signal
+import subprocess
+import threading
+import time
+
+
+# invocations of one tool, their wall clock time in seconds, size of their
+# captured output and the number of them killed at the time limit
+ToolStats = namedtuple('ToolStats', ('calls', 'duration', 'output_size', 'timeouts'))
+NO_STATS = ToolStats(0, 0.0, 0, 0)
+
+
+class ToolRunner:
+    """
+    Run external tools (readelf, ldd, checkbashisms, ...) for all the checks
+    with at most jobs of them running at a time in the process.
+
+    run() blocks until the tool finishes, submit() returns a Future so that
+    a check can start many invocations up front and collect their results
+    later. The invocations wait for a free slot in both cases.
+
+    timeouts maps tool names to their time limits in seconds, 'default'
+    applies to the tools not listed and 0 means no limit. A tool running
+    longer is killed, run() then returns CompletedProcess with the
+    returncode of SIGKILL and the reason in stderr (stdout if stderr goes
+    there) so that the callers report it as any other failure of the tool.
+    A timeout passed by the caller applies too, the shorter one wins. The
+    tools run in their own session and the whole process group is killed
+    so that no children of a shell or of the tool are left behind.
+    The invocations of every tool are accounted in stats.
+    """
+
+    def __init__(self, jobs=0, timeouts=None):
+        self.stats = {}
+        self.configure(jobs, timeouts)
+
+    def configure(self, jobs=0, timeouts=None):
+        """Set the number of tools run at a time (0 for the number of CPUs) and the time limits."""
+        self.jobs = jobs or os.cpu_count() or 1
+        self.timeouts = dict(timeouts or {})
+        self._reset()
+
+    def _reset(self):
+        # the threads holding the slots and running the executor do not
+        # survive fork (the --jobs workers)
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.jobs)
+        self._executor = None
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self._reset()
+
+    def timeout(self, tool):
+        """Return time limit of the tool in seconds, None if there is none."""
+        return self.timeouts.get(tool, self.timeouts.get('default', 0)) or None
+
+    def run(self, args, tool=None, **kwargs):
+        """
+        Run the command like subprocess.run(args, **kwargs) and return its
+        CompletedProcess. tool is the name the invocation is accounted and
+        its time limit looked up under, the program name by default.
+        """
+        self._check_fork()
+        if tool is None:
+            tool = os.path.basename(args.split()[0] if isinstance(args, str) else args[0])
+        kwargs = dict(kwargs)
+        check = kwargs.pop('check', False)
+        timeout = self.timeout(tool)
+        caller_timeout = kwargs.pop('timeout', None)
+        if caller_timeout is not None and (timeout is None or caller_timeout < timeout):
+            timeout = caller_timeout
+        timed_out = False
+        with self._slots:
+            start = time.monotonic()
+            try:
+                r = _run_group(args, timeout, dict(kwargs))
+            except subprocess.TimeoutExpired:
+                r = self._timed_out(args, tool, timeout, kwargs)
+                timed_out = True
+            except OSError:
+                self._account(tool, time.monotonic() - start, 0, False)
+                raise
+        self._account(tool, time.monotonic() - start, _size(r.stdout) + _size(r.stderr), timed_out)
+        if check:
+            r.check_returncode()
+        return r
+
+    def submit(self, args, tool=None, **kwargs):
+        """Start run() of the command in the background, return its Future."""
+        self._check_fork()
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs,
+                                                                       thread_name_prefix='rpmlint-tool')
+            return self._executor.submit(self.run, args, tool, **kwargs)
+
+    @staticmethod
+    def _timed_out(args, tool, timeout, kwargs):
+        text = any(kwargs.get(arg) for arg in ('text', 'universal_newlines', 'encoding', 'errors'))
+        reason = f'{tool} timed out after {timeout} s'
+        empty = '' if text else b''
+        if not text:
+            reason = reason.encode()
+        stdout = empty if kwargs.get('capture_output') or kwargs.get('stdout') == subprocess.PIPE else None
+        stderr = None
+        if kwargs.get('capture_output') or kwargs.get('stderr') == subprocess.PIPE:
+            stderr = reason
+        elif kwargs.get('stderr') == subprocess.STDOUT and stdout is not None:
+            stdout = reason
+        return subprocess.CompletedProcess(args, -signal.SIGKILL, stdout, stderr)
+
+    def _account(self, tool, duration, output_size, timed_out):
+        with self._lock:
+            stats = self.stats.get(tool, NO_STATS)
+            self.stats[tool] = ToolStats(stats.calls + 1, stats.duration + duration,
+                                         stats.output_size + output_size, stats.timeouts + timed_out)
+
+    def take_stats(self):
+        """Return stats of the tools run since the last call and forget them."""
+        with self._lock:
+            stats, self.stats = self.stats, {}
+        return stats
+
+    def merge_stats(self, stats):
+        """Add stats taken from another runner, e.g. of a worker process."""
+        with self._lock:
+            for tool, other in stats.items():
+                current = self.stats.get(tool, NO_STATS)
+                self.stats[tool] = ToolStats(*(a + b for a, b in zip(current, other)))
+
+
+def _run_group(args, timeout, kwargs):
+    """
+    Run the command like subprocess.run() in a new session, kill its whole
+    process group when it runs longer than timeout.
+    """
+    if kwargs.pop('capture_output', False):
+        kwargs['stdout'] = kwargs['stderr'] = subprocess.PIPE
+    stdin = kwargs.pop('input', None)
+    if stdin is not None:
+        kwargs['stdin'] = subprocess.PIPE
+    kwargs['start_new_session'] = True
+    with subprocess.Popen(args, **kwargs) as process:
+        try:
+            stdout, stderr = process.communicate(stdin, timeout=timeout)
+        except BaseException:
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(process.pid, signal.SIGKILL)
+            raise
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+
+def _size(output):
+    return len(output) if output else 0
+
+
+_runner = ToolRunner()
+
+
+def get_runner():
+    """Return the ToolRunner shared by the whole process."""
+    return _runner
+
+
+def run_tool(args, tool=None, **kwargs):
+    """Run the command with the shared ToolRunner, see ToolRunner.run."""
+    return _runner.run(args, tool, **kwargs)
+
+
+def submit_tool(args, tool=None, **kwargs):
+    """Start the command with the shared ToolRunner, see ToolRunner.submit."""
+    return _runner.submit(args, tool, **kwargs)
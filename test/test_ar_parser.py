@@ -0,0 +1,79 @@
+from pathlib import Path
+import shutil
+import subprocess
+
+import pytest
+from rpmlint.arfile import ArArchive, archive_members, ArError
+from rpmlint.arparser import ArParser
+from rpmlint.elffile import read_elf_objects
+
+from Testing import get_tested_path
+
+
+READELF_DIR = get_tested_path('readelf')
+
+
+def ar_header(name, size):
+    return f'{name:<16}{0:<12}{0:<6}{0:<6}{644:<8}{size:<10}`\n'.encode()
+
+
+@pytest.mark.parametrize('path', sorted(p.name for p in Path(READELF_DIR).glob('*.a')))
+def test_native_matches_ar(path):
+    full_path = str(Path(READELF_DIR, path))
+    native = ArParser(full_path)
+    ar = ArParser(full_path, 'ar')
+    assert native.backend == 'native'
+    assert not ar.parsing_failed_reason
+    assert native.objects == ar.objects
+
+
+def test_thin_archive(tmp_path):
+    for name in ('main.o', 'a-very-long-object-file-name.o'):
+        shutil.copy(Path(READELF_DIR, 'lto-object.o'), tmp_path / name)
+    archive = tmp_path / 'libthin.a'
+    subprocess.run(['ar', 'rcT', str(archive), 'main.o', 'a-very-long-object-file-name.o'],
+                   cwd=tmp_path, check=True)
+    native = ArParser(str(archive))
+    assert native.backend == 'native'
+    assert native.objects == ArParser(str(archive), 'ar').objects
+    assert native.objects == [str(tmp_path / 'main.o'), str(tmp_path / 'a-very-long-object-file-name.o')]
+    assert len(read_elf_objects(str(archive))) == 2
+
+    (tmp_path / 'main.o').unlink()
+    with ArArchive(str(archive)) as ar:
+        with pytest.raises(ArError):
+            ar.member_data(ar.members[0])
+
+
+def test_bsd_long_names():
+    data = b'!<arch>\n'
+    data += ar_header('__.SYMDEF', 4) + b'\0' * 4
+    data += ar_header('#1/20', 25) + b'a-long-bsd-name.o\0\0\0' + b'12345' + b'\n'
+    data += ar_header('short.o/', 2) + b'ab'
+    members = archive_members(data)
+    assert [member.name for member in members] == ['a-long-bsd-name.o', 'short.o']
+    assert [data[member.start:member.start + member.size] for member in members] == [b'12345', b'ab']
+
+
+def test_member_data():
+    with ArArchive(str(Path(READELF_DIR, 'main.a'))) as archive:
+        data, start, size = archive.member_data(archive.members[0])
+        assert data[start:start + 4] == b'\x7fELF'
+        assert size == archive.members[0].size
+
+
+@pytest.mark.parametrize('path', ['hostname', 'not-existing.a'])
+def test_ar_fallback(path):
+    parser = ArParser(str(Path(READELF_DIR, path)))
+    assert parser.backend == 'ar'
+    assert parser.parsing_failed_reason
+
+
+def test_truncated_archive():
+    with pytest.raises(ArError):
+        archive_members(b'!<arch>\n' + ar_header('main.o/', 100) + b'abc')
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        ArParser(str(Path(READELF_DIR, 'main.a')), 'llvm-ar')
@@ -1,3 +1,5 @@
+import subprocess
+
 import pytest
 from rpmlint.checks.BinariesCheck import BinariesCheck
 from rpmlint.filter import Filter
@@ -23,6 +25,30 @@ def test_forbidden_c_calls(tmp_path, package, binariescheck):
     assert 'crypto-policy-non-compliance-openssl /usr/lib64/dovecot/libssl_iostream_openssl.so SSL_CTX_set_cipher_list' in out
 
 
+@pytest.mark.parametrize('package', ['binary/crypto-policy'])
+@pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
+def test_elf_cache(tmp_path, package, monkeypatch):
+    def no_tools(args, *rest, **kwargs):
+        raise AssertionError(f'{args[0]} was run')
+
+    config = Config(TEST_CONFIG)
+    config.configuration['CacheDir'] = str(tmp_path / 'cache')
+    results = []
+    for run in ('miss', 'hit'):
+        (tmp_path / run).mkdir()
+        pkg = get_tested_package(package, tmp_path / run)
+        if run == 'hit':
+            # the results of the tools come from the cache
+            monkeypatch.setattr(subprocess, 'Popen', no_tools)
+        output = Filter(config)
+        test = BinariesCheck(config, output)
+        test.check(pkg)
+        results.append(output.print_results(output.results))
+    assert 'crypto-policy-non-compliance-openssl' in results[0]
+    assert results[0] == results[1]
+    assert test.elf_cache.hits and not test.elf_cache.misses
+
+
 @pytest.mark.parametrize('package', ['binary/ngircd'])
 def test_waived_forbidden_c_calls(tmp_path, package, binariescheck):
     output, test = binariescheck
@@ -335,3 +361,24 @@ def test_systemd_unit_file(package, binariescheck):
     test.check(package)
     out = output.print_results(output.results)
     assert 'only-non-binary-in-usr-lib' not in out
+
+
+@pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
+def test_elf_check_jobs():
+    files = ['libutil-2.29.so', 'hostname', 'call-mktemp', 'call-setgroups', 'executable-stack', 'no-soname.so',
+             'rpath-lib.so', 'main.a', 'lto-object.o']
+    results = []
+    for jobs in (1, 3):
+        config = Config(TEST_CONFIG)
+        config.configuration['ElfCheckJobs'] = jobs
+        output = Filter(config)
+        test = BinariesCheck(config, output)
+        test.check(get_tested_mock_package(
+            files={f'/usr/lib64/{name}': {'content-path': f'readelf/{name}', 'create_dirs': True}
+                   for name in files},
+            header={'ARCH': 'x86_64'},
+        ))
+        assert test.checked_files == len(files)
+        results.append(output.print_results(output.results))
+    assert 'E: call-to-mktemp /usr/lib64/call-mktemp' in results[0]
+    assert results[0] == results[1]
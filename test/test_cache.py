@@ -0,0 +1,56 @@
+from rpmlint.cache import MagicCache, ResultCache, SqliteCache
+from rpmlint.filter import CheckResult, Diagnostic, DiagnosticSource
+from rpmlint.pkg import FakePkg, magic_version
+
+
+def test_eviction(tmp_path):
+    cache = SqliteCache(tmp_path / 'test.sqlite', 100)
+    for i in range(20):
+        cache.put(f'key{i}', b'x' * 10)
+    # the least recently used entries are gone
+    assert cache.get('key0') is None
+    assert cache.get('key19') == b'x' * 10
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_result_roundtrip(tmp_path):
+    cache = ResultCache(tmp_path, 1024 * 1024, '{}', [], ['ZipCheck'])
+    source = DiagnosticSource('foo', 'x86_64', None)
+    diagnostic = Diagnostic('E', source, 'some-error', ('/usr/bin/foo', 'detail'))
+    result = CheckResult(source, [diagnostic], None, {'some-error': 'Description.'})
+    cache.put_result('key', result)
+    assert cache.get_result('key') == result
+    assert cache.get_result('other-key') is None
+
+
+def test_fingerprint(tmp_path):
+    cache1 = ResultCache(tmp_path, 1, ResultCache.config_state({'Filters': [], 'ExtractDir': '/tmp'}), [], [])
+    cache2 = ResultCache(tmp_path, 1, ResultCache.config_state({'Filters': [], 'ExtractDir': '/var/tmp'}), [], [])
+    cache3 = ResultCache(tmp_path, 1, ResultCache.config_state({'Filters': ['foo']}), [], [])
+    assert cache1.fingerprint == cache2.fingerprint
+    assert cache1.fingerprint != cache3.fingerprint
+    for option in ('header_only', 'extract_all'):
+        cache4 = ResultCache(tmp_path, 1, ResultCache.config_state({'Filters': [], 'ExtractDir': '/tmp'}), [], [],
+                             {option: True, 'jobs': 4})
+        assert cache1.fingerprint != cache4.fingerprint
+
+
+def test_magic_cache(tmp_path):
+    cache = MagicCache(tmp_path, 1024 * 1024, magic_version())
+    with FakePkg('first') as pkg:
+        pkg.magic_cache = cache
+        pkg.add_file_with_content('/usr/share/doc/first/README', 'Hello world\n')
+        magic = pkg.files['/usr/share/doc/first/README'].magic
+    assert magic
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    # the same content in another package is not classified again
+    with FakePkg('second') as pkg:
+        pkg.magic_cache = cache
+        pkg.add_file_with_content('/usr/share/doc/second/README', 'Hello world\n')
+        assert pkg.files['/usr/share/doc/second/README'].magic == magic
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # a different libmagic may classify it differently
+    assert MagicCache(tmp_path, 1024 * 1024, 'other').get_magic(pkg.files['/usr/share/doc/second/README'].md5) is None
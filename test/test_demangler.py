@@ -0,0 +1,55 @@
+import subprocess
+
+import pytest
+from rpmlint.demangler import Demangler
+
+
+SYMBOLS = ['_ZN3foo3barEv', 'main', '_ZN3foo3barEv.cold', '_ZNSt6vectorIiSaIiEE9push_backERKi']
+
+
+def test_demangle():
+    demangler = Demangler()
+    assert demangler.demangle(SYMBOLS) == subprocess.run(['c++filt'] + SYMBOLS, encoding='utf8',
+                                                         capture_output=True).stdout.splitlines()
+    assert demangler.demangle(['_ZN3foo3barEv', '_ZN3foo3barEv']) == ['foo::bar()', 'foo::bar()']
+    demangler.close()
+
+
+def test_demangle_memo():
+    demangler = Demangler()
+    demangler.demangle(SYMBOLS)
+    demangler.demangle(SYMBOLS + ['_Z3bazv'])
+    assert demangler.demangled == len(SYMBOLS) + 1
+    assert demangler.process.pid
+    demangler.close()
+
+
+def test_demangle_memo_size():
+    demangler = Demangler()
+    demangler.memo_size = 2
+    assert demangler.demangle(SYMBOLS) == demangler.demangle(SYMBOLS)
+    assert len(demangler.names) == 2
+    demangler.close()
+
+
+def test_demangle_many():
+    # more than fits into the pipes
+    symbols = [f'_ZN3foo{len(str(i)) + 3}bar{i}Ev' for i in range(20000)]
+    result = Demangler().demangle(symbols)
+    assert result[0] == 'foo::bar0()'
+    assert result[-1] == 'foo::bar19999()'
+
+
+def test_demangler_restart():
+    demangler = Demangler()
+    demangler.demangle(['_Z3foov'])
+    demangler.process.kill()
+    demangler.process.wait()
+    assert demangler.demangle(['_Z3barv']) == ['bar()']
+    demangler.close()
+
+
+@pytest.mark.parametrize('command', [['false'], ['not-existing-demangler']])
+def test_demangler_failure(command):
+    with pytest.raises(OSError):
+        Demangler(command).demangle(['_Z3foov'])
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import pytest
+from rpmlint.elffile import ElfError, read_elf_objects
+from rpmlint.readelfparser import ReadelfParser
+
+from Testing import get_tested_path
+
+
+READELF_DIR = get_tested_path('readelf')
+
+
+def _summary(parser):
+    return {
+        'sections': [[(s.name, s.size) for s in elf_file] for elf_file in parser.section_info.elf_files],
+        'pic': parser.section_info.pic,
+        'headers': [(h.name, h.flags) for h in parser.program_header_info.headers],
+        'dynamic': [(d.key, d.value) for d in parser.dynamic_section_info.sections],
+        'soname': parser.dynamic_section_info.soname,
+        'needed': parser.dynamic_section_info.needed,
+        'runpaths': parser.dynamic_section_info.runpaths,
+        'functions': parser.symbol_table_info.functions,
+        'comments': parser.comment_section_info.comments,
+        'failed': parser.parsing_failed_reason(),
+    }
+
+
+@pytest.mark.parametrize('path', sorted(p.name for p in Path(READELF_DIR).iterdir()))
+def test_native_matches_readelf(path):
+    """Test that the native ELF reader gives the same results as readelf."""
+    full_path = str(Path(READELF_DIR, path))
+    native = ReadelfParser(full_path, path)
+    readelf = ReadelfParser(full_path, path, 'readelf')
+    assert _summary(native) == _summary(readelf)
+
+
+@pytest.mark.parametrize('path', ['main.a', 'libutil-2.29.so', 'non-pic-shared-m32.so', 'empty-archive.a'])
+def test_native_reader(path):
+    parser = ReadelfParser(str(Path(READELF_DIR, path)), path)
+    assert parser.backend == 'native'
+
+
+@pytest.mark.parametrize('path', ['small_archive.a', 'libkleeRuntimeFreeStanding.bca', 'not-existing.so'])
+def test_readelf_fallback(path):
+    full_path = str(Path(READELF_DIR, path))
+    with pytest.raises(ElfError):
+        read_elf_objects(full_path)
+    parser = ReadelfParser(full_path, path)
+    assert parser.backend == 'readelf'
+    assert parser.parsing_failed_reason()
+
+
+def test_elf_objects():
+    objects = read_elf_objects(str(Path(READELF_DIR, 'libutil-2.29.so')))
+    assert len(objects) == 1
+    assert ('SONAME', 'Library soname: [libutil.so.1]') in objects[0].dynamic
+    assert ('GNU_STACK', 'RW') in objects[0].program_headers
+    assert [section['name'] for section in objects[0].sections[:2]] == ['', '.note.gnu.build-id']
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        ReadelfParser(str(Path(READELF_DIR, 'main.a')), 'main.a', 'objdump')
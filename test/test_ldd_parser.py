@@ -1,6 +1,8 @@
 from pathlib import Path
+import subprocess
 
 import pytest
+from rpmlint import dynamiclinker
 from rpmlint.checks.BinariesCheck import BinariesCheck
 from rpmlint.filter import Filter
 from rpmlint.lddparser import LddParser
@@ -21,10 +23,10 @@ def get_full_path(path):
     return str(get_tested_path(Path('ldd', path)))
 
 
-def lddparser(path, system_path=None):
+def lddparser(path, system_path=None, backend='native'):
     if system_path is None:
         system_path = path
-    return LddParser(get_full_path(path), system_path, True)
+    return LddParser(get_full_path(path), system_path, True, backend)
 
 
 def run_elf_checks(test, pkg, pkgfile):
@@ -33,16 +35,19 @@ def run_elf_checks(test, pkg, pkgfile):
 
 
 @pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
-def test_unused_dependency():
-    ldd = lddparser('libtirpc.so.3.0.0')
+@pytest.mark.parametrize('backend', LddParser.BACKENDS)
+def test_unused_dependency(backend):
+    ldd = lddparser('libtirpc.so.3.0.0', backend=backend)
+    assert ldd.backend == backend
     assert not ldd.parsing_failed_reason
     assert len(ldd.unused_dependencies) >= 1
     assert 'liXXXsapi_krb5.so.2' in ldd.unused_dependencies
 
 
 @pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
-def test_undefined_symbol():
-    ldd = lddparser('libtirpc.so.3.0.0')
+@pytest.mark.parametrize('backend', LddParser.BACKENDS)
+def test_undefined_symbol(backend):
+    ldd = lddparser('libtirpc.so.3.0.0', backend=backend)
     assert not ldd.parsing_failed_reason
     assert len(ldd.undefined_symbols) >= 22
     assert 'GSS_C_NT_HOSTBASED_SERVICE' in ldd.undefined_symbols
@@ -50,17 +55,66 @@ def test_undefined_symbol():
 
 def test_ldd_parser_failure():
     ldd = lddparser('not-existing-file')
+    assert ldd.backend == 'ldd'
     assert 'not-existing-file: No such file or directory' in ldd.parsing_failed_reason
 
 
 @pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
 def test_dependencies():
-    ldd = lddparser('libtirpc.so.3.0.0')
+    ldd = lddparser('libtirpc.so.3.0.0', backend='ldd')
     assert not ldd.parsing_failed_reason
     assert len(ldd.dependencies) == 5
     assert any(d for d in ldd.dependencies if d.startswith('linux-vdso.so.1'))
 
 
+@pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
+@pytest.mark.parametrize('path', ['libtirpc.so.3.0.0', 'appletviewer', 'opt-dependency', 'usr-dependency'])
+def test_native_matches_ldd(path):
+    """Test that the native resolver gives the same results as ldd."""
+    native = lddparser(path)
+    ldd = lddparser(path, backend='ldd')
+    assert native.backend == 'native'
+    assert native.unused_dependencies == ldd.unused_dependencies
+    assert sorted(native.undefined_symbols) == sorted(ldd.undefined_symbols)
+    # ldd shows the vDSO and the load addresses
+    assert native.dependencies == [dependency.split(' (0x')[0] for dependency in ldd.dependencies
+                                   if not dependency.startswith('linux-vdso.so')]
+
+
+@pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
+def test_native_resolver_without_ldd(monkeypatch):
+    ldd = lddparser('appletviewer', backend='ldd')
+
+    popen = subprocess.Popen
+
+    def popen_without_ldd(args, *rest, **kwargs):
+        assert args[0] != 'ldd'
+        return popen(args, *rest, **kwargs)
+
+    monkeypatch.setattr(subprocess, 'Popen', popen_without_ldd)
+    native = lddparser('appletviewer')
+    assert native.unused_dependencies == ['libFOO.so'] == ldd.unused_dependencies
+    assert native.undefined_symbols == ['JLI_Launch'] == ldd.undefined_symbols
+    assert 'libFOO.so => not found' in native.dependencies
+
+
+@pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
+def test_native_resolver_reset():
+    lddparser('libtirpc.so.3.0.0')
+    assert dynamiclinker._load_object.cache_info().currsize
+    assert dynamiclinker.library_index.cache_info().currsize
+    dynamiclinker.reset()
+    assert not dynamiclinker._load_object.cache_info().currsize
+    assert not dynamiclinker.library_index.cache_info().currsize
+    # the next run loads everything again
+    assert 'GSS_C_NT_HOSTBASED_SERVICE' in lddparser('libtirpc.so.3.0.0').undefined_symbols
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        lddparser('appletviewer', backend='readelf')
+
+
 @pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
 def test_unused_dependency_in_package(binariescheck):
     output, test = binariescheck
@@ -1,7 +1,7 @@
 from pathlib import Path
 
 import pytest
-from rpmlint.lint import Lint
+from rpmlint.lint import Lint, WorkerResult
 from rpmlint.spellcheck import ENCHANT
 
 from Testing import (
@@ -24,7 +24,8 @@ options_preset = {
     'time_report': False,
     'profile': False,
     'ignore_unused_rpmlintrc': False,
-    'checks': None
+    'checks': None,
+    'jobs': 1,
 }
 
 basic_tests = [
@@ -98,6 +99,74 @@ def test_time_report(capsys):
     assert 'TOTAL' in out
 
 
+@pytest.mark.parametrize('packages', [[Path('test/binary/desktopfile-good-0-0.noarch.rpm')]])
+def test_time_report_skipped(capsys, packages):
+    additional_options = {
+        'rpmfile': packages,
+        'time_report': True,
+    }
+    options = {**options_preset, **additional_options}
+    linter = Lint(options)
+    linter.run()
+    out, err = capsys.readouterr()
+    assert linter.skipped_checks['ZipCheck'] == 1
+    assert 'MenuXDGCheck' not in linter.skipped_checks
+    assert 'Skipped checks' in out
+
+
+@pytest.mark.parametrize('packages', [[Path('test/binary/python311-pytest-xprocess-0.23.0-2.4.noarch.rpm')]])
+def test_header_only(capsys, packages):
+    additional_options = {
+        'rpmfile': packages,
+        'header_only': True,
+    }
+    options = {**options_preset, **additional_options}
+    linter = Lint(options)
+    assert 'TagsCheck' in linter.checks
+    assert 'FilesCheck' in linter.checks
+    assert 'BinariesCheck' not in linter.checks
+    linter.run()
+    out, err = capsys.readouterr()
+    assert '1 packages and 0 specfiles checked' in out
+
+
+@pytest.mark.parametrize('packages', [[Path('test/binary/logrotate-0-0.x86_64.rpm')]])
+def test_selective_extraction(capsys, packages):
+    additional_options = {
+        'rpmfile': packages,
+        'checks': 'LogrotateCheck,TagsCheck',
+    }
+    options = {**options_preset, **additional_options}
+    linter = Lint(options)
+    assert linter.content_filter.patterns == ('/etc/logrotate.d/*',)
+    linter.run()
+    out, err = capsys.readouterr()
+    assert 'logrotate-log-dir-not-packaged' in out
+
+    linter = Lint({**options, 'extract_all': True})
+    assert linter.content_filter is None
+    linter.run()
+    out_all, err = capsys.readouterr()
+    assert out[:out.rindex('has taken')] == out_all[:out_all.rindex('has taken')]
+
+    # FilesCheck reads any file
+    assert Lint({**options_preset, 'rpmfile': packages}).content_filter is None
+
+
+@pytest.mark.parametrize('packages', [[Path('test/binary/python311-pytest-xprocess-0.23.0-2.4.noarch.rpm'),
+                                       Path('test/binary/logrotate-0-0.x86_64.rpm')]])
+def test_content_in_memory(capsys, packages):
+    options = {**options_preset, 'rpmfile': packages}
+    Lint(options).run()
+    out, err = capsys.readouterr()
+
+    linter = Lint(options)
+    linter.config.configuration['ContentMemoryBudget'] = 64
+    linter.run()
+    out_memory, err = capsys.readouterr()
+    assert out[:out.rindex('has taken')] == out_memory[:out_memory.rindex('has taken')]
+
+
 def test_explain_unknown(capsys):
     message = ['bullcrap']
     additional_options = {
@@ -251,6 +320,117 @@ def test_run_single(capsys, packages):
     assert not err
 
 
+@pytest.mark.parametrize('packages', [[Path('test/source/wrongsrc-0-0.src.rpm'),
+                                       Path('test/binary/ruby2.5-rubygem-rubyzip-testsuite-1.2.1-0.x86_64.rpm'),
+                                       Path('test/spec/SpecCheck.spec')]])
+def test_run_parallel(capsys, packages):
+    """
+    Test that checking packages in worker processes gives the same output
+    as a serial run.
+    """
+    outputs = []
+    for jobs in (1, 2):
+        additional_options = {
+            'rpmfile': packages,
+            'rpmlintrc': TEST_RPMLINTRC,
+            'jobs': jobs,
+        }
+        options = {**options_preset, **additional_options}
+        linter = Lint(options)
+        linter.checks = _remove_except_zip(linter.checks)
+        linter.run()
+        out, err = capsys.readouterr()
+        assert '2 packages and 1 specfiles checked' in out
+        assert 'unused-rpmlintrc-filter' in out
+        # drop the duration of the run
+        outputs.append(out[:out.rindex('has taken')])
+    assert outputs[0] == outputs[1]
+
+
+def test_merge_worker_result():
+    """
+    Test that the counters of the worker processes add up in the parent.
+    """
+    options = {**options_preset, 'checks': 'ZipCheck'}
+    linter = Lint(options)
+    worker_result = WorkerResult(None, {'ZipCheck': 0.5}, {}, {'ZipCheck': 3}, 1, 0, None, {})
+    linter._merge_worker_result(worker_result)
+    linter._merge_worker_result(worker_result)
+    assert linter.check_duration['ZipCheck'] == 1.0
+    assert linter.checks['ZipCheck'].checked_files == 6
+    assert linter.packages_checked == 2
+
+
+@pytest.mark.parametrize('packages', [[Path('test/spec/SpecCheck.spec'),
+                                       Path('test/spec/SpecCheck2.spec')]])
+def test_run_parallel_prefetch(capsys, packages):
+    """
+    Test that --prefetch is reported as not used with --jobs.
+    """
+    additional_options = {
+        'rpmfile': packages,
+        'jobs': 2,
+        'prefetch': 2,
+    }
+    options = {**options_preset, **additional_options}
+    linter = Lint(options)
+    linter.run()
+    out, err = capsys.readouterr()
+    assert '0 packages and 2 specfiles checked' in out
+    assert '--prefetch is ignored with --jobs' in err
+
+
+@pytest.mark.parametrize('packages', [[Path('test/source/wrongsrc-0-0.src.rpm'),
+                                       Path('test/binary/ruby2.5-rubygem-rubyzip-testsuite-1.2.1-0.x86_64.rpm')]])
+def test_run_cached(capsys, packages, tmp_path):
+    """
+    Test that results replayed from the result cache give the same output
+    as checking the packages.
+    """
+    cache_config = tmp_path / 'cache.toml'
+    cache_config.write_text(f'CacheDir = "{tmp_path}"\n')
+    outputs = []
+    for _ in range(2):
+        additional_options = {
+            'rpmfile': packages,
+            'rpmlintrc': TEST_RPMLINTRC,
+            'config': TEST_CONFIG + [cache_config],
+        }
+        options = {**options_preset, **additional_options}
+        linter = Lint(options)
+        linter.checks = _remove_except_zip(linter.checks)
+        linter.run()
+        out, err = capsys.readouterr()
+        assert '2 packages and 0 specfiles checked' in out
+        outputs.append(out[:out.rindex('has taken')])
+        cache = linter.result_cache
+    assert cache.hits == 2
+    assert outputs[0] == outputs[1]
+
+
+@pytest.mark.parametrize('packages', [[Path('test/binary/ruby2.5-rubygem-rubyzip-testsuite-1.2.1-0.x86_64.rpm')]])
+def test_run_cached_header_only(capsys, packages, tmp_path):
+    """
+    Test that results of a --header-only run are not replayed for a full
+    run of the same checks.
+    """
+    cache_config = tmp_path / 'cache.toml'
+    cache_config.write_text(f'CacheDir = "{tmp_path}"\n')
+    for header_only in (True, False):
+        additional_options = {
+            'rpmfile': packages,
+            'config': TEST_CONFIG + [cache_config],
+            'checks': 'TagsCheck',
+            'header_only': header_only,
+        }
+        options = {**options_preset, **additional_options}
+        linter = Lint(options)
+        linter.run()
+        capsys.readouterr()
+        cache = linter.result_cache
+        assert (cache.hits, cache.misses) == (0, 1)
+
+
 @pytest.mark.skipif(not HAS_RPMDB, reason='No RPM database present')
 @pytest.mark.parametrize('packages', [Path('test/source/wrongsrc-0-0.src.rpm')])
 def test_run_installed(capsys, packages):
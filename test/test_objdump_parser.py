@@ -1,4 +1,6 @@
 from pathlib import Path
+import shutil
+import subprocess
 
 import pytest
 from rpmlint.checks.BinariesCheck import BinariesCheck
@@ -21,10 +23,10 @@ def get_full_path(path):
     return str(get_tested_path(Path('readelf', path)))
 
 
-def objdumpparser(path, system_path=None):
+def objdumpparser(path, system_path=None, backend='native'):
     if system_path is None:
         system_path = path
-    return ObjdumpParser(get_full_path(path), system_path)
+    return ObjdumpParser(get_full_path(path), system_path, backend)
 
 
 def run_elf_checks(test, pkg, pkgfile):
@@ -33,7 +35,7 @@ def run_elf_checks(test, pkg, pkgfile):
 
 
 def test_basic():
-    objdump = objdumpparser('executable-stack', '/lib64/executable-stack')
+    objdump = objdumpparser('executable-stack', '/lib64/executable-stack', 'objdump')
     assert not objdump.parsing_failed_reason
     assert len(objdump.compile_units) == 5
     first = objdump.compile_units[0]
@@ -43,6 +45,50 @@ def test_basic():
     assert first['language'] == '32769\t(MIPS assembler)'
 
 
+@pytest.mark.parametrize('path', ['executable-stack', 'call-mktemp', 'libgame.so', 'rpath-lib.so',
+                                  'non-pic-shared-m32.so', 'hostname', 'lto-object.o'])
+def test_native_producers(path):
+    native = objdumpparser(path)
+    objdump = objdumpparser(path, backend='objdump')
+    assert native.backend == 'native'
+    assert not native.parsing_failed_reason
+    assert native.compile_units == [{'producer': unit['producer']} for unit in objdump.compile_units]
+
+
+@pytest.mark.parametrize('compression', ['zlib', 'zlib-gnu', 'zstd'])
+def test_native_compressed(compression, tmp_path):
+    compressed = str(tmp_path / 'executable-stack')
+    r = subprocess.run(['objcopy', f'--compress-debug-sections={compression}', get_full_path('executable-stack'),
+                        compressed], capture_output=True)
+    if r.returncode:
+        pytest.skip(f'objcopy does not support {compression} compression')
+    objdump = ObjdumpParser(compressed, 'executable-stack')
+    assert objdump.backend == 'native'
+    assert objdump.compile_units == objdumpparser('executable-stack').compile_units
+    assert objdump.compile_units[0]['producer'] == 'GNU AS 2.32'
+
+
+def test_native_fallback():
+    # object files in the archive have relocated debug sections
+    objdump = objdumpparser('archive-with-debuginfo.a')
+    assert objdump.backend == 'objdump'
+    assert objdump.compile_units
+
+
+def test_native_truncated(tmp_path):
+    truncated = tmp_path / 'executable-stack'
+    shutil.copy(get_full_path('executable-stack'), truncated)
+    with open(truncated, 'r+b') as f:
+        f.truncate(f.seek(0, 2) - 4096)
+    objdump = ObjdumpParser(str(truncated), 'executable-stack')
+    assert objdump.backend == 'objdump'
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        objdumpparser('executable-stack', backend='dwarfdump')
+
+
 @pytest.mark.skipif(not IS_X86_64, reason='x86-64 only')
 def test_executable_stack_package(binariescheck):
     output, test = binariescheck
@@ -0,0 +1,148 @@
+import io
+import os
+from pathlib import Path
+import stat
+
+import pytest
+from rpmlint.payload import extract_cpio, PayloadContent, PayloadError
+from rpmlint.pkg import Pkg
+
+from Testing import get_tested_path
+
+
+def cpio_entry(name, mode, data=b'', ino=1, nlink=1):
+    name = name.encode() + b'\0'
+    fields = (ino, mode, 0, 0, nlink, 1000, len(data), 0, 0, 0, 0, len(name), 0)
+    entry = b'070701' + b''.join(b'%08X' % value for value in fields) + name
+    entry += b'\0' * (-len(entry) % 4)
+    return entry + data + b'\0' * (-len(data) % 4)
+
+
+def test_extract_cpio(tmp_path):
+    archive = b''.join((
+        cpio_entry('./usr', 0o40555),
+        cpio_entry('./usr/bin/foo', 0o100700, b'#!/bin/sh\n', ino=2),
+        cpio_entry('./usr/bin/bar', 0o120777, b'foo', ino=3),
+        cpio_entry('./usr/lib/a', 0o100600, ino=4, nlink=2),
+        cpio_entry('./usr/lib/b', 0o100600, b'data', ino=4, nlink=2),
+        cpio_entry('./dev/null', 0o20666, ino=5),
+        cpio_entry('../outside', 0o100644, b'data', ino=6),
+        cpio_entry('TRAILER!!!', 0),
+    ))
+    extract_cpio(io.BytesIO(archive), tmp_path)
+
+    assert stat.S_IMODE((tmp_path / 'usr').stat().st_mode) == 0o555
+    assert (tmp_path / 'usr/bin/foo').read_bytes() == b'#!/bin/sh\n'
+    assert stat.S_IMODE((tmp_path / 'usr/bin/foo').stat().st_mode) == 0o755
+    assert os.readlink(tmp_path / 'usr/bin/bar') == 'foo'
+    assert (tmp_path / 'usr/lib/a').read_bytes() == b'data'
+    assert (tmp_path / 'usr/lib/a').stat().st_ino == (tmp_path / 'usr/lib/b').stat().st_ino
+    assert stat.S_IMODE((tmp_path / 'usr/lib/b').stat().st_mode) == 0o644
+    assert not (tmp_path / 'dev/null').exists()
+    assert not (tmp_path.parent / 'outside').exists()
+
+
+def test_extract_cpio_wanted(tmp_path):
+    archive = b''.join((
+        cpio_entry('./usr/bin/foo', 0o100755, b'#!/bin/sh\n', ino=2),
+        cpio_entry('./usr/share/foo', 0o100644, b'data', ino=3),
+        cpio_entry('TRAILER!!!', 0),
+    ))
+    extract_cpio(io.BytesIO(archive), tmp_path, {'usr/share/foo'})
+
+    assert (tmp_path / 'usr/share/foo').read_bytes() == b'data'
+    assert (tmp_path / 'usr/bin/foo').read_bytes() == b''
+    assert stat.S_IMODE((tmp_path / 'usr/bin/foo').stat().st_mode) == 0o755
+
+
+def test_extract_cpio_memory(tmp_path):
+    archive = b''.join((
+        cpio_entry('./usr/bin/foo', 0o100555, b'#!/bin/sh\n', ino=2),
+        cpio_entry('./usr/share/foo', 0o100644, b'data' * 10, ino=3),
+        cpio_entry('TRAILER!!!', 0),
+    ))
+    memory = PayloadContent(tmp_path, 16)
+    extract_cpio(io.BytesIO(archive), tmp_path, memory=memory)
+
+    # over the budget
+    assert memory.get('/usr/share/foo') is None
+    assert (tmp_path / 'usr/share/foo').read_bytes() == b'data' * 10
+    assert memory.get('/usr/bin/foo') == b'#!/bin/sh\n'
+    assert (tmp_path / 'usr/bin/foo').read_bytes() == b''
+
+    memory.materialize('/usr/bin/foo')
+    assert memory.get('/usr/bin/foo') is None
+    assert memory.materialized == 1
+    assert (tmp_path / 'usr/bin/foo').read_bytes() == b'#!/bin/sh\n'
+    assert stat.S_IMODE((tmp_path / 'usr/bin/foo').stat().st_mode) == 0o555
+    assert (tmp_path / 'usr/bin/foo').stat().st_mtime == 1000
+
+
+def test_extract_cpio_symlink_traversal(tmp_path):
+    victim = tmp_path / 'victim'
+    victim.mkdir()
+    (victim / 'file').write_bytes(b'keep')
+    root = tmp_path / 'root'
+    root.mkdir()
+    archive = b''.join((
+        cpio_entry('./link', 0o120777, str(victim).encode(), ino=2),
+        cpio_entry('./link/pwned', 0o100644, b'data', ino=3),
+        cpio_entry('./link/file', 0o100644, b'data', ino=4),
+        cpio_entry('./hard', 0o100644, ino=5, nlink=2),
+        cpio_entry('./link/hard', 0o100644, b'data', ino=5, nlink=2),
+        cpio_entry('./link2', 0o120777, str(victim).encode(), ino=6),
+        cpio_entry('./link2/sym', 0o120777, b'x', ino=8),
+        cpio_entry('TRAILER!!!', 0),
+    ))
+    extract_cpio(io.BytesIO(archive), root)
+
+    assert sorted(p.name for p in victim.iterdir()) == ['file']
+    assert (victim / 'file').read_bytes() == b'keep'
+    # the files are extracted under a real directory, the symlink is skipped
+    assert (root / 'link/pwned').read_bytes() == b'data'
+    assert not (root / 'link').is_symlink()
+    assert (root / 'hard').read_bytes() == b'data'
+    assert os.readlink(root / 'link2') == str(victim)
+    # the symlink through the previous one is skipped
+    assert not (victim / 'sym').is_symlink()
+
+
+def test_extract_cpio_unsupported(tmp_path):
+    with pytest.raises(PayloadError):
+        extract_cpio(io.BytesIO(b'07070X' + b'0' * 104), tmp_path)
+
+
+@pytest.mark.parametrize('fields', [b'z' * 104, b'-0000001' + b'0' * 96])
+def test_extract_cpio_malformed(tmp_path, fields):
+    with pytest.raises(PayloadError, match='malformed cpio header'):
+        extract_cpio(io.BytesIO(b'070701' + fields), tmp_path)
+
+
+def _tree(path):
+    tree = {}
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            fullname = Path(root, name)
+            st = fullname.lstat()
+            if stat.S_ISLNK(st.st_mode):
+                content = os.readlink(fullname)
+            elif stat.S_ISREG(st.st_mode):
+                content = fullname.read_bytes()
+            else:
+                content = None
+            tree[str(fullname.relative_to(path))] = (stat.S_IFMT(st.st_mode), content)
+    return tree
+
+
+@pytest.mark.parametrize('package', ['binary/python311-pytest-xprocess', 'binary/libtest'])
+def test_extract_payload_matches_external(package, tmp_path):
+    """
+    Test that the in-process extraction gives the same tree as
+    rpm2archive/rpm2cpio.
+    """
+    filename = sorted(get_tested_path(package).parent.glob(Path(package).name + '*.rpm'))[0]
+    external = tmp_path / 'external'
+    external.mkdir()
+    with Pkg(filename, tmp_path) as pkg:
+        pkg._extract_rpm_external(external, False)
+        assert _tree(pkg.dirname) == _tree(external)
@@ -1,8 +1,20 @@
+from collections import Counter
+import os
+from pathlib import Path
+import stat
+import time
+from types import SimpleNamespace
+
 import pytest
 import rpm
-from rpmlint.pkg import parse_deps, rangeCompare
+from rpmlint.checks.AbstractCheck import AbstractFilesCheck
+from rpmlint.checks.MenuXDGCheck import MenuXDGCheck
+from rpmlint.checks.ZipCheck import ZipCheck
+from rpmlint.filter import Filter
+from rpmlint.pkg import (ContentFilter, FakeHeader, FakePkg, FileSet, FileTable, PackageIndex,
+                         parse_deps, paused_prefetching, Pkg, PkgPrefetcher, rangeCompare)
 
-from Testing import get_tested_package
+from Testing import CONFIG, get_tested_mock_package, get_tested_package, get_tested_path
 
 
 def test_parse_deps():
@@ -27,3 +39,279 @@ def test_range_compare():
 @pytest.mark.parametrize('package', ['binary/python311-pytest-xprocess'])
 def test_extract(package, tmp_path):
     get_tested_package(package, tmp_path)
+
+
+@pytest.mark.parametrize('package', ['binary/python311-pytest-xprocess'])
+def test_header_only(package, tmp_path):
+    filename = next(get_tested_path(package).parent.glob(Path(package).name + '-*.rpm'))
+    with Pkg(filename, tmp_path, header_only=True) as pkg:
+        assert pkg.header_only
+        assert pkg.files
+        assert not list(Path(pkg.dirname).iterdir())
+
+
+@pytest.mark.parametrize('package', ['binary/python311-pytest-xprocess'])
+def test_content_filter(package, tmp_path):
+    filename = next(get_tested_path(package).parent.glob(Path(package).name + '-*.rpm'))
+    content_filter = ContentFilter(['*.py'])
+    with Pkg(filename, tmp_path, content_filter=content_filter) as pkg:
+        selected = {'/' + name for name in content_filter.select(pkg.header)}
+        regular_files = [pkgfile for pkgfile in pkg.files.values()
+                         if stat.S_ISREG(pkgfile.mode) and not pkgfile.is_ghost]
+        assert {f.name for f in regular_files if f.name.endswith('.py')} <= selected
+        assert any(f.name not in selected and f.size for f in regular_files)
+        inodes = Counter(f.inode for f in regular_files)
+        for pkgfile in regular_files:
+            # the files not selected are there, just without any content,
+            # hardlinks are always extracted
+            full = pkgfile.name in selected or inodes[pkgfile.inode] > 1
+            expected_size = pkgfile.size if full else 0
+            assert Path(pkgfile.path).stat().st_size == expected_size
+
+
+@pytest.mark.parametrize('package', ['binary/python311-pytest-xprocess'])
+def test_content_in_memory(package, tmp_path):
+    filename = next(get_tested_path(package).parent.glob(Path(package).name + '-*.rpm'))
+    (tmp_path / 'disk').mkdir()
+    with Pkg(filename, tmp_path / 'disk') as expected, \
+            Pkg(filename, tmp_path, content_budget=64 * 1024 * 1024) as pkg:
+        assert pkg.content is not None
+        for name, pkgfile in pkg.files.items():
+            if not stat.S_ISREG(pkgfile.mode) or pkgfile.is_ghost or not pkgfile.size:
+                continue
+            content = Path(expected.files[name].path).read_bytes()
+            if pkg.content.get(name) is None:
+                # hardlinks are written to the disk right away
+                continue
+            assert pkgfile.magic == expected.files[name].magic
+            assert pkg.read_with_mmap(name) == expected.read_with_mmap(name)
+            with pkg.open_file(name) as f:
+                assert f.read() == content
+            # the file is written out when a tool needs its path
+            assert Path(pkg.dirname, name.lstrip('/')).stat().st_size == 0
+            assert Path(pkgfile.path).read_bytes() == content
+            assert pkg.content.get(name) is None
+        assert pkg.content.materialized
+
+
+@pytest.mark.parametrize('package', ['binary/python311-pytest-xprocess'])
+def test_file_table(package, tmp_path):
+    with get_tested_package(package, tmp_path) as pkg:
+        files = pkg.files
+        assert isinstance(files, FileTable)
+        assert len(files) == len(list(files))
+        assert '/does/not/exist' not in files
+        assert files.get('/does/not/exist') is None
+        for name, pkgfile in files.items():
+            assert name in files
+            assert pkgfile.name == name
+            assert pkgfile.path == str(Path(pkg.dirname, name.lstrip('/')))
+            assert isinstance(pkgfile.user, str) and isinstance(pkgfile.mode, int)
+            assert isinstance(pkgfile.requires, list)
+            assert (name in pkg.doc_files) == pkgfile.is_doc
+            assert (name in pkg.ghost_files) == pkgfile.is_ghost
+            assert (name in pkg.config_files) == pkgfile.is_config
+        # magic is the only column checks may adjust
+        pkgfile = files[name]
+        pkgfile.magic = 'data'
+        assert files[name].magic == 'data'
+        with pytest.raises(AttributeError):
+            pkgfile.mode = 0
+
+
+def test_lazy_magic(tmp_path, monkeypatch):
+    calls = []
+    calc_magic = Pkg._calc_magic
+
+    def counting_calc_magic(self, pkgfile, magic=None):
+        calls.append(pkgfile.name)
+        return calc_magic(self, pkgfile, magic)
+
+    monkeypatch.setattr(Pkg, '_calc_magic', counting_calc_magic)
+    with get_tested_package('binary/python311-pytest-xprocess', tmp_path) as pkg:
+        assert not calls
+        name = next(iter(pkg.files))
+        magic = pkg.files[name].magic
+        assert pkg.files[name].magic == magic
+        assert calls == [name]
+
+
+@pytest.mark.parametrize('package', ['binary/python311-pytest-xprocess', 'binary/libtest'])
+def test_detect_magic(package, tmp_path):
+    (tmp_path / 'lazy').mkdir()
+    with get_tested_package(package, tmp_path) as pkg, \
+            get_tested_package(package, tmp_path / 'lazy') as expected:
+        pkg.detect_magic()
+        assert not pkg.files.unknown_magic()
+        for name, pkgfile in pkg.files.items():
+            assert pkgfile.magic == expected.files[name].magic
+        assert pkg.timers['libmagic-cpu'] >= 0
+
+
+@pytest.mark.parametrize('package', ['binary/python311-pytest-xprocess'])
+def test_tag_cache(package, tmp_path, monkeypatch):
+    monkeypatch.delenv('LANGUAGE', raising=False)
+    with get_tested_package(package, tmp_path) as pkg:
+        assert pkg[rpm.RPMTAG_NAME] == 'python311-pytest-xprocess'
+        assert pkg[rpm.RPMTAG_NAME] is pkg[rpm.RPMTAG_NAME]
+        assert pkg[rpm.RPMTAG_PREIN] is None
+        # lists are copied so that the callers can not break the cache
+        filenames = pkg[rpm.RPMTAG_FILENAMES]
+        filenames.clear()
+        assert pkg[rpm.RPMTAG_FILENAMES]
+        assert pkg.langtag(rpm.RPMTAG_SUMMARY, 'C') == pkg[rpm.RPMTAG_SUMMARY]
+        assert pkg.langtag(rpm.RPMTAG_SUMMARY, 'C') is pkg.langtag(rpm.RPMTAG_SUMMARY, 'C')
+        assert 'LANGUAGE' not in os.environ
+
+
+def test_file_index():
+    pkg = get_tested_mock_package(files=['/usr/bin/foo', '/usr/lib/foo/foo.so', '/usr/lib/foo/a/b', '/usr/lib/foobar'])
+    index = pkg.file_index()
+    assert index.in_dir('/usr/lib/foo') == ['/usr/lib/foo/foo.so']
+    assert index.in_dir('/usr/lib/foo/') == ['/usr/lib/foo/foo.so']
+    assert index.named('foo') == ['/usr/bin/foo']
+    assert index.named('bar') == []
+    assert index.with_prefix('/usr/lib/foo/') == ['/usr/lib/foo/a/b', '/usr/lib/foo/foo.so']
+    assert index.with_prefix('/usr/lib/foo') == ['/usr/lib/foo/a/b', '/usr/lib/foo/foo.so', '/usr/lib/foobar']
+    assert index.with_prefix('/opt') == []
+    assert pkg.file_index() is index
+    pkg.add_symlink_to('/usr/bin/bar', 'foo')
+    assert pkg.file_index().named('bar') == ['/usr/bin/bar']
+
+
+def test_file_set():
+    files = FileSet(['/b', '/a', '/b'])
+    assert list(files) == ['/b', '/a']
+    assert '/a' in files and '/c' not in files
+    assert len(files) == 2
+    assert files == {'/a', '/b'}
+    assert not FileSet()
+
+
+class _CountingFilesCheck(AbstractFilesCheck):
+    def __init__(self):
+        super().__init__(CONFIG, Filter(CONFIG), r'.*')
+
+    def check_file(self, pkg, filename):
+        pkg.file_index().in_dir(pkg.files[filename].name.rsplit('/', 1)[0])
+        return filename in pkg.doc_files
+
+
+def _synthetic_package(count):
+    """Return FakePkg with a FileTable of count files, every 10th one ghost, every 3rd doc."""
+    names = [f'/usr/share/foo/{i // 100}/file{i}'.encode() for i in range(count)]
+    header = FakeHeader({
+        rpm.RPMTAG_FILENAMES: names,
+        rpm.RPMTAG_FILEFLAGS: [(rpm.RPMFILE_GHOST if not i % 10 else 0) |
+                               (rpm.RPMFILE_DOC if not i % 3 else 0) for i in range(count)],
+        rpm.RPMTAG_FILEMODES: [0o100644] * count,
+        rpm.RPMTAG_FILESIZES: [1] * count,
+        rpm.RPMTAG_FILEMTIMES: [0] * count,
+        rpm.RPMTAG_FILERDEVS: [0] * count,
+        rpm.RPMTAG_FILEINODES: list(range(count)),
+        rpm.RPMTAG_FILEUSERNAME: [b'root'] * count,
+        rpm.RPMTAG_FILEGROUPNAME: [b'root'] * count,
+        rpm.RPMTAG_FILECLASS: [b'ASCII text'] * count,
+        rpm.RPMTAG_FILELINKTOS: [b''] * count,
+        rpm.RPMTAG_FILEMD5S: [''] * count,
+        rpm.RPMTAG_FILEREQUIRE: [b''] * count,
+        rpm.RPMTAG_FILEPROVIDE: [b''] * count,
+        rpm.RPMTAG_FILELANGS: [b''] * count,
+        rpm.RPMTAG_FILECAPS: [b''] * count,
+    })
+    pkg = FakePkg('synthetic')
+    pkg.files = FileTable(header, '/')
+    pkg.doc_files = pkg.files.names_with_flag(rpm.RPMFILE_DOC)
+    pkg.ghost_files = pkg.files.names_with_flag(rpm.RPMFILE_GHOST)
+    return pkg
+
+
+def test_file_sets_scale_linearly():
+    """
+    Benchmark the per-file lookups of the checks on a package with 200k
+    files, ten times the files must not take (much) more than ten times
+    longer.
+    """
+    timings = {}
+    for count in (20000, 200000):
+        pkg = _synthetic_package(count)
+        check = _CountingFilesCheck()
+        best = None
+        for _ in range(3):
+            start = time.perf_counter()
+            check.check_binary(pkg)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            check.reset()
+        timings[count] = best
+    check.check_binary(pkg)
+    assert check.checked_files == 180000
+    # quadratic membership tests would be 100 times slower
+    assert timings[200000] < timings[20000] * 30
+
+
+@pytest.mark.parametrize('budget', [0, 1])
+def test_prefetch(budget, tmp_path):
+    packages = sorted(get_tested_path('binary').glob('libtest*.rpm'))
+    assert len(packages) > 2
+    with PkgPrefetcher(packages, tmp_path, 2, budget) as prefetcher:
+        for filename in packages[:-1]:
+            with prefetcher.open_pkg(filename) as pkg:
+                assert pkg.filename == filename
+                assert Path(pkg.dirname).is_dir()
+            assert not Path(pkg.dirname).exists()
+    # the last package was extracted but never requested
+    assert not list(tmp_path.iterdir())
+
+
+def test_prefetch_paused(tmp_path, monkeypatch):
+    started = []
+
+    def failing_read_header(filename):
+        started.append(filename)
+        raise OSError(filename)
+
+    monkeypatch.setattr('rpmlint.pkg.read_header', failing_read_header)
+    with PkgPrefetcher(['a.rpm'], tmp_path, 1) as prefetcher:
+        with paused_prefetching():
+            prefetcher.skip('x.rpm')
+            time.sleep(0.2)
+            assert not started
+        with pytest.raises(OSError):
+            with prefetcher.open_pkg('a.rpm'):
+                pass
+    assert started == ['a.rpm']
+
+
+@pytest.mark.parametrize('files,zip_check,menu_check', [
+    (['/usr/share/java/foo.jar'], True, False),
+    (['/usr/share/applications/foo.desktop', '/usr/bin/foo'], False, True),
+    (['/usr/share/doc/foo/README'], False, False),
+])
+def test_check_applicability(files, zip_check, menu_check):
+    output = Filter(CONFIG)
+    pkg = get_tested_mock_package(files=files)
+    index = PackageIndex(pkg)
+    assert ZipCheck(CONFIG, output).is_applicable(pkg, index) == zip_check
+    assert MenuXDGCheck(CONFIG, output).is_applicable(pkg, index) == menu_check
+    assert index.has_files(['/usr/*']) and not index.has_files(['/opt/*'])
+
+
+def test_has_magic_lazy():
+    class File:
+        def __init__(self, magic):
+            self._magic = magic
+
+        @property
+        def magic(self):
+            looked_at.append(self._magic)
+            return self._magic
+
+    looked_at = []
+    pkg = SimpleNamespace(files={'/usr/share/doc/README': File('ASCII text'),
+                                 '/usr/bin/foo': File('ELF 64-bit LSB executable'),
+                                 '/usr/lib64/libfoo.so.1': File('ELF 64-bit LSB shared object')})
+    assert PackageIndex(pkg).has_magic(['ELF '], ['*.so.*'])
+    # the search stops at the first match
+    assert looked_at == ['ELF 64-bit LSB shared object']
+    assert not PackageIndex(pkg).has_magic(['Zip archive'])
@@ -1,12 +1,14 @@
 from pathlib import Path
 import re
+import subprocess
+import time
 
 import pytest
 from rpmlint.checks.BinariesCheck import BinariesCheck
 from rpmlint.filter import Filter
 from rpmlint.pkg import FakePkg, get_magic
 from rpmlint.pkgfile import PkgFile
-from rpmlint.readelfparser import ReadelfParser
+from rpmlint.readelfparser import readelf_extra_flags, ReadelfParser
 
 from Testing import CONFIG, get_tested_path, HAS_32BIT_GLIBC, IS_I686, IS_X86_64
 
@@ -183,6 +185,42 @@ def test_readelf_failure_in_package(binariescheck):
         assert 'readelf-failed /lib64/not-existing.so' in out
 
 
+def test_readelf_single_run(monkeypatch):
+    """
+    Compare forks and wall time per binary of running readelf once per file
+    with running it for every parser and probing its flags every time (as
+    it used to be done).
+    """
+    calls = []
+
+    class CountingPopen(subprocess.Popen):
+        def __init__(self, args, *rest, **kwargs):
+            calls.append(args)
+            super().__init__(args, *rest, **kwargs)
+
+    def separate(path):
+        extra_flags = readelf_extra_flags.__wrapped__()
+        for info in ReadelfParser.INFO_CLASSES.values():
+            info(path, extra_flags)
+
+    def single(path):
+        ReadelfParser(path, path, 'readelf')
+
+    monkeypatch.setattr(subprocess, 'Popen', CountingPopen)
+    paths = sorted(str(path) for path in get_tested_path('readelf').iterdir())
+    readelf_extra_flags()
+    results = {}
+    for name, func in (('separate', separate), ('single', single)):
+        calls.clear()
+        start = time.perf_counter()
+        for path in paths:
+            func(path)
+        results[name] = (len(calls) / len(paths), (time.perf_counter() - start) / len(paths))
+        print(f'{name}: {results[name][0]:.1f} forks, {results[name][1] * 1000:.1f} ms per binary')
+    assert results['separate'][0] == 6
+    assert results['single'][0] == 1
+
+
 def test_readelf_single_error_message(binariescheck):
     output, test = binariescheck
     with FakePkg('fake') as pkg:
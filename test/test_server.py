@@ -0,0 +1,53 @@
+import multiprocessing
+import time
+
+import pytest
+from rpmlint.cli import process_lint_args
+from rpmlint.lint import Lint
+from rpmlint.server import LintServer, run_client
+
+from Testing import get_tested_path, TEST_CONFIG
+
+TEST_RPMLINTRC = get_tested_path('configs/testing2-rpmlintrc')
+
+
+@pytest.fixture
+def server_socket(tmp_path):
+    socket_path = tmp_path / 'rpmlint.sock'
+    options = process_lint_args(['--server', str(socket_path), '-c', str(TEST_CONFIG[0])])
+    server = LintServer(socket_path, options, process_lint_args)
+    process = multiprocessing.get_context('fork').Process(target=server.serve_forever)
+    process.start()
+    for _ in range(100):
+        if socket_path.exists():
+            break
+        time.sleep(0.1)
+    yield socket_path
+    process.terminate()
+    process.join()
+
+
+@pytest.mark.parametrize('argv', [
+    ['-r', str(TEST_RPMLINTRC), 'test/source/wrongsrc-0-0.src.rpm', 'test/spec/SpecCheck.spec'],
+    ['test/source/wrongsrc-0-0.src.rpm', 'test/spec/SpecCheck.spec'],
+    ['--checks', 'SpecCheck', '-s', 'test/spec/SpecCheck.spec'],
+])
+def test_server(capsys, server_socket, argv):
+    """
+    Test that the server gives the same output as a direct run, twice in
+    a row to make sure nothing leaks to the next request.
+    """
+    argv = ['-c', str(TEST_CONFIG[0])] + argv
+    retcode = Lint(process_lint_args(argv)).run()
+    out, err = capsys.readouterr()
+    expected = out[:out.rindex('has taken')]
+    for _ in range(2):
+        assert run_client(server_socket, argv) == retcode
+        out, err = capsys.readouterr()
+        assert out[:out.rindex('has taken')] == expected
+
+
+def test_server_exit_code(capsys, server_socket):
+    assert run_client(server_socket, ['test/source/does-not-exist.rpm']) == 2
+    out, err = capsys.readouterr()
+    assert 'does not exist' in err
@@ -0,0 +1,47 @@
+import re
+import subprocess
+
+import pytest
+import rpmlint.stringsparser
+from rpmlint.stringsparser import iter_strings, StringsParser
+
+from Testing import get_tested_path
+
+
+def get_full_path(path):
+    return str(get_tested_path('readelf', path))
+
+
+@pytest.mark.parametrize('path', ['libutil-2.29.so', 'main.a', 'hostname'])
+@pytest.mark.parametrize('block_size', [7, 1024, 1024 * 1024])
+def test_iter_strings(path, block_size, monkeypatch):
+    monkeypatch.setattr(rpmlint.stringsparser, 'BLOCK_SIZE', block_size)
+    strings = subprocess.run(['strings', get_full_path(path)], capture_output=True).stdout
+    assert list(iter_strings(get_full_path(path))) == strings.decode().splitlines()
+
+
+@pytest.mark.parametrize('waivers', [
+    {'glibc': 'GLIBC_2\\.2\\.5', 'anchored': '^libc\\.so\\.6$', 'missing': 'NOT-THERE', 'group': '(lib)util'},
+    {'flags': '(?i)glibc_PRIVATE', 'word': '\\bmain\\b', 'missing': '^GLIBC$'},
+])
+def test_waivers(waivers):
+    path = get_full_path('libutil-2.29.so')
+    waivers = {name: re.compile(regex) for name, regex in waivers.items()}
+    strings = list(iter_strings(path))
+    parser = StringsParser(path, waivers)
+    assert not parser.parsing_failed_reason
+    assert parser.waived == {name for name, regex in waivers.items() if any(regex.search(s) for s in strings)}
+    assert parser.waived
+    assert 'missing' not in parser.waived
+
+
+def test_waivers_dict():
+    path = get_full_path('libutil-2.29.so')
+    parser = StringsParser(path, {'glibc': re.compile('GLIBC_2\\.2\\.5')})
+    restored = StringsParser.from_dict(path, parser.to_dict())
+    assert restored.waived == parser.waived == {'glibc'}
+
+
+def test_strings_parser_failure():
+    parser = StringsParser(get_full_path('not-existing'), {'glibc': re.compile('GLIBC')})
+    assert 'No such file or directory' in parser.parsing_failed_reason
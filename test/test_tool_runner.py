@@ -0,0 +1,97 @@
+import signal
+import subprocess
+import time
+
+import pytest
+from rpmlint.toolrunner import ToolRunner
+
+
+def test_run():
+    runner = ToolRunner()
+    r = runner.run(['echo', 'hello'], capture_output=True, encoding='utf8')
+    assert r.returncode == 0
+    assert r.stdout == 'hello\n'
+    assert runner.stats['echo'].calls == 1
+    assert runner.stats['echo'].output_size == len('hello\n')
+    assert not runner.stats['echo'].timeouts
+
+
+def test_run_failure():
+    runner = ToolRunner()
+    with pytest.raises(subprocess.CalledProcessError):
+        runner.run(['false'], check=True)
+    with pytest.raises(FileNotFoundError):
+        runner.run(['not-existing-tool'])
+    assert runner.stats['false'].calls == 1
+    assert runner.stats['not-existing-tool'].calls == 1
+
+
+def test_shell_tool_name():
+    runner = ToolRunner()
+    r = runner.run('echo a | cat', shell=True, stdout=subprocess.PIPE)
+    assert r.stdout == b'a\n'
+    assert list(runner.stats) == ['echo']
+
+
+def test_timeout():
+    runner = ToolRunner(timeouts={'sleep': 0.2})
+    start = time.monotonic()
+    r = runner.run(['sleep', '10'], capture_output=True, encoding='utf8')
+    assert time.monotonic() - start < 5
+    assert r.returncode == -signal.SIGKILL
+    assert r.stdout == ''
+    assert r.stderr == 'sleep timed out after 0.2 s'
+    assert runner.stats['sleep'].timeouts == 1
+    r = runner.run(['sleep', '10'], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    assert r.stdout == b'sleep timed out after 0.2 s'
+
+
+def test_caller_timeout():
+    runner = ToolRunner(timeouts={'sleep': 10})
+    start = time.monotonic()
+    r = runner.run(['sleep', '10'], timeout=0.2, capture_output=True, encoding='utf8')
+    assert time.monotonic() - start < 5
+    assert r.stderr == 'sleep timed out after 0.2 s'
+    r = ToolRunner(timeouts={'sleep': 0.2}).run(['sleep', '10'], timeout=10, capture_output=True, encoding='utf8')
+    assert r.stderr == 'sleep timed out after 0.2 s'
+
+
+def test_timeout_kills_group(tmp_path):
+    runner = ToolRunner(timeouts={'sh': 0.2})
+    marker = tmp_path / 'marker'
+    r = runner.run(f'(sleep 0.5; touch {marker}) | cat', 'sh', shell=True, capture_output=True)
+    assert r.returncode == -signal.SIGKILL
+    # the children of the shell were killed with it
+    time.sleep(1)
+    assert not marker.exists()
+
+
+def test_default_timeout():
+    runner = ToolRunner(timeouts={'default': 0.2, 'sh': 0})
+    assert runner.timeout('sleep') == 0.2
+    assert runner.timeout('sh') is None
+    with pytest.raises(subprocess.CalledProcessError):
+        runner.run(['sleep', '10'], check=True)
+
+
+def test_submit_limit():
+    runner = ToolRunner(jobs=2)
+    start = time.monotonic()
+    futures = [runner.submit(['sh', '-c', 'sleep 0.3; echo $0', str(i)], capture_output=True, encoding='utf8')
+               for i in range(4)]
+    assert [future.result().stdout for future in futures] == ['0\n', '1\n', '2\n', '3\n']
+    # two rounds of two tools
+    assert 0.6 <= time.monotonic() - start
+    assert runner.stats['sh'].calls == 4
+    assert runner.stats['sh'].duration >= 1.2
+
+
+def test_stats():
+    runner = ToolRunner()
+    runner.run(['true'])
+    stats = runner.take_stats()
+    assert stats['true'].calls == 1
+    assert not runner.stats
+    runner.run(['true'])
+    runner.merge_stats(stats)
+    assert runner.stats['true'].calls == 2